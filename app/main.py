@@ -1,36 +1,520 @@
-from fastapi import FastAPI, HTTPException
-import pickle
-import pandas as pd
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.path.pardir))
+sys.path.append(ROOT_DIR)
+from scripts.customer_store import CustomerFeatureStore
+from scripts.instrumentation import MetricsRegistry, timed_call
+from scripts.serving.batching import MicroBatcher
+from scripts.serving.cache import PredictionCache, SQLiteStore, feature_keys
+from scripts.serving.executor import BoundedExecutor, QueueFullError
+from scripts.scorecard import Scorecard
+from scripts.serving.model_loader import (
+    ModelLoader,
+    init_worker,
+    worker_predict,
+    worker_predict_proba,
+)
+
 # Initialize FastAPI app
 app = FastAPI()
 
-# Load the trained model
-MODEL_PATH = "../checkpoint/best_model.pkl"
-try:
-    with open(MODEL_PATH, "rb") as f:
-        model = pickle.load(f)
-except Exception as e:
-    raise RuntimeError(f"Failed to load model: {e}")
+# The model is loaded lazily: a background load starts at startup and /ready reports
+# when it is done. An exported flat model (python -m scripts.serving.tree_export) is
+# memory-mapped and shared across workers; otherwise the pickle is loaded.
+CHECKPOINT_DIR = os.getenv("CHECKPOINT_DIR", os.path.join(ROOT_DIR, "checkpoints"))
+MODEL_PATH = os.getenv("MODEL_PATH", os.path.join(CHECKPOINT_DIR, "best_model.pkl"))
+FLAT_MODEL_DIR = os.getenv(
+    "FLAT_MODEL_DIR", os.path.join(CHECKPOINT_DIR, "best_model_flat")
+)
+COMPILE_MODEL = os.getenv("COMPILE_MODEL", "1") == "1"
+models = ModelLoader(MODEL_PATH, FLAT_MODEL_DIR, COMPILE_MODEL)
+
+# The fitted feature transform saved next to the model is also loaded on first use
+TRANSFORM_PATH = os.path.join(os.path.dirname(MODEL_PATH), "feature_transform.pkl")
+_transformer = None
+
+
+def get_transformer():
+    global _transformer
+    if _transformer is None and os.path.exists(TRANSFORM_PATH):
+        from scripts.feature_transform import FeatureTransformer
+
+        _transformer = FeatureTransformer.load(TRANSFORM_PATH)
+    return _transformer
+
+
+# Open the customer feature store for fresh per-customer aggregates, if there is one
+CUSTOMER_STORE_PATH = os.getenv(
+    "CUSTOMER_STORE_PATH", os.path.join(os.path.dirname(MODEL_PATH), "customer_store")
+)
+customer_store = (
+    CustomerFeatureStore(CUSTOMER_STORE_PATH)
+    if os.path.exists(os.path.join(CUSTOMER_STORE_PATH, "meta.json"))
+    else None
+)
+
+# Inference runs on a dedicated bounded pool so the event loop never blocks on the model.
+# Requests beyond EXECUTOR_WORKERS + EXECUTOR_QUEUE in flight are rejected with 503, and
+# requests not answered within REQUEST_TIMEOUT_MS (0 disables) get a 504.
+EXECUTOR_KIND = os.getenv("EXECUTOR_KIND", "thread")
+EXECUTOR_WORKERS = int(os.getenv("EXECUTOR_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXECUTOR_QUEUE = int(os.getenv("EXECUTOR_QUEUE", "32"))
+REQUEST_TIMEOUT_MS = float(os.getenv("REQUEST_TIMEOUT_MS", "1000"))
+REQUEST_TIMEOUT = REQUEST_TIMEOUT_MS / 1000 if REQUEST_TIMEOUT_MS > 0 else None
+if EXECUTOR_KIND == "process":
+    # Each worker process loads its own model; flat models are memory-mapped and shared
+    executor = BoundedExecutor(
+        "process",
+        EXECUTOR_WORKERS,
+        EXECUTOR_QUEUE,
+        initializer=init_worker,
+        initargs=(MODEL_PATH, FLAT_MODEL_DIR, COMPILE_MODEL),
+    )
+    predict_fn = worker_predict
+    predict_proba_fn = worker_predict_proba
+else:
+    executor = BoundedExecutor("thread", EXECUTOR_WORKERS, EXECUTOR_QUEUE)
+
+    def predict_fn(X):
+        return models.get().predict(X)
+
+    def predict_proba_fn(X):
+        return models.get().predict_proba(X)
+
+
+# Micro-batching is opt-in: concurrent /predict calls are coalesced into one model call.
+# Up to EXECUTOR_WORKERS batches run at once; rows beyond MICRO_BATCH_QUEUE waiting for
+# a batch (default: enough to fill every executor slot) are rejected with 503.
+MICRO_BATCHING = os.getenv("MICRO_BATCHING", "0") == "1"
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "64"))
+MAX_WAIT_MS = float(os.getenv("MAX_WAIT_MS", "5"))
+MICRO_BATCH_QUEUE = int(
+    os.getenv(
+        "MICRO_BATCH_QUEUE", str(MAX_BATCH_SIZE * (EXECUTOR_WORKERS + EXECUTOR_QUEUE))
+    )
+)
+batcher = MicroBatcher(
+    predict_fn,
+    MAX_BATCH_SIZE,
+    MAX_WAIT_MS,
+    executor=executor,
+    max_queue=MICRO_BATCH_QUEUE,
+    max_in_flight=EXECUTOR_WORKERS,
+)
+
+# Scorecard turning default probabilities into credit scores and loan terms
+scorecard = Scorecard(
+    base_score=float(os.getenv("SCORE_BASE", "600")),
+    base_odds=float(os.getenv("SCORE_BASE_ODDS", "50")),
+    pdo=float(os.getenv("SCORE_PDO", "20")),
+)
+
+# Per-row prediction cache keyed by a hash of the features. PREDICTION_CACHE_SIZE=0
+# disables it. With PREDICTION_CACHE_DB set, workers also share results through that
+# SQLite file. Entries expire after PREDICTION_CACHE_TTL seconds and are dropped when
+# a different model checkpoint is loaded.
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+PREDICTION_CACHE_DB = os.getenv("PREDICTION_CACHE_DB")
+prediction_cache = None
+if PREDICTION_CACHE_SIZE > 0:
+    prediction_cache = PredictionCache(
+        PREDICTION_CACHE_SIZE,
+        PREDICTION_CACHE_TTL,
+        SQLiteStore(PREDICTION_CACHE_DB) if PREDICTION_CACHE_DB else None,
+    )
+
+# Prometheus metrics served on /metrics. METRICS_ENABLED=0 turns off the per-request
+# and per-inference timing; the model, executor and batching values are only read
+# when /metrics is scraped, so they cost nothing in between.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+metrics = MetricsRegistry()
+request_count = metrics.counter(
+    "http_requests_total",
+    "HTTP requests by route and status",
+    ["method", "route", "status"],
+)
+request_latency = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"]
+)
+inference_time = metrics.histogram(
+    "model_inference_seconds",
+    "Time in the model per executor call, excluding queueing",
+    ["method"],
+)
+if METRICS_ENABLED:
+    batcher.on_inference = lambda seconds: inference_time.observe(
+        seconds, method="predict"
+    )
+metrics.gauge(
+    "model_ready", "1 once the model is loaded", callback=lambda: int(models.ready)
+)
+metrics.gauge(
+    "executor_in_flight",
+    "Jobs running or queued on the executor",
+    callback=lambda: executor.in_flight,
+)
+metrics.gauge(
+    "executor_capacity",
+    "Jobs the executor accepts at once",
+    callback=lambda: executor.capacity,
+)
+metrics.counter(
+    "executor_rejected_total",
+    "Jobs rejected with 503",
+    callback=lambda: executor.rejected,
+)
+metrics.counter(
+    "executor_timed_out_total",
+    "Jobs that missed the request deadline",
+    callback=lambda: executor.timed_out,
+)
+metrics.counter(
+    "batcher_batches_total",
+    "Micro-batches dispatched",
+    callback=lambda: batcher.stats.batches,
+)
+if prediction_cache is not None:
+    metrics.counter(
+        "prediction_cache_hits_total",
+        "Rows answered from the prediction cache",
+        callback=lambda: prediction_cache.hits,
+    )
+    metrics.counter(
+        "prediction_cache_misses_total",
+        "Rows that needed a model evaluation",
+        callback=lambda: prediction_cache.misses,
+    )
+    metrics.gauge(
+        "prediction_cache_entries",
+        "Rows held in the local prediction cache",
+        callback=lambda: len(prediction_cache),
+    )
+metrics.counter(
+    "batcher_rows_total",
+    "Rows dispatched in micro-batches",
+    callback=lambda: batcher.stats.rows,
+)
+metrics.counter(
+    "batcher_rejected_total",
+    "Rows rejected with 503 because the micro-batch queue was full",
+    callback=lambda: batcher.stats.rejected,
+)
+metrics.counter(
+    "batcher_skipped_rows_total",
+    "Queued rows dropped because their request had already given up",
+    callback=lambda: batcher.stats.skipped,
+)
+
+
+# Define request schemas
+class PredictionInput(BaseModel):
+    features: List[float]
+
+
+class BatchPredictionInput(BaseModel):
+    records: List[List[float]]
+
+
+class SparseBatchPredictionInput(BaseModel):
+    # Per record: column positions of the non-zero features and their values
+    indices: List[List[int]]
+    values: List[List[float]]
+
+
+class Transaction(BaseModel):
+    CustomerId: str
+    ProviderId: str
+    ProductId: str
+    ProductCategory: str
+    ChannelId: str
+    PricingStrategy: int
+    Amount: float
+    Value: float
+    TransactionStartTime: str
+
+
+def get_model():
+    """The loaded model; answers 503 instead of blocking while it is still loading."""
+    if not models.ready:
+        detail = models.error or "Model is loading"
+        raise HTTPException(status_code=503, detail=detail)
+    return models.get()
+
+
+def to_matrix(rows):
+    """
+    Stack feature rows into a 2D float array. Empty input, ragged rows and a width
+    other than the model's are client errors and answered with 422.
+    """
+    model = get_model()
+    try:
+        X = np.asarray(rows, dtype=np.float64)
+    except ValueError:
+        raise HTTPException(
+            status_code=422, detail="rows must all have the same length"
+        )
+    if X.ndim != 2 or X.shape[0] == 0 or X.shape[1] != model.n_features_in_:
+        raise HTTPException(
+            status_code=422,
+            detail=f"expected rows of {model.n_features_in_} features, got shape {X.shape}",
+        )
+    return X
+
+
+if METRICS_ENABLED:
+
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Label by route template, not raw path, to keep the label set bounded
+            route = request.scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            request_count.inc(method=request.method, route=path, status=status)
+            request_latency.observe(
+                time.perf_counter() - start, method=request.method, route=path
+            )
+
+
+@app.on_event("startup")
+async def start_batcher():
+    models.start_background()
+    if MICRO_BATCHING:
+        await batcher.start()
+
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await batcher.stop()
+    executor.shutdown()
+
+
+async def run_model(X, fn=None):
+    """
+    Run `fn` (default: predict) off the event loop. Single dense rows to predict go
+    through the micro-batcher when it is enabled; everything else is one job on the
+    bounded executor.
+    """
+    try:
+        if fn is None and MICRO_BATCHING and isinstance(X, np.ndarray) and len(X) == 1:
+            return [await asyncio.wait_for(batcher.submit(X), REQUEST_TIMEOUT)]
+        fn = fn or predict_fn
+        if not METRICS_ENABLED:
+            return await executor.run(fn, X, timeout=REQUEST_TIMEOUT)
+        result, seconds = await executor.run(timed_call, fn, X, timeout=REQUEST_TIMEOUT)
+        method = "predict_proba" if fn is predict_proba_fn else "predict"
+        inference_time.observe(seconds, method=method)
+        return result
+    except QueueFullError:
+        raise HTTPException(status_code=503, detail="Server is overloaded, retry later")
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Prediction deadline exceeded")
+
+
+async def cache_call(fn, *args):
+    """
+    Call a prediction cache method. The in-process LRU is cheap enough for the event
+    loop; with the shared SQLite store, queries, lock waits and purges run in a
+    worker thread so they never stall other requests.
+    """
+    if prediction_cache.store is None:
+        return fn(*args)
+    return await asyncio.to_thread(fn, *args)
+
+
+async def run_prediction(X, fn=None):
+    """
+    Predictions for the rows of X. With the prediction cache on, dense rows seen
+    before are answered from it and only the remaining rows go to the model.
+    """
+    if prediction_cache is None or not isinstance(X, np.ndarray):
+        return await run_model(X, fn)
+    if prediction_cache.version != models.version:
+        await cache_call(prediction_cache.set_version, models.version)
+    method = "predict_proba" if fn is predict_proba_fn else "predict"
+    keys = feature_keys(X, method)
+    values = await cache_call(prediction_cache.get_many, keys)
+    missing = [i for i, value in enumerate(values) if value is None]
+    if missing:
+        computed = await run_model(X[missing], fn)
+        await cache_call(
+            prediction_cache.put_many, [keys[i] for i in missing], list(computed)
+        )
+        for i, value in zip(missing, computed):
+            values[i] = value
+    return np.asarray(values)
 
 
 # Define API endpoints
 @app.post("/predict")
-def predict(input_data):
+async def predict(input_data: PredictionInput):
     try:
-        # Convert input data to DataFrame
-        input_df = pd.DataFrame([input_data.dict()])
+        X = to_matrix([input_data.features])
 
         # Make prediction
-        prediction = model.predict(input_df)
+        prediction = await run_prediction(X)
 
         # Return response
-        return {"prediction": prediction.tolist()}
+        return {"prediction": np.asarray(prediction).tolist()}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {e}")
 
 
+@app.post("/predict/transaction")
+async def predict_transaction(input_data: Transaction):
+    transformer = get_transformer()
+    if transformer is None:
+        raise HTTPException(status_code=503, detail="Feature transform not available")
+    try:
+        customer_features = None
+        if customer_store is not None:
+            customer_store.refresh()
+            customer_features = customer_store.get(input_data.CustomerId)
+        try:
+            X = transformer.transform_record(input_data.dict(), customer_features)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid transaction: {e}")
+        X = X[np.newaxis, :]
+
+        prediction = await run_prediction(X)
+
+        return {"prediction": np.asarray(prediction).tolist()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {e}")
+
+
+@app.post("/predict/batch")
+async def predict_batch(input_data: BatchPredictionInput):
+    try:
+        X = to_matrix(input_data.records)
+
+        # One vectorized model call for all records
+        prediction = await run_prediction(X)
+
+        return {"prediction": np.asarray(prediction).tolist()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {e}")
+
+
+@app.post("/predict/batch/sparse")
+async def predict_batch_sparse(input_data: SparseBatchPredictionInput):
+    from scipy import sparse
+
+    try:
+        model = get_model()
+        lengths = [len(row) for row in input_data.indices]
+        if not lengths or lengths != [len(row) for row in input_data.values]:
+            raise HTTPException(
+                status_code=422,
+                detail="indices and values must be non-empty and of the same shape",
+            )
+        # Out-of-range column positions would be written outside the matrix by scipy
+        indices = np.fromiter(
+            (i for row in input_data.indices for i in row), np.int64, sum(lengths)
+        )
+        if indices.size and (
+            indices.min() < 0 or indices.max() >= model.n_features_in_
+        ):
+            raise HTTPException(
+                status_code=422,
+                detail=f"feature indices must be in [0, {model.n_features_in_})",
+            )
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        X = sparse.csr_matrix(
+            (
+                np.fromiter((v for row in input_data.values for v in row), np.float32),
+                indices.astype(np.int32),
+                indptr,
+            ),
+            shape=(len(lengths), model.n_features_in_),
+        )
+
+        prediction = await run_prediction(X)
+
+        return {"prediction": np.asarray(prediction).tolist()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {e}")
+
+
+@app.post("/score")
+async def score(input_data: BatchPredictionInput):
+    try:
+        X = to_matrix(input_data.records)
+        model = get_model()
+
+        # Probability of the default class, then score and loan terms as array math
+        proba = await run_prediction(X, predict_proba_fn)
+        bad_column = list(model.classes_).index(1)
+        result = scorecard.score_portfolio(proba[:, bad_column])
+
+        return {name: values.tolist() for name, values in result.items()}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Scoring error: {e}")
+
+
+@app.get("/ready")
+def ready():
+    if not models.ready:
+        detail = models.error or "Model is loading"
+        raise HTTPException(status_code=503, detail=detail)
+    return {"ready": True, "model": models.kind, "version": models.version}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/metrics/cache")
+def cache_metrics():
+    if prediction_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **prediction_cache.stats()}
+
+
+@app.post("/cache/invalidate")
+def invalidate_cache():
+    """Drop all cached predictions, e.g. after replacing the checkpoint on disk."""
+    if prediction_cache is not None:
+        prediction_cache.invalidate(models.version, shared=True)
+    return {"invalidated": prediction_cache is not None}
+
+
+@app.get("/metrics/batching")
+def batching_metrics():
+    return {"enabled": MICRO_BATCHING, **batcher.stats.summary()}
+
+
+@app.get("/metrics/executor")
+def executor_metrics():
+    return executor.stats()
+
+
 # Root endpoint
 @app.get("/")
 def home():
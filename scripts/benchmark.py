@@ -0,0 +1,443 @@
+import argparse
+import json
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from scripts.serving.tree_export import FlatEnsemble
+from scripts.customer_aggregates import (
+    AGGREGATE_COLUMNS,
+    aggregate_by_customer,
+    sample_std,
+)
+
+# Stages of the regression suite, in run order
+SUITE_STAGES = ["feature_engineering", "outliers", "woe", "predict"]
+# Metrics compared against the baseline; larger is worse for all of them
+BASELINE_METRICS = ["wall_s", "peak_mb"]
+
+
+def make_transactions(n_rows, n_customers=None, seed=42):
+    """Generate a synthetic transaction frame with CustomerId, TransactionId and Amount."""
+    rng = np.random.default_rng(seed)
+    n_customers = n_customers or max(n_rows // 30, 1)
+    customer_pool = np.array(
+        [f"CustomerId_{i}" for i in range(n_customers)], dtype=object
+    )
+    return pd.DataFrame(
+        {
+            "TransactionId": np.arange(n_rows),
+            "CustomerId": customer_pool[rng.integers(0, n_customers, n_rows)],
+            "Amount": np.round(rng.lognormal(7, 1.5, n_rows), 0),
+        }
+    )
+
+
+def legacy_aggregate_features(df):
+    """The original four-groupby, four-merge implementation, kept as the baseline."""
+    total_amount = (
+        df.groupby("CustomerId")["Amount"]
+        .sum()
+        .reset_index(name="TotalTransactionAmount")
+    )
+    avg_amount = (
+        df.groupby("CustomerId")["Amount"]
+        .mean()
+        .reset_index(name="AverageTransactionAmount")
+    )
+    transaction_count = (
+        df.groupby("CustomerId")["TransactionId"]
+        .count()
+        .reset_index(name="TransactionCount")
+    )
+    std_amount = (
+        df.groupby("CustomerId")["Amount"]
+        .std()
+        .reset_index(name="StdTransactionAmount")
+    )
+    aggregated_features = (
+        total_amount.merge(avg_amount, on="CustomerId", how="left")
+        .merge(transaction_count, on="CustomerId", how="left")
+        .merge(std_amount, on="CustomerId", how="left")
+    )
+    return df.merge(aggregated_features, on="CustomerId", how="left")
+
+
+def fused_aggregate_features(df):
+    """The single-pass bincount aggregation with an index-take broadcast."""
+    _, codes, stats = aggregate_by_customer(
+        df["CustomerId"].values, df["Amount"].values
+    )
+    df = df.copy()
+    df["TotalTransactionAmount"] = stats["total"][codes]
+    df["AverageTransactionAmount"] = stats["mean"][codes]
+    df["TransactionCount"] = stats["rows"][codes]
+    df["StdTransactionAmount"] = sample_std(stats["count"], stats["m2"])[codes]
+    return df
+
+
+def time_call(fn, *args, repeat=3):
+    """Best wall time in seconds over `repeat` calls, plus the last result."""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def benchmark_aggregation(sizes=(1_000_000, 10_000_000), repeat=3):
+    """Compare the legacy and fused customer aggregation on synthetic data."""
+    results = []
+    for n_rows in sizes:
+        df = make_transactions(n_rows)
+        legacy_time, legacy = time_call(legacy_aggregate_features, df, repeat=repeat)
+        fused_time, fused = time_call(fused_aggregate_features, df, repeat=repeat)
+        matches = np.allclose(
+            legacy[AGGREGATE_COLUMNS].values.astype(float),
+            fused[AGGREGATE_COLUMNS].values.astype(float),
+            equal_nan=True,
+        )
+        results.append(
+            {
+                "rows": n_rows,
+                "legacy_s": round(legacy_time, 3),
+                "fused_s": round(fused_time, 3),
+                "speedup": round(legacy_time / fused_time, 2),
+                "matches": matches,
+            }
+        )
+        print(results[-1])
+    return pd.DataFrame(results)
+
+
+def make_feature_rows(n_rows, n_features, seed=42, missing_rate=0.01):
+    """Random rows shaped like the model input: 6 scaled numeric columns, then one-hot."""
+    rng = np.random.default_rng(seed)
+    X = (rng.random((n_rows, n_features)) > 0.9).astype(np.float64)
+    X[:, :6] = rng.random((n_rows, 6))
+    X[:, :6][rng.random((n_rows, 6)) < missing_rate] = np.nan
+    return X
+
+
+def check_parity(model, flat, X):
+    """Max absolute predict_proba difference and whether predict agrees on every row."""
+    proba_diff = np.abs(model.predict_proba(X) - flat.predict_proba(X)).max()
+    same_labels = bool((model.predict(X) == flat.predict(X)).all())
+    return float(proba_diff), same_labels
+
+
+def benchmark_inference(
+    model_path="checkpoints/best_model.pkl", batch_sizes=(1, 64, 4096), repeat=20
+):
+    """Compare sklearn and FlatEnsemble inference latency and check their outputs agree."""
+    with open(model_path, "rb") as f:
+        model = pickle.load(f)
+    flat = FlatEnsemble.from_model(model)
+    proba_diff, same_labels = check_parity(
+        model, flat, make_feature_rows(10_000, model.n_features_in_)
+    )
+    print(f"Parity: max |proba diff| = {proba_diff:.2e}, same labels = {same_labels}")
+
+    results = []
+    for batch_size in batch_sizes:
+        X = make_feature_rows(batch_size, model.n_features_in_, seed=batch_size)
+        n = max(1, repeat // max(1, batch_size // 64))
+        sklearn_time, _ = time_call(model.predict_proba, X, repeat=n)
+        flat_time, _ = time_call(flat.predict_proba, X, repeat=n)
+        results.append(
+            {
+                "batch_size": batch_size,
+                "sklearn_ms": round(sklearn_time * 1000, 3),
+                "flat_ms": round(flat_time * 1000, 3),
+                "speedup": round(sklearn_time / flat_time, 2),
+            }
+        )
+        print(results[-1])
+    return pd.DataFrame(results)
+
+
+def make_schema_transactions(n_rows, n_customers=None, seed=42, fraud_rate=0.002):
+    """
+    Synthetic transactions with every column of the cleaned Xente data, as read from
+    the CSV (string timestamps). `n_customers` sets the CustomerId cardinality, which
+    drives the cost of the per-customer aggregates.
+    """
+    rng = np.random.default_rng(seed)
+    n_customers = n_customers or max(n_rows // 30, 1)
+
+    def ids(prefix, high, low=0):
+        pool = np.array([f"{prefix}_{i}" for i in range(low, high)], dtype=object)
+        return pool[rng.integers(0, len(pool), n_rows)]
+
+    customer = rng.integers(0, n_customers, n_rows)
+    amount = np.round(rng.lognormal(7, 1.5, n_rows), 0)
+    amount[rng.random(n_rows) < 0.4] *= -1  # Credits are negative amounts
+    start = pd.Timestamp("2018-11-15", tz="UTC")
+    seconds = np.sort(rng.integers(0, 90 * 86400, n_rows))
+    timestamps = start + pd.to_timedelta(seconds, unit="s")
+    return pd.DataFrame(
+        {
+            "TransactionId": [f"TransactionId_{i}" for i in range(n_rows)],
+            "BatchId": ids("BatchId", max(n_rows // 2, 1)),
+            "AccountId": np.array([f"AccountId_{i}" for i in customer], dtype=object),
+            "SubscriptionId": np.array(
+                [f"SubscriptionId_{i}" for i in customer], dtype=object
+            ),
+            "CustomerId": np.array([f"CustomerId_{i}" for i in customer], dtype=object),
+            "CurrencyCode": "UGX",
+            "CountryCode": 256,
+            "ProviderId": ids("ProviderId", 7, 1),
+            "ProductId": ids("ProductId", 28, 1),
+            "ProductCategory": rng.choice(
+                [
+                    "airtime",
+                    "financial_services",
+                    "utility_bill",
+                    "data_bundles",
+                    "tv",
+                    "ticket",
+                    "movies",
+                    "transport",
+                    "other",
+                ],
+                n_rows,
+            ),
+            "ChannelId": ids("ChannelId", 6, 1),
+            "Amount": amount,
+            "Value": np.abs(amount).astype(np.int64),
+            "TransactionStartTime": timestamps.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "PricingStrategy": rng.integers(0, 5, n_rows),
+            "FraudResult": (rng.random(n_rows) < fraud_rate).astype(np.int64),
+        }
+    )
+
+
+def measure(fn, setup=None, repeat=3, n_items=None):
+    """
+    Best wall time over `repeat` calls of fn(setup()), the peak traced allocation of
+    one extra call and the items per second at the best time. `setup` runs outside
+    the timed region and gives every call a fresh input.
+    """
+    setup = setup or (lambda: None)
+    best = np.inf
+    for _ in range(repeat):
+        arg = setup()
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+
+    arg = setup()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    result = {"wall_s": round(best, 4), "peak_mb": round(peak / 2**20, 2)}
+    if n_items:
+        result["items_per_s"] = round(n_items / best, 1)
+    return result
+
+
+def bench_feature_engineering(df, repeat=3):
+    """FeatureEngineering from aggregates through scaling, without writing features."""
+    from scripts.feature_engineer import FeatureEngineering
+
+    def run(frame):
+        fe = FeatureEngineering(frame, "FraudResult", verbose=False)
+        fe.create_aggregate_features()
+        fe.extract_features()
+        fe.encode_categorical_variables()
+        fe.normalize_standardize_numerical_features()
+
+    return measure(run, lambda: df, repeat, len(df))
+
+
+def bench_outliers(df, repeat=3):
+    """handle_outliers on Amount and Value, on a fresh copy each call."""
+    from scripts.preprocess_data import handle_outliers
+
+    return measure(
+        lambda frame: handle_outliers(frame, ["Amount", "Value"]),
+        lambda: df[["Amount", "Value"]].copy(),
+        repeat,
+        len(df),
+    )
+
+
+def bench_woe(df, repeat=3):
+    """DefaultEstimator.compute_woe and transform over per-customer RFMS scores."""
+    from scripts.rfms import build_rfms
+    from scripts.woe_binning import DefaultEstimator
+
+    _, rfms = build_rfms(df)
+    labels = (rfms.mean(axis=1) < 0.25).astype(int)
+
+    def run(X):
+        estimator = DefaultEstimator(threshold=0.25)
+        estimator.compute_woe(X, labels)
+        estimator.transform(X)
+
+    return measure(run, lambda: rfms, repeat, len(rfms))
+
+
+def bench_predict(n_requests=500, model_path="checkpoints/best_model.pkl", seed=42):
+    """
+    Sequential POST /predict calls through the FastAPI app in-process: wall time of
+    all calls, latency percentiles per call and requests per second. Returns None
+    when there is no model to serve.
+    """
+    if not os.path.exists(model_path):
+        return None
+    os.environ.setdefault("MODEL_PATH", os.path.abspath(model_path))
+    from fastapi.testclient import TestClient
+
+    from app.main import app, models
+
+    with TestClient(app) as client:
+        models.get()  # Wait for the background load so it is not timed
+        rows = make_feature_rows(n_requests, models.get().n_features_in_, seed)
+        rows = np.nan_to_num(rows).tolist()
+        runs = []  # Per-call latencies of every run; the first one is untraced
+
+        def run(_):
+            latencies = np.empty(n_requests)
+            for i, row in enumerate(rows):
+                start = time.perf_counter()
+                response = client.post("/predict", json={"features": row})
+                latencies[i] = time.perf_counter() - start
+                response.raise_for_status()
+            runs.append(latencies)
+
+        result = measure(run, repeat=1, n_items=n_requests)
+    result["p50_ms"] = round(float(np.percentile(runs[0], 50)) * 1000, 3)
+    result["p99_ms"] = round(float(np.percentile(runs[0], 99)) * 1000, 3)
+    return result
+
+
+def run_suite(
+    n_rows=100_000,
+    n_customers=None,
+    stages=None,
+    repeat=3,
+    n_requests=500,
+    model_path="checkpoints/best_model.pkl",
+):
+    """Run the regression suite on one synthetic dataset; returns config and per-stage results."""
+    stages = stages or SUITE_STAGES
+    n_customers = n_customers or max(n_rows // 30, 1)
+    df = make_schema_transactions(n_rows, n_customers)
+    runners = {
+        "feature_engineering": lambda: bench_feature_engineering(df, repeat),
+        "outliers": lambda: bench_outliers(df, repeat),
+        "woe": lambda: bench_woe(df, repeat),
+        "predict": lambda: bench_predict(n_requests, model_path),
+    }
+    results = {}
+    for stage in stages:
+        results[stage] = runners[stage]()
+        print(f"{stage}: {results[stage] or 'skipped (no model)'}")
+    config = {
+        "rows": n_rows,
+        "customers": n_customers,
+        "requests": n_requests,
+        "repeat": repeat,
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+    return {"config": config, "results": results}
+
+
+def save_baseline(suite, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(suite, f, indent=2)
+    print(f"Baseline saved to {path}.")
+
+
+def load_baseline(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_to_baseline(suite, baseline, tolerance=0.2):
+    """
+    Current against baseline value of every stage metric. A metric regresses when it
+    is more than `tolerance` (a fraction) above the baseline. Raises ValueError if
+    the two runs used different data sizes, since their numbers are not comparable.
+    """
+    keys = ["rows", "customers", "requests"]
+    if any(suite["config"][k] != baseline["config"][k] for k in keys):
+        raise ValueError(
+            f"Baseline was recorded with {[baseline['config'][k] for k in keys]} "
+            f"(rows, customers, requests), this run used {[suite['config'][k] for k in keys]}"
+        )
+    rows = []
+    for stage, result in suite["results"].items():
+        reference = baseline["results"].get(stage)
+        if not result or not reference:
+            continue
+        for metric in BASELINE_METRICS:
+            ratio = result[metric] / max(reference[metric], 1e-9)
+            rows.append(
+                {
+                    "stage": stage,
+                    "metric": metric,
+                    "baseline": reference[metric],
+                    "current": result[metric],
+                    "ratio": round(ratio, 3),
+                    "regressed": ratio > 1 + tolerance,
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline hot paths.")
+    parser.add_argument("stage", choices=["aggregation", "inference", "suite"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--model-path", default="checkpoints/best_model.pkl")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 4096])
+    parser.add_argument("--rows", type=int, default=100_000, help="Suite data size")
+    parser.add_argument("--customers", type=int, default=None)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--stages", nargs="+", choices=SUITE_STAGES, default=None)
+    parser.add_argument("--baseline", default="benchmarks/baseline.json")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Store this run as the baseline"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.stage == "aggregation":
+        print(benchmark_aggregation(args.sizes, args.repeat))
+    elif args.stage == "inference":
+        print(benchmark_inference(args.model_path, args.batch_sizes, args.repeat * 7))
+    elif args.stage == "suite":
+        suite = run_suite(
+            args.rows,
+            args.customers,
+            args.stages,
+            args.repeat,
+            args.requests,
+            args.model_path,
+        )
+        if args.save_baseline:
+            save_baseline(suite, args.baseline)
+        elif os.path.exists(args.baseline):
+            comparison = compare_to_baseline(
+                suite, load_baseline(args.baseline), args.tolerance
+            )
+            print(comparison.to_string(index=False))
+            if comparison["regressed"].any():
+                sys.exit(1)
+        else:
+            print(f"No baseline at {args.baseline}; run with --save-baseline first.")
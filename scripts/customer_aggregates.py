@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+AGGREGATE_COLUMNS = [
+    "TotalTransactionAmount",
+    "AverageTransactionAmount",
+    "TransactionCount",
+    "StdTransactionAmount",
+]
+
+
+def factorize_ids(customer_ids):
+    """
+    Integer code per row and the unique ids in order of first appearance. Categorical
+    ids (Parquet reads, optimize_dtypes) are factorized by their category codes
+    instead of hashing every string. Missing ids get code -1.
+    """
+    if isinstance(getattr(customer_ids, "dtype", None), pd.CategoricalDtype):
+        codes, uniques = pd.factorize(pd.Categorical(customer_ids), sort=False)
+        return codes, np.asarray(uniques)
+    return pd.factorize(np.asarray(customer_ids), sort=False)
+
+
+def aggregate_by_customer(customer_ids, amounts):
+    """
+    Compute count, sum, mean and M2 of `amounts` per customer in one grouped pass.
+    Customer ids are factorized once and every statistic is a bincount over the codes,
+    so no intermediate frames are built. Rows without a customer id (code -1) belong
+    to no customer and are left out. Returns the unique ids, the per-row codes and
+    a dict of per-customer arrays.
+    """
+    codes, uniques = factorize_ids(customer_ids)
+    amounts = np.asarray(amounts, dtype=np.float64)
+    n_customers = len(uniques)
+    grouped = codes
+    known = codes >= 0
+    if not known.all():
+        grouped, amounts = codes[known], amounts[known]
+
+    # NaN amounts are skipped like pandas does, but still count as transactions
+    valid = ~np.isnan(amounts)
+    values = np.where(valid, amounts, 0.0)
+    rows = np.bincount(grouped, minlength=n_customers)
+    count = np.bincount(grouped, weights=valid, minlength=n_customers)
+    total = np.bincount(grouped, weights=values, minlength=n_customers)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+    deviation = np.where(valid, amounts - mean[grouped], 0.0)
+    m2 = np.bincount(grouped, weights=deviation * deviation, minlength=n_customers)
+
+    stats = {"rows": rows, "count": count, "total": total, "mean": mean, "m2": m2}
+    return uniques, codes, stats
+
+
+def take_customers(values, codes):
+    """Per-customer `values` broadcast to rows by code; rows with code -1 get NaN."""
+    taken = np.asarray(values, dtype=np.float64)[codes]
+    missing = codes < 0
+    if missing.any():
+        taken[missing] = np.nan
+    return taken
+
+
+def merge_moments(count_a, mean_a, m2_a, count_b, mean_b, m2_b):
+    """
+    Combine two sets of (count, mean, M2) statistics with the Chan et al. parallel
+    update (Welford's algorithm for batches). Works elementwise on arrays. Counts are
+    the numbers of non-missing values; a side with count 0 leaves the other unchanged,
+    so an all-NaN chunk does not turn a customer's mean into NaN.
+    """
+    count = count_a + count_b
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = mean_b - mean_a
+        mean = np.where(
+            count_a == 0,
+            mean_b,
+            np.where(count_b == 0, mean_a, mean_a + delta * count_b / count),
+        )
+        m2 = np.where(
+            count_a == 0,
+            m2_b,
+            np.where(
+                count_b == 0, m2_a, m2_a + m2_b + delta**2 * count_a * count_b / count
+            ),
+        )
+    return count, mean, m2
+
+
+def sample_std(count, m2):
+    """Sample standard deviation from counts and M2 (NaN when fewer than two values)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 1, np.sqrt(m2 / (count - 1)), np.nan)
+
+
+class CustomerAggregates:
+    def __init__(self):
+        """
+        Running per-customer transaction statistics that can be updated chunk by chunk.
+        Memory grows with the number of customers, not the number of transactions.
+        """
+        self.customer_ids = pd.Index([])
+        # Transactions, and the non-missing amounts the moments are computed over
+        self.rows = np.zeros(0, dtype=np.int64)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.total = np.zeros(0, dtype=np.float64)
+        self.mean = np.zeros(0, dtype=np.float64)
+        # Sum of squared deviations from the mean
+        self.m2 = np.zeros(0, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.customer_ids)
+
+    def _rows_for(self, ids):
+        """Map customer ids to row positions, appending rows for unseen customers."""
+        rows = self.customer_ids.get_indexer(ids)
+        new = rows < 0
+        if new.any():
+            n_new = int(new.sum())
+            rows[new] = np.arange(len(self), len(self) + n_new)
+            self.customer_ids = self.customer_ids.append(pd.Index(ids[new]))
+            self.rows = np.concatenate([self.rows, np.zeros(n_new, np.int64)])
+            self.count = np.concatenate([self.count, np.zeros(n_new, np.int64)])
+            self.total = np.concatenate([self.total, np.zeros(n_new)])
+            self.mean = np.concatenate([self.mean, np.zeros(n_new)])
+            self.m2 = np.concatenate([self.m2, np.zeros(n_new)])
+        return rows
+
+    def update(self, customer_ids, amounts):
+        """Fold a chunk of transactions into the running statistics."""
+        uniques, _, chunk = aggregate_by_customer(customer_ids, amounts)
+        rows = self._rows_for(np.asarray(uniques))
+        n_b = chunk["count"].astype(np.int64)
+        mean_b = chunk["mean"]
+        m2_b = chunk["m2"]
+
+        self.count[rows], self.mean[rows], self.m2[rows] = merge_moments(
+            self.count[rows], self.mean[rows], self.m2[rows], n_b, mean_b, m2_b
+        )
+        self.rows[rows] += chunk["rows"]
+        self.total[rows] += chunk["total"]
+
+    def rows_of(self, customer_ids):
+        """Row position of each customer id (-1 for unknown customers)."""
+        return self.customer_ids.get_indexer(np.asarray(customer_ids))
+
+    def save(self, path):
+        """Save the running statistics so the next delta can be folded in without a rebuild."""
+        np.savez(
+            path,
+            customer_ids=np.asarray(self.customer_ids, dtype=str),
+            rows=self.rows,
+            count=self.count,
+            total=self.total,
+            mean=self.mean,
+            m2=self.m2,
+        )
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        aggregates = cls()
+        aggregates.customer_ids = pd.Index(data["customer_ids"].astype(object))
+        aggregates.rows = data["rows"]
+        aggregates.count = data["count"]
+        aggregates.total = data["total"]
+        aggregates.mean = data["mean"]
+        aggregates.m2 = data["m2"]
+        return aggregates
+
+    def std(self):
+        """Sample standard deviation per customer (NaN for single-transaction customers)."""
+        return sample_std(self.count, self.m2)
+
+    def to_frame(self):
+        """Return the aggregates as a DataFrame keyed by CustomerId."""
+        return pd.DataFrame(
+            {
+                "CustomerId": self.customer_ids.values,
+                "TotalTransactionAmount": self.total,
+                "AverageTransactionAmount": self.mean,
+                "TransactionCount": self.rows,
+                "StdTransactionAmount": self.std(),
+            }
+        )
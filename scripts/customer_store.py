@@ -0,0 +1,285 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+STORE_VERSION = 2
+# Transactions, non-missing amounts (the weight of mean and M2), sum, mean and M2
+COLUMNS = {
+    "rows": np.int64,
+    "count": np.int64,
+    "total": np.float64,
+    "mean": np.float64,
+    "m2": np.float64,
+}
+
+
+def hash_key(key):
+    """Stable 64-bit hash of a CustomerId (Python's hash() is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def encode_ids(customer_ids):
+    return [str(customer_id).encode("utf-8") for customer_id in customer_ids]
+
+
+def _insert_slots(slots, rows, hashes):
+    """Place rows into the hash table `slots` (linear probing); all keys must be absent."""
+    mask = len(slots) - 1
+    positions = np.asarray(hashes, dtype=np.uint64) & np.uint64(mask)
+    positions = positions.astype(np.int64)
+    pending = np.arange(len(rows))
+    rows = np.asarray(rows)
+    while pending.size:
+        candidates = positions[pending]
+        free = slots[candidates] == 0
+        # Several keys may target the same free slot; the first one wins this round
+        _, first = np.unique(candidates[free], return_index=True)
+        winners = pending[free][first]
+        slots[positions[winners]] = rows[winners] + 1
+        pending = np.setdiff1d(pending, winners, assume_unique=True)
+        positions[pending] = (positions[pending] + 1) & mask
+
+
+class CustomerFeatureStore:
+    def __init__(self, path, mode="r"):
+        """
+        Persistent per-customer aggregates backed by memory-mapped .npy columns.
+        An open-addressing hash table (`slots.npy`, linear probing) maps CustomerId to a
+        row, so a lookup touches a handful of array elements regardless of store size.
+        Open with mode="r" for serving and mode="r+" to apply incremental updates;
+        readers see in-place updates through the shared page cache and pick up
+        reallocations with `refresh()`.
+        """
+        self.path = path
+        self.mode = mode
+        self._open()
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.npy")
+
+    def _open(self):
+        meta_path = os.path.join(self.path, "meta.json")
+        with open(meta_path) as file:
+            self.meta = json.load(file)
+        if self.meta["version"] != STORE_VERSION:
+            raise ValueError(
+                f"Unsupported customer store version {self.meta['version']}"
+            )
+        self.meta_mtime = os.stat(meta_path).st_mtime_ns
+        self.ids = np.load(self._file("ids"), mmap_mode=self.mode)
+        self.slots = np.load(self._file("slots"), mmap_mode=self.mode)
+        self.columns = {
+            name: np.load(self._file(name), mmap_mode=self.mode) for name in COLUMNS
+        }
+        self.mask = len(self.slots) - 1
+
+    def _write_meta(self):
+        tmp_path = os.path.join(self.path, "meta.json.tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(self.meta, file)
+        os.replace(tmp_path, os.path.join(self.path, "meta.json"))
+
+    def __len__(self):
+        return self.meta["n_customers"]
+
+    @classmethod
+    def create(cls, path, customer_ids, amounts, capacity=None, id_width=32):
+        """Build a store from a full transaction history."""
+        # Imported here so that opening a store for serving does not import pandas
+        from scripts.customer_aggregates import aggregate_by_customer
+
+        uniques, _, stats = aggregate_by_customer(customer_ids, amounts)
+        keys = encode_ids(uniques)
+        n_customers = len(keys)
+        capacity = max(capacity or 2 * n_customers, n_customers, 1)
+        id_width = max([id_width, *map(len, keys)])
+        cls._allocate(path, capacity, id_width)
+        store = cls(path, mode="r+")
+        store._append(
+            keys,
+            stats["rows"],
+            stats["count"],
+            stats["total"],
+            stats["mean"],
+            stats["m2"],
+        )
+        store.flush()
+        return store
+
+    @staticmethod
+    def _allocate(path, capacity, id_width, source=None):
+        """
+        Write columns (optionally copying rows from `source`), a hash table indexing
+        them and a meta file. Every file is completed under a temporary name before it
+        replaces the old one, and rows keep their positions, so a reader opening the
+        store at any point sees a consistent, fully indexed table.
+        """
+        os.makedirs(path, exist_ok=True)
+        n_rows = 0 if source is None else len(source)
+        table_size = 1 << int(np.ceil(np.log2(2 * capacity)))  # Load factor <= 0.5
+        arrays = {
+            "ids": (f"S{id_width}", (capacity,)),
+            "slots": (np.int64, (table_size,)),
+        }
+        arrays.update({name: (dtype, (capacity,)) for name, dtype in COLUMNS.items()})
+        for name, (dtype, shape) in arrays.items():
+            tmp_path = os.path.join(path, f"{name}.tmp.npy")
+            array = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=dtype, shape=shape
+            )
+            if source is not None and name == "slots":
+                hashes = [hash_key(key) for key in source.ids[:n_rows]]
+                _insert_slots(array, np.arange(n_rows), hashes)
+            elif source is not None:
+                array[:n_rows] = (
+                    source.ids if name == "ids" else source.columns[name]
+                )[:n_rows]
+            array.flush()
+            del array
+            os.replace(tmp_path, os.path.join(path, f"{name}.npy"))
+
+        meta = {
+            "version": STORE_VERSION,
+            "n_customers": n_rows,
+            "capacity": capacity,
+            "id_width": id_width,
+        }
+        tmp_path = os.path.join(path, "meta.json.tmp")
+        with open(tmp_path, "w") as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+    def _insert(self, rows, hashes):
+        """Place rows into the hash table; all keys must be absent."""
+        _insert_slots(self.slots, rows, hashes)
+
+    def _find(self, keys):
+        """
+        Row for each encoded key, or -1 when the customer is not in the store. Keys
+        longer than the stored id width cannot be in the store and are never compared,
+        since casting them to the id dtype would truncate them onto a shorter id.
+        """
+        positions = np.array(
+            [hash_key(key) & self.mask for key in keys], dtype=np.int64
+        )
+        width = self.ids.dtype.itemsize
+        fits = np.array([len(key) <= width for key in keys], dtype=bool)
+        keys = np.asarray([key if ok else b"" for key, ok in zip(keys, fits)])
+        keys = keys.astype(self.ids.dtype)
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        pending = np.flatnonzero(fits)
+        while pending.size:
+            slot = self.slots[positions[pending]]
+            empty = slot == 0
+            hit = ~empty & (self.ids[np.maximum(slot - 1, 0)] == keys[pending])
+            rows[pending[hit]] = slot[hit] - 1
+            pending = pending[~empty & ~hit]
+            positions[pending] = (positions[pending] + 1) & self.mask
+        return rows
+
+    def lookup(self, customer_id):
+        """Row of one customer, or -1 (linear probing on the memory-mapped table)."""
+        key = str(customer_id).encode("utf-8")
+        position = hash_key(key) & self.mask
+        while True:
+            slot = self.slots[position]
+            if slot == 0:
+                return -1
+            if self.ids[slot - 1] == key:
+                return int(slot - 1)
+            position = (position + 1) & self.mask
+
+    def get(self, customer_id):
+        """
+        Aggregate features (total, mean, count, std) of one customer, in the order of
+        AGGREGATE_COLUMNS, or None if the customer is unknown.
+        """
+        row = self.lookup(customer_id)
+        if row < 0:
+            return None
+        count = self.columns["count"][row]
+        return np.array(
+            [
+                self.columns["total"][row],
+                self.columns["mean"][row],
+                self.columns["rows"][row],
+                np.sqrt(self.columns["m2"][row] / (count - 1)) if count > 1 else np.nan,
+            ]
+        )
+
+    def _append(self, keys, n_rows, count, total, mean, m2):
+        n_old = len(self)
+        n_new = len(keys)
+        if (
+            n_old + n_new > self.meta["capacity"]
+            or max(map(len, keys), default=0) > self.meta["id_width"]
+        ):
+            self._grow(n_old + n_new, max([self.meta["id_width"], *map(len, keys)]))
+        rows = np.arange(n_old, n_old + n_new)
+        self.ids[rows] = keys
+        for name, values in zip(COLUMNS, (n_rows, count, total, mean, m2)):
+            self.columns[name][rows] = values
+        # Publish rows in the index only after their data is written
+        self._insert(rows, [hash_key(key) for key in keys])
+        self.meta["n_customers"] = n_old + n_new
+        self._write_meta()
+        return rows
+
+    def _grow(self, n_required, id_width):
+        """Reallocate columns and a rehashed table with double capacity (or wider ids)."""
+        capacity = max(2 * self.meta["capacity"], n_required)
+        self.flush()
+        self._allocate(self.path, capacity, id_width, source=self)
+        self._open()
+
+    def update(self, customer_ids, amounts):
+        """Fold a batch of new transactions into the stored aggregates in place."""
+        if self.mode != "r+":
+            raise ValueError("Open the store with mode='r+' to update it")
+        from scripts.customer_aggregates import aggregate_by_customer, merge_moments
+
+        uniques, _, chunk = aggregate_by_customer(customer_ids, amounts)
+        keys = encode_ids(uniques)
+        rows = self._find(keys)
+
+        new = rows < 0
+        if new.any():
+            zeros = np.zeros(int(new.sum()))
+            counts = zeros.astype(np.int64)
+            rows[new] = self._append(
+                [key for key, is_new in zip(keys, new) if is_new],
+                counts,
+                counts,
+                zeros,
+                zeros,
+                zeros,
+            )
+
+        # Mean and M2 are weighted by the non-missing amounts, not the transactions
+        count, mean, m2 = merge_moments(
+            self.columns["count"][rows],
+            self.columns["mean"][rows],
+            self.columns["m2"][rows],
+            chunk["count"].astype(np.int64),
+            chunk["mean"],
+            chunk["m2"],
+        )
+        self.columns["count"][rows] = count
+        self.columns["mean"][rows] = mean
+        self.columns["m2"][rows] = m2
+        self.columns["rows"][rows] += chunk["rows"]
+        self.columns["total"][rows] += chunk["total"]
+        self.flush()
+
+    def refresh(self):
+        """Reopen the memory maps if a writer reallocated the store."""
+        mtime = os.stat(os.path.join(self.path, "meta.json")).st_mtime_ns
+        if mtime != self.meta_mtime:
+            self._open()
+
+    def flush(self):
+        if self.mode == "r+":
+            for array in (self.ids, self.slots, *self.columns.values()):
+                array.flush()
@@ -0,0 +1,223 @@
+import argparse
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# Storage types of the cleaned transaction table. Identifier and label-like string
+# columns become dictionary-encoded categoricals; TransactionId is unique per row and
+# stays a plain string.
+CATEGORY_COLUMNS = [
+    "BatchId",
+    "AccountId",
+    "SubscriptionId",
+    "CustomerId",
+    "CurrencyCode",
+    "ProviderId",
+    "ProductId",
+    "ProductCategory",
+    "ChannelId",
+]
+NUMERIC_DTYPES = {
+    # float32 rounds amounts above 2**24; every partition shares one lossless type
+    "Amount": "float64",
+    "Value": "int64",
+    "CountryCode": "int64",
+    "PricingStrategy": "int64",
+    "FraudResult": "int64",
+}
+TIME_COLUMN = "TransactionStartTime"
+PARTITION_COLUMN = "month"  # Hive partition key, e.g. month=2019-01
+
+
+def is_parquet(path):
+    """Parquet file or partitioned Parquet directory (anything that is not a .csv)."""
+    return os.path.isdir(path) or str(path).endswith(".parquet")
+
+
+def cast_transactions(df):
+    """
+    Convert a cleaned transaction frame to the storage types in place: categoricals,
+    a native UTC timestamp and fixed-width numbers. Columns that are absent are skipped.
+    """
+    for col in CATEGORY_COLUMNS:
+        if col in df and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+    for col, dtype in NUMERIC_DTYPES.items():
+        if col in df:
+            df[col] = df[col].astype(dtype)
+    if TIME_COLUMN in df and not pd.api.types.is_datetime64_any_dtype(df[TIME_COLUMN]):
+        df[TIME_COLUMN] = pd.to_datetime(df[TIME_COLUMN], utc=True)
+    return df
+
+
+def _days(timestamps):
+    return timestamps.dt.floor("D")
+
+
+def _merge_existing(df, path):
+    """
+    `df` plus the rows already stored for the months it touches, except those on the
+    days `df` covers: re-writing a day replaces it, the rest of the month is kept.
+    """
+    if not os.path.isdir(path):
+        return df
+    months = df[TIME_COLUMN].dt.strftime("%Y-%m").unique().tolist()
+    dataset = _open_dataset(path)
+    if PARTITION_COLUMN not in dataset.schema.names:
+        return df
+    table = dataset.to_table(
+        columns=_projection(dataset, None),
+        filter=ds.field(PARTITION_COLUMN).isin(months),
+    )
+    if not table.num_rows:
+        return df
+    existing = cast_transactions(_to_frame(table))
+    existing = existing[~_days(existing[TIME_COLUMN]).isin(_days(df[TIME_COLUMN]))]
+    merged = pd.concat([existing, df], ignore_index=True)
+    return cast_transactions(merged)
+
+
+def write_transactions(df, path, max_rows_per_group=100_000):
+    """
+    Store transactions as a Parquet dataset partitioned by month under `path`, in
+    time order so every row group covers a narrow time range. A month that `df`
+    touches is rewritten with the rows already stored for it merged in: days present
+    in `df` replace the stored ones, other days and other months are kept. A daily
+    run therefore only rewrites its month, and re-running a day is idempotent.
+    """
+    df = _merge_existing(cast_transactions(df.copy()), path)
+    df = df.sort_values(TIME_COLUMN, kind="stable")
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    month = df[TIME_COLUMN].dt.strftime("%Y-%m").to_numpy(dtype=object)
+    table = table.append_column(PARTITION_COLUMN, pa.array(month, pa.string()))
+    ds.write_dataset(
+        table,
+        path,
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive"
+        ),
+        existing_data_behavior="delete_matching",
+        max_rows_per_group=max_rows_per_group,
+        max_rows_per_file=0,
+    )
+    print(f"Saved {len(df)} transactions to {path}.")
+
+
+def _utc(bound):
+    bound = pd.Timestamp(bound)
+    return bound.tz_localize("UTC") if bound.tzinfo is None else bound
+
+
+def _filter_frame(df, columns=None, start=None, end=None):
+    """
+    In-memory equivalent of the Parquet date filter and projection, for CSV input.
+    The result gets a fresh 0..n-1 index like a Parquet read, so frames built from it
+    row by row (e.g. the one-hot block) line up with it.
+    """
+    if start is not None:
+        df = df[df[TIME_COLUMN] >= _utc(start)]
+    if end is not None:
+        df = df[df[TIME_COLUMN] < _utc(end)]
+    if columns is not None:
+        df = df[list(columns)]
+    return df.reset_index(drop=True)
+
+
+def _date_filter(dataset, start=None, end=None):
+    """
+    Filter expression for start <= TransactionStartTime < end. The month bounds let
+    the scan skip whole partitions; the timestamp bounds are checked against the
+    row-group statistics of the files that remain.
+    """
+    expression = None
+    time_type = dataset.schema.field(TIME_COLUMN).type
+    partitioned = PARTITION_COLUMN in dataset.schema.names
+    for bound, op in [(start, "ge"), (end, "lt")]:
+        if bound is None:
+            continue
+        bound = _utc(bound)
+        field = ds.field(TIME_COLUMN)
+        value = pa.scalar(bound, type=time_type)
+        condition = field >= value if op == "ge" else field < value
+        if partitioned:
+            month = ds.field(PARTITION_COLUMN)
+            key = bound.strftime("%Y-%m")
+            condition = condition & (month >= key if op == "ge" else month <= key)
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def _open_dataset(path):
+    return ds.dataset(path, format="parquet", partitioning="hive")
+
+
+def _to_frame(table):
+    df = table.to_pandas()
+    # Date filters can leave categories without rows; drop them so group-bys match
+    # what the same rows would give after reading a CSV
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def _projection(dataset, columns):
+    names = [name for name in dataset.schema.names if name != PARTITION_COLUMN]
+    return names if columns is None else list(columns)
+
+
+def _read_csv(path, **kwargs):
+    """
+    pd.read_csv that takes the first column as the index only when it is an unnamed
+    index column, as written by DataFrame.to_csv; raw exports have none.
+    """
+    first = pd.read_csv(path, nrows=0).columns[0]
+    index_col = 0 if first == "" or first.startswith("Unnamed: 0") else None
+    return pd.read_csv(path, index_col=index_col, **kwargs)
+
+
+def read_transactions(path, columns=None, start=None, end=None):
+    """
+    Load transactions from a Parquet file or dataset, reading only `columns` and only
+    the rows with start <= TransactionStartTime < end. A CSV path falls back to
+    pd.read_csv and is converted to the same types.
+    """
+    if not is_parquet(path):
+        return _filter_frame(cast_transactions(_read_csv(path)), columns, start, end)
+
+    dataset = _open_dataset(path)
+    table = dataset.to_table(
+        columns=_projection(dataset, columns), filter=_date_filter(dataset, start, end)
+    )
+    return _to_frame(table)
+
+
+def iter_transactions(path, chunksize=100_000, columns=None, start=None, end=None):
+    """Yield transactions in DataFrames of at most `chunksize` rows, CSV or Parquet."""
+    if not is_parquet(path):
+        for chunk in _read_csv(path, chunksize=chunksize):
+            yield _filter_frame(cast_transactions(chunk), columns, start, end)
+        return
+
+    dataset = _open_dataset(path)
+    for batch in dataset.to_batches(
+        columns=_projection(dataset, columns),
+        filter=_date_filter(dataset, start, end),
+        batch_size=chunksize,
+    ):
+        if batch.num_rows:
+            yield _to_frame(pa.Table.from_batches([batch]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert a cleaned transaction CSV to a month-partitioned Parquet dataset."
+    )
+    parser.add_argument("csv_path")
+    parser.add_argument("parquet_path")
+    args = parser.parse_args()
+
+    write_transactions(_read_csv(args.csv_path), args.parquet_path)
@@ -1,24 +1,24 @@
-import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 
+from scripts.eda.summary import SummaryMixin
 
-class CustomerBehaviorAnalysis:
+
+class CustomerBehaviorAnalysis(SummaryMixin):
     def __init__(self, df):
         """
         Initialize with a dataframe containing transaction data.
         """
-        self.df = df.copy()
+        self.df = df
 
     def top_customers_analysis(self, top_n=10):
         """Analyze and visualize the top customers based on total spending and transaction frequency."""
 
         # Analyze spending patterns
-        spending = (
-            self.df.groupby("CustomerId")["Amount"].sum().sort_values(ascending=False)
-        )
+        spending = self.summary.revenue_by("CustomerId")
 
         # Analyze frequency of transactions
-        buyer_counts = self.df["CustomerId"].value_counts()
+        buyer_counts = self.summary.counts("CustomerId")
 
         # Visualization: Create side-by-side plots
         fig, axes = plt.subplots(1, 2, figsize=(11, 3.5))  # Side-by-side plots
@@ -82,7 +82,7 @@ class CustomerBehaviorAnalysis:
 
     def repeat_vs_one_time_customers(self):
         """Analyze and visualize repeat vs. one-time customers."""
-        customer_transaction_counts = self.df["CustomerId"].value_counts()
+        customer_transaction_counts = self.summary.counts("CustomerId")
         repeat_customers = (customer_transaction_counts > 1).sum()
         one_time_customers = (customer_transaction_counts == 1).sum()
 
@@ -100,7 +100,7 @@ class CustomerBehaviorAnalysis:
 
     def subscription_patterns(self):
         """Analyze and visualize customer subscription patterns."""
-        subscription_counts = self.df["SubscriptionId"].value_counts()
+        subscription_counts = self.summary.counts("SubscriptionId")
 
         # Visualization
         plt.figure(figsize=(6, 4))
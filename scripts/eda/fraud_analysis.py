@@ -1,9 +1,12 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from scripts.eda.summary import SummaryMixin
+
+
+class FraudRiskAnalysis(SummaryMixin):
+    _frame_attribute = "data"
 
-class FraudRiskAnalysis:
     def __init__(self, data):
         """
         Initialize the FraudRiskAssessment class.
@@ -13,12 +16,7 @@ class FraudRiskAnalysis:
 
     def plot_fraud_rate_by_product(self):
         """Plot the fraud rate by product."""
-        fraud_rate = (
-            self.data.groupby("ProductId")["FraudResult"]
-            .mean()
-            .reset_index()
-            .sort_values(by="FraudResult", ascending=False)
-        )
+        fraud_rate = self.summary.fraud_rate_by("ProductId").reset_index()
 
         plt.figure(figsize=(10, 6))
         sns.barplot(x="FraudResult", y="ProductId", data=fraud_rate, palette="magma")
@@ -44,20 +42,10 @@ class FraudRiskAnalysis:
         """Plot fraud rates by provider and channel side by side and print the values."""
 
         # Fraud rate by provider
-        fraud_rate_provider = (
-            self.data.groupby("ProviderId")["FraudResult"]
-            .mean()
-            .reset_index()
-            .sort_values(by="FraudResult", ascending=False)
-        )
+        fraud_rate_provider = self.summary.fraud_rate_by("ProviderId").reset_index()
 
         # Fraud rate by channel
-        fraud_rate_channel = (
-            self.data.groupby("ChannelId")["FraudResult"]
-            .mean()
-            .reset_index()
-            .sort_values(by="FraudResult", ascending=False)
-        )
+        fraud_rate_channel = self.summary.fraud_rate_by("ChannelId").reset_index()
 
         # Create side by side subplots
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 4))
@@ -1,18 +1,19 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 
+from scripts.eda.summary import SummaryMixin
 
-class PricingProviderAnalysis:
+
+class PricingProviderAnalysis(SummaryMixin):
     def __init__(self, df):
         """
         Initialize with a dataframe containing transaction data.
         """
-        self.df = df.copy()
+        self.df = df
 
     def provider_performance(self):
         """Analyze provider-wise transaction volume and fraud rates."""
-        provider_transaction_counts = self.df["ProviderId"].value_counts()
-        provider_fraud_counts = self.df.groupby("ProviderId")["FraudResult"].sum()
+        provider_transaction_counts = self.summary.counts("ProviderId")
+        provider_fraud_counts = self.summary.fraud_count_by("ProviderId")
 
         provider_fraud_rates = (
             provider_fraud_counts / provider_transaction_counts
@@ -76,18 +77,10 @@ class PricingProviderAnalysis:
     def revenue_and_engagement_by_pricing_strategy(self):
         """Analyze and visualize revenue impact and customer engagement of different pricing strategies."""
         # Group data for revenue
-        revenue_by_pricing = (
-            self.df.groupby("PricingStrategy")["Amount"]
-            .sum()
-            .sort_values(ascending=False)
-        )
+        revenue_by_pricing = self.summary.revenue_by("PricingStrategy")
 
         # Group data for customer engagement
-        pricing_engagement = (
-            self.df.groupby("PricingStrategy")["CustomerId"]
-            .nunique()
-            .sort_values(ascending=False)
-        )
+        pricing_engagement = self.summary.unique_customers_by("PricingStrategy")
 
         fig, axes = plt.subplots(1, 2, figsize=(8, 4))
 
@@ -0,0 +1,178 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from scripts.data_io import TIME_COLUMN, _utc, read_transactions
+
+DIMENSIONS = ["ProviderId", "ProductCategory", "ChannelId"]
+MEASURES = ["count", "Amount", "FraudResult"]
+CUBE_VERSION = 1
+
+
+def _hour_buckets(timestamps):
+    """UTC hour of every timestamp; naive timestamps are taken to be UTC already."""
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps, utc=True)
+    elif timestamps.dt.tz is None:
+        timestamps = timestamps.dt.tz_localize("UTC")
+    return timestamps.dt.floor("h")
+
+
+def rollup(df):
+    """
+    Aggregate raw transactions to one row per (hour, ProviderId, ProductCategory,
+    ChannelId) with the transaction count, summed Amount and summed FraudResult.
+    """
+    keys = pd.DataFrame({"hour": _hour_buckets(df[TIME_COLUMN]).array})
+    for col in DIMENSIONS:
+        keys[col] = df[col].astype(str).values
+    keys["count"] = 1
+    keys["Amount"] = df["Amount"].to_numpy(dtype=np.float64)
+    keys["FraudResult"] = df["FraudResult"].to_numpy(dtype=np.int64)
+    return (
+        keys.groupby(["hour", *DIMENSIONS], sort=True, observed=True)[MEASURES]
+        .sum()
+        .reset_index()
+    )
+
+
+class RollupCube:
+    def __init__(self, cells=None):
+        """
+        Hourly rollup of transactions over provider, product category and channel.
+        Trends and breakdowns for any slice and any coarser time bucket (day, week,
+        month) are answered from the cube, which is orders of magnitude smaller than
+        the raw rows, and new days are folded in without rescanning history.
+        """
+        if cells is None:
+            cells = pd.DataFrame(
+                {
+                    "hour": pd.Series(dtype="datetime64[ns, UTC]"),
+                    **{col: pd.Series(dtype=str) for col in DIMENSIONS},
+                    "count": pd.Series(dtype=np.int64),
+                    "Amount": pd.Series(dtype=np.float64),
+                    "FraudResult": pd.Series(dtype=np.int64),
+                }
+            )
+        self.cells = cells
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(rollup(df))
+
+    def update(self, df, replace_days=True):
+        """
+        Fold new transactions into the cube. With replace_days=True the days present
+        in `df` replace what the cube holds for them, so re-running a day is
+        idempotent; with replace_days=False the new rows are added on top.
+        """
+        delta = rollup(df)
+        cells = self.cells
+        if replace_days and len(delta):
+            new_days = delta["hour"].dt.floor("D").unique()
+            cells = cells[~cells["hour"].dt.floor("D").isin(new_days)]
+        merged = pd.concat([cells, delta], ignore_index=True)
+        self.cells = (
+            merged.groupby(["hour", *DIMENSIONS], sort=True)[MEASURES]
+            .sum()
+            .reset_index()
+        )
+        return self
+
+    def _select(self, filters=None, start=None, end=None):
+        cells = self.cells
+        mask = np.ones(len(cells), dtype=bool)
+        for col, values in (filters or {}).items():
+            values = [values] if isinstance(values, str) else list(values)
+            mask &= cells[col].isin([str(v) for v in values]).to_numpy()
+        if start is not None:
+            mask &= (cells["hour"] >= _utc(start)).to_numpy()
+        if end is not None:
+            mask &= (cells["hour"] < _utc(end)).to_numpy()
+        return cells[mask]
+
+    def query(self, freq="D", by=None, filters=None, start=None, end=None):
+        """
+        Count, revenue, fraud count and fraud rate per `freq` time bucket (None for no
+        time axis) and per dimension in `by`, over the cells matching `filters`
+        (a dict of dimension -> value or list of values) and start <= hour < end.
+        """
+        by = [by] if isinstance(by, str) else list(by or [])
+        cells = self._select(filters, start, end)
+        keys = list(by)
+        if freq is not None:
+            # Same bins and labels as resample(freq), fixed (h, D) or not (W, MS)
+            keys = [pd.Grouper(key="hour", freq=freq), *by]
+        if not keys:
+            result = cells[MEASURES].sum().to_frame().T.astype(cells[MEASURES].dtypes)
+        else:
+            result = cells.groupby(keys, sort=True)[MEASURES].sum()
+        result["FraudRate"] = result["FraudResult"] / result["count"].where(
+            result["count"] > 0
+        )
+        return result
+
+    def revenue_trend(self, freq="D", filters=None, start=None, end=None):
+        """
+        Revenue per time bucket with empty buckets as 0, like
+        df.set_index("TransactionStartTime")["Amount"].resample(freq).sum().
+        """
+        trend = self.query(freq, filters=filters, start=start, end=end)["Amount"]
+        if len(trend):
+            periods = pd.date_range(trend.index.min(), trend.index.max(), freq=freq)
+            trend = trend.reindex(periods, fill_value=0.0)
+        trend.index.name = TIME_COLUMN
+        return trend
+
+    def breakdown(self, by, measure="Amount", filters=None, start=None, end=None):
+        """One measure per value of `by` over an optional slice, largest first."""
+        result = self.query(None, by=by, filters=filters, start=start, end=end)
+        return result[measure].sort_values(ascending=False)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.cells.to_parquet(os.path.join(path, "cells.parquet"), index=False)
+        meta = {
+            "version": CUBE_VERSION,
+            "n_cells": len(self.cells),
+            "n_transactions": int(self.cells["count"].sum()),
+            "first_hour": str(self.cells["hour"].min()),
+            "last_hour": str(self.cells["hour"].max()),
+        }
+        with open(os.path.join(path, "meta.json"), "w") as file:
+            json.dump(meta, file, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, "meta.json")) as file:
+            meta = json.load(file)
+        if meta["version"] != CUBE_VERSION:
+            raise ValueError(f"Unsupported rollup cube version {meta['version']}")
+        return cls(pd.read_parquet(os.path.join(path, "cells.parquet")))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build or update the on-disk rollup cube from cleaned transactions."
+    )
+    parser.add_argument("data_path", help="Cleaned transactions, CSV or Parquet")
+    parser.add_argument("cube_path")
+    parser.add_argument(
+        "--start", default=None, help="Only fold in rows from this date"
+    )
+    parser.add_argument(
+        "--end", default=None, help="Only fold in rows before this date"
+    )
+    args = parser.parse_args()
+
+    columns = [TIME_COLUMN, *DIMENSIONS, "Amount", "FraudResult"]
+    df = read_transactions(args.data_path, columns, args.start, args.end)
+    if os.path.exists(os.path.join(args.cube_path, "meta.json")):
+        cube = RollupCube.load(args.cube_path).update(df)
+    else:
+        cube = RollupCube.from_frame(df)
+    cube.save(args.cube_path)
+    print(f"Rollup cube at {args.cube_path} holds {len(cube.cells)} cells.")
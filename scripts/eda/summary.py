@@ -0,0 +1,183 @@
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Columns the EDA views group by, and the measures computed for every group
+GROUP_COLUMNS = [
+    "CustomerId",
+    "SubscriptionId",
+    "ProviderId",
+    "ProductId",
+    "ProductCategory",
+    "ChannelId",
+    "PricingStrategy",
+]
+MEASURE_COLUMNS = ["Amount", "Value", "FraudResult"]
+
+_CACHE = {}  # Fingerprint -> EDASummary, shared by all analysis objects in the process
+MAX_CACHED = 8
+
+
+def dataset_fingerprint(df, columns=None):
+    """Content hash of the columns a summary depends on (row order included)."""
+    columns = [c for c in (columns or GROUP_COLUMNS + MEASURE_COLUMNS) if c in df]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([columns, len(df)]).encode())
+    for col in columns:
+        digest.update(pd.util.hash_pandas_object(df[col], index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+class EDASummary:
+    def __init__(self, df, fingerprint=None):
+        """
+        All group statistics the EDA views need, computed once. Every group column is
+        factorized a single time and its counts, revenue and fraud counts come from
+        bincount over the codes, so no view re-runs a groupby or copies the frame.
+        """
+        self.fingerprint = fingerprint or dataset_fingerprint(df)
+        self.n_rows = len(df)
+        self.correlation = df[["Amount", "Value"]].corr()
+        self.groups = {}
+
+        amount = df["Amount"].to_numpy(dtype=np.float64)
+        self.total_revenue = float(amount.sum())
+        fraud = None
+        if "FraudResult" in df:
+            fraud = df["FraudResult"].to_numpy(dtype=np.float64)
+            fraud_dtype = df["FraudResult"].dtype
+        customer_codes = customers = None
+        if "CustomerId" in df:
+            customer_codes, customers = pd.factorize(df["CustomerId"])
+        for col in GROUP_COLUMNS:
+            if col not in df:
+                continue
+            codes, keys = pd.factorize(df[col], sort=True)
+            valid = codes >= 0
+            codes = codes[valid]
+            n_keys = len(keys)
+            revenue = np.bincount(codes, weights=amount[valid], minlength=n_keys)
+            if pd.api.types.is_integer_dtype(df["Amount"]):
+                revenue = np.rint(revenue).astype(np.int64)
+            table = pd.DataFrame(
+                {"count": np.bincount(codes, minlength=n_keys), "Amount": revenue},
+                index=pd.Index(keys, name=col),
+            )
+            if fraud is not None:
+                fraud_count = np.bincount(codes, weights=fraud[valid], minlength=n_keys)
+                table["FraudCount"] = np.rint(fraud_count).astype(fraud_dtype)
+                table["FraudResult"] = fraud_count / np.maximum(table["count"], 1)
+            if customers is not None:
+                # Distinct customers per group, from unique (group, customer) code pairs
+                pairs = np.unique(
+                    codes.astype(np.int64) * (len(customers) + 1)
+                    + customer_codes[valid]
+                    + 1
+                )
+                table["UniqueCustomers"] = np.bincount(
+                    pairs // (len(customers) + 1), minlength=n_keys
+                )
+            self.groups[col] = table
+
+    def counts(self, col):
+        """Equivalent of df[col].value_counts()."""
+        return self.groups[col]["count"].sort_values(ascending=False, kind="stable")
+
+    def revenue_by(self, col):
+        """Equivalent of df.groupby(col)["Amount"].sum().sort_values(ascending=False)."""
+        return self.groups[col]["Amount"].sort_values(ascending=False)
+
+    def fraud_count_by(self, col):
+        """Equivalent of df.groupby(col)["FraudResult"].sum()."""
+        return self.groups[col]["FraudCount"].rename("FraudResult")
+
+    def fraud_rate_by(self, col):
+        """Equivalent of df.groupby(col)["FraudResult"].mean(), highest first."""
+        return self.groups[col]["FraudResult"].sort_values(ascending=False)
+
+    def unique_customers_by(self, col):
+        """Equivalent of df.groupby(col)["CustomerId"].nunique(), highest first."""
+        unique_customers = self.groups[col]["UniqueCustomers"].rename("CustomerId")
+        return unique_customers.sort_values(ascending=False)
+
+    def to_dict(self):
+        return {
+            "fingerprint": self.fingerprint,
+            "n_rows": self.n_rows,
+            "total_revenue": self.total_revenue,
+            "correlation": self.correlation.to_dict(),
+            "groups": {
+                col: table.reset_index().to_dict(orient="records")
+                for col, table in self.groups.items()
+            },
+        }
+
+    def save_report(self, out_dir, fmt="json"):
+        """Write the summary as summary.json, or as one CSV per group column."""
+        os.makedirs(out_dir, exist_ok=True)
+        if fmt == "json":
+            path = os.path.join(out_dir, "summary.json")
+            with open(path, "w") as file:
+                json.dump(self.to_dict(), file, indent=2, default=str)
+        elif fmt == "csv":
+            for col, table in self.groups.items():
+                table.to_csv(os.path.join(out_dir, f"summary_by_{col}.csv"))
+            path = out_dir
+        else:
+            raise ValueError("fmt must be either 'json' or 'csv'")
+        print(f"EDA summary saved to {path}.")
+        return path
+
+
+def get_summary(df):
+    """Summary of `df`, computed once per distinct dataset and then served from cache."""
+    fingerprint = dataset_fingerprint(df)
+    if fingerprint not in _CACHE:
+        if len(_CACHE) >= MAX_CACHED:
+            _CACHE.pop(next(iter(_CACHE)))
+        _CACHE[fingerprint] = EDASummary(df, fingerprint)
+    return _CACHE[fingerprint]
+
+
+class SummaryMixin:
+    """
+    Adds a lazily computed `summary` (see get_summary) of the analysed frame, which
+    is the attribute named by `_frame_attribute`. The summary is taken once and kept:
+    after changing that frame in place, call `refresh_summary` or the views keep
+    reporting the old data.
+    """
+
+    _frame_attribute = "df"
+    _summary = None
+
+    @property
+    def summary(self):
+        if self._summary is None:
+            self._summary = get_summary(getattr(self, self._frame_attribute))
+        return self._summary
+
+    def refresh_summary(self):
+        """Re-fingerprint the frame and pick up its current summary."""
+        self._summary = None
+        return self.summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compute the EDA group statistics headlessly and save a report."
+    )
+    parser.add_argument("data_path", help="Cleaned transactions, CSV or Parquet")
+    parser.add_argument("out_dir")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    args = parser.parse_args()
+
+    from scripts.data_io import read_transactions
+
+    columns = GROUP_COLUMNS + MEASURE_COLUMNS
+    get_summary(read_transactions(args.data_path, columns=columns)).save_report(
+        args.out_dir, args.format
+    )
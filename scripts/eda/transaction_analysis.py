@@ -1,28 +1,43 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 
+from scripts.eda.rollup import RollupCube
+from scripts.eda.summary import SummaryMixin
 
-class TransactionAnalysis:
-    def __init__(self, df):
+
+class TransactionAnalysis(SummaryMixin):
+    def __init__(self, df, rollup=None):
         """
-        Initialize with a dataframe containing transaction data.
+        Initialize with a dataframe containing transaction data, and optionally a
+        prebuilt RollupCube (see scripts/eda/rollup.py) to answer trend queries from.
         """
-        self.df = df.copy()
-        self.df["TransactionStartTime"] = pd.to_datetime(
-            self.df["TransactionStartTime"]
-        )
+        self.df = df
+        # Frames read with scripts.data_io already hold native timestamps
+        if not pd.api.types.is_datetime64_any_dtype(self.df["TransactionStartTime"]):
+            self.df = df.copy()
+            self.df["TransactionStartTime"] = pd.to_datetime(
+                self.df["TransactionStartTime"]
+            )
+        self._rollup = rollup
+
+    @property
+    def rollup(self):
+        """Hourly rollup cube of the data, built on first use unless one was given."""
+        if self._rollup is None:
+            self._rollup = RollupCube.from_frame(self.df)
+        return self._rollup
 
     def total_transactions_revenue(self):
         """Calculate total transactions and total revenue."""
-        total_transactions = len(self.df)
-        total_revenue = self.df["Amount"].sum()
+        total_transactions = self.summary.n_rows
+        total_revenue = self.summary.total_revenue
         print(f"Total Transactions: {total_transactions}")
         print(f"Total Revenue: {total_revenue}")
 
-    def revenue_trends(self):
-        """Plot revenue trends over time."""
-        self.df.set_index("TransactionStartTime", inplace=True)
-        revenue_over_time = self.df["Amount"].resample("D").sum()
+    def revenue_trends(self, freq="D", filters=None):
+        """Plot revenue trends over time, optionally for a slice such as {"ChannelId": "ChannelId_3"}."""
+        revenue_over_time = self.rollup.revenue_trend(freq, filters=filters)
         plt.figure(figsize=(10, 4))
         plt.plot(revenue_over_time, marker="o", linestyle="-")
         plt.title("Revenue Trends Over Time")
@@ -30,16 +45,13 @@ class TransactionAnalysis:
         plt.ylabel("Revenue")
         plt.grid()
         plt.show()
-        self.df.reset_index(inplace=True)
 
     def revenue_breakdown(self):
         """Show and visualize revenue breakdown by provider and product category"""
         fig, axes = plt.subplots(1, 2, figsize=(11, 3))
 
         for i, col in enumerate(["ProviderId", "ProductCategory"]):
-            revenue_by_col = (
-                self.df.groupby(col)["Amount"].sum().sort_values(ascending=False)
-            )
+            revenue_by_col = self.summary.revenue_by(col)
 
             # Visualization
             top_revenue = revenue_by_col.head(10)[::-1]
@@ -75,7 +87,7 @@ class TransactionAnalysis:
 
     def preferred_transaction_channels(self):
         """Analyze and visualize preferred transaction channels."""
-        channel_counts = self.df["ChannelId"].value_counts()
+        channel_counts = self.summary.counts("ChannelId")
 
         # Visualization
         plt.figure(figsize=(4.5, 2.5))
@@ -1,142 +1,397 @@
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.preprocessing import (
     OneHotEncoder,
     LabelEncoder,
     StandardScaler,
     MinMaxScaler,
 )
-from IPython.display import display
+
+try:
+    from IPython.display import display
+except ImportError:  # Headless runs (batch jobs, containers) without IPython
+    display = print
+
+from scripts.customer_aggregates import (
+    AGGREGATE_COLUMNS,
+    CustomerAggregates,
+    aggregate_by_customer,
+    sample_std,
+    take_customers,
+)
+from scripts.data_io import iter_transactions, read_transactions
+from scripts.feature_io import save_features, write_manifest
+from scripts.feature_transform import FeatureTransformer
+from scripts.instrumentation import NULL_RECORDER
+
+CATEGORICAL_COLUMNS = [
+    "ProviderId",
+    "ProductId",
+    "ProductCategory",
+    "ChannelId",
+    "PricingStrategy",
+    "TransactionHour",
+    "TransactionDay",
+    "TransactionMonth",
+    "TransactionYear",
+]
+
+NUMERICAL_COLUMNS = ["Amount", "Value", *AGGREGATE_COLUMNS]
+
+ID_COLUMNS = [
+    "TransactionId",
+    "BatchId",
+    "AccountId",
+    "SubscriptionId",
+    "CustomerId",
+    "CurrencyCode",
+    "CountryCode",
+    "TransactionStartTime",
+]
+
+
+def add_time_features(df):
+    """Add hour, day, month and year columns parsed from TransactionStartTime."""
+    if not pd.api.types.is_datetime64_any_dtype(df["TransactionStartTime"]):
+        df["TransactionStartTime"] = pd.to_datetime(df["TransactionStartTime"])
+    df["TransactionHour"] = df["TransactionStartTime"].dt.hour
+    df["TransactionDay"] = df["TransactionStartTime"].dt.day
+    df["TransactionMonth"] = df["TransactionStartTime"].dt.month
+    df["TransactionYear"] = df["TransactionStartTime"].dt.year
+    return df
 
 
 class FeatureEngineering:
-    def __init__(self, df, target_column):
+    def __init__(
+        self, df, target_column, sparse_output=False, verbose=True, recorder=None
+    ):
         self.df = df.copy()
         self.target_column = target_column
+        self.verbose = verbose  # Print progress and preview frames
+        # Per-stage time, rows and peak memory (scripts/instrumentation.py), off by default
+        self.recorder = recorder or NULL_RECORDER
+        self.sparse_output = sparse_output  # Keep one-hot features as a CSR matrix
         self.label_encoder = LabelEncoder()
-        self.one_hot_encoder = OneHotEncoder(drop="first", sparse_output=False)
+        if sparse_output:
+            self.one_hot_encoder = OneHotEncoder(
+                drop="first", sparse_output=True, dtype=np.uint8
+            )
+        else:
+            self.one_hot_encoder = OneHotEncoder(drop="first", sparse_output=False)
         self.scaler = StandardScaler()
         self.normalizer = MinMaxScaler()
+        self.aggregated_features = None  # Per-customer aggregate table
+        self.encoded = None  # Sparse one-hot block when sparse_output=True
         self.transformed_df = None  # Store transformed features separately
 
-    def create_aggregate_features(self):
-        print("\nCreating aggregate features...")
-        total_amount = (
-            self.df.groupby("CustomerId")["Amount"]
-            .sum()
-            .reset_index(name="TotalTransactionAmount")
-        )
-        avg_amount = (
-            self.df.groupby("CustomerId")["Amount"]
-            .mean()
-            .reset_index(name="AverageTransactionAmount")
-        )
-        transaction_count = (
-            self.df.groupby("CustomerId")["TransactionId"]
-            .count()
-            .reset_index(name="TransactionCount")
-        )
-        std_amount = (
-            self.df.groupby("CustomerId")["Amount"]
-            .std()
-            .reset_index(name="StdTransactionAmount")
+    @classmethod
+    def from_path(
+        cls, path, target_column, start=None, end=None, columns=None, **kwargs
+    ):
+        """
+        Load cleaned transactions (Parquet dataset or CSV) with typed columns, optionally
+        only those with start <= TransactionStartTime < end, and wrap them.
+        """
+        return cls(
+            read_transactions(path, columns, start, end), target_column, **kwargs
         )
 
-        aggregated_features = (
-            total_amount.merge(avg_amount, on="CustomerId", how="left")
-            .merge(transaction_count, on="CustomerId", how="left")
-            .merge(std_amount, on="CustomerId", how="left")
-        )
-        aggregated_columns = aggregated_features.columns.tolist()
-        self.df = self.df.merge(aggregated_features, on="CustomerId", how="left")
-        print("New columns added:", aggregated_columns)
-        print("DataFrame shape after aggregation:", self.df.shape)
-        display(self.df[["Amount", *aggregated_columns]].head())
+    def _log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def _show(self, frame):
+        if self.verbose:
+            display(frame)
+
+    def create_aggregate_features(self, aggregates=None):
+        """
+        Add per-customer aggregates to every transaction. Pass a running
+        CustomerAggregates (e.g. loaded from the previous run) to fold this frame in
+        as a delta instead of recomputing over the full history.
+        """
+        self._log("\nCreating aggregate features...")
+        with self.recorder.stage("aggregation", rows=len(self.df)):
+            customer_ids = self.df["CustomerId"].values
+            if aggregates is not None:
+                aggregates.update(customer_ids, self.df["Amount"].values)
+                self.aggregated_features = aggregates.to_frame()
+                codes = aggregates.rows_of(customer_ids)
+            else:
+                uniques, codes, stats = aggregate_by_customer(
+                    customer_ids, self.df["Amount"].values
+                )
+                self.aggregated_features = pd.DataFrame(
+                    {
+                        "CustomerId": uniques,
+                        "TotalTransactionAmount": stats["total"],
+                        "AverageTransactionAmount": stats["mean"],
+                        "TransactionCount": stats["rows"],
+                        "StdTransactionAmount": sample_std(stats["count"], stats["m2"]),
+                    }
+                )
+
+            # Broadcast back to transactions with an index take instead of a merge;
+            # rows without a customer id get NaN aggregates, as the merge gave them
+            for col in AGGREGATE_COLUMNS:
+                self.df[col] = take_customers(self.aggregated_features[col], codes)
+
+        aggregated_columns = self.aggregated_features.columns.tolist()
+        self._log("New columns added:", aggregated_columns)
+        self._log("DataFrame shape after aggregation:", self.df.shape)
+        self._show(self.df[["Amount", *aggregated_columns]].head())
 
     def extract_features(self):
-        print("\nExtracting time-based features...")
-        self.df["TransactionStartTime"] = pd.to_datetime(
-            self.df["TransactionStartTime"]
-        )
-        self.df["TransactionHour"] = self.df["TransactionStartTime"].dt.hour
-        self.df["TransactionDay"] = self.df["TransactionStartTime"].dt.day
-        self.df["TransactionMonth"] = self.df["TransactionStartTime"].dt.month
-        self.df["TransactionYear"] = self.df["TransactionStartTime"].dt.year
+        self._log("\nExtracting time-based features...")
+        with self.recorder.stage("time_extraction", rows=len(self.df)):
+            add_time_features(self.df)
         extracted_columns = [
             "TransactionHour",
             "TransactionDay",
             "TransactionMonth",
             "TransactionYear",
         ]
-        print("Extracted columns:", extracted_columns)
-        display(self.df[["TransactionStartTime", *extracted_columns]].head())
+        self._log("Extracted columns:", extracted_columns)
+        self._show(self.df[["TransactionStartTime", *extracted_columns]].head())
 
     def encode_categorical_variables(self):
-        print("\nEncoding categorical variables...")
-        categorical_columns = [
-            "ProviderId",
-            "ProductId",
-            "ProductCategory",
-            "ChannelId",
-            "PricingStrategy",
-            "TransactionHour",
-            "TransactionDay",
-            "TransactionMonth",
-            "TransactionYear",
-        ]
+        self._log("\nEncoding categorical variables...")
+        categorical_columns = CATEGORICAL_COLUMNS
 
-        one_hot_encoded = self.one_hot_encoder.fit_transform(
-            self.df[categorical_columns]
-        )
-        one_hot_encoded_df = pd.DataFrame(
-            one_hot_encoded,
-            columns=self.one_hot_encoder.get_feature_names_out(categorical_columns),
-        )
-        print("One-hot encoded shape:", one_hot_encoded_df.shape)
+        with self.recorder.stage("encoding", rows=len(self.df)):
+            one_hot_encoded = self.one_hot_encoder.fit_transform(
+                self.df[categorical_columns]
+            )
+            if self.sparse_output:
+                self.encoded = one_hot_encoded.tocsr()
+                self.df.drop(columns=categorical_columns, inplace=True)
+            else:
+                one_hot_encoded_df = pd.DataFrame(
+                    one_hot_encoded,
+                    columns=self.one_hot_encoder.get_feature_names_out(
+                        categorical_columns
+                    ),
+                    index=self.df.index,
+                )
+                self.df = pd.concat([self.df, one_hot_encoded_df], axis=1)
+                self.df.drop(columns=categorical_columns, inplace=True)
 
-        self.df = pd.concat([self.df, one_hot_encoded_df], axis=1)
-        self.df.drop(columns=categorical_columns, inplace=True)
-        print("DataFrame shape after encoding:", self.df.shape)
-        display(self.df.head())
+        if self.sparse_output:
+            self._log(
+                "One-hot encoded shape:", self.encoded.shape, "nnz:", self.encoded.nnz
+            )
+            return
+        self._log("One-hot encoded shape:", one_hot_encoded_df.shape)
+        self._log("DataFrame shape after encoding:", self.df.shape)
+        self._show(self.df.head())
 
     def normalize_standardize_numerical_features(self):
-        print("\nNormalizing and standardizing numerical features...")
-        numerical_columns = [
-            "Amount",
-            "Value",
-            "TotalTransactionAmount",
-            "AverageTransactionAmount",
-            "TransactionCount",
-            "StdTransactionAmount",
-        ]
-        self.df[numerical_columns] = self.normalizer.fit_transform(
-            self.df[numerical_columns]
-        )
+        self._log("\nNormalizing and standardizing numerical features...")
+        numerical_columns = NUMERICAL_COLUMNS
+        with self.recorder.stage("scaling", rows=len(self.df)):
+            self.df[numerical_columns] = self.normalizer.fit_transform(
+                self.df[numerical_columns]
+            )
         # self.df[numerical_columns] = self.scaler.fit_transform(self.df[numerical_columns])
-        display(self.df[numerical_columns].head())
+        self._show(self.df[numerical_columns].head())
 
     def get_transformed_dataframe(self):
-        columns_to_drop = [
-            "TransactionId",
-            "BatchId",
-            "AccountId",
-            "SubscriptionId",
-            "CustomerId",
-            "CurrencyCode",
-            "CountryCode",
-            "TransactionStartTime",
-        ]
-        X = self.df.drop(columns=[self.target_column, *columns_to_drop])
+        X = self.df.drop(columns=[self.target_column, *ID_COLUMNS])
         y = self.df[self.target_column]
 
+        if self.sparse_output:
+            return self._get_sparse_features(X, y)
+
         # Store transformed features separately
         self.transformed_df = X.copy()
 
-        # Save as .npy format
-        np.save("../data/processed/X_features.npy", X.values)
-        np.save("../data/processed/y_labels.npy", y.values)
+        # Save as float64 .npy with a column manifest
+        with self.recorder.stage("save", rows=len(X)):
+            save_features(
+                X,
+                y,
+                "../data/processed/X_features.npy",
+                "../data/processed/y_labels.npy",
+            )
 
-        print("Final Transformed DataFrame:")
-        display(self.transformed_df.head())
+        self._log("Final Transformed DataFrame:")
+        self._show(self.transformed_df.head())
 
         return X, y
+
+    def _get_sparse_features(self, X, y):
+        """Stack the numeric columns with the sparse one-hot block and save as CSR .npz."""
+        feature_names = [
+            *X.columns,
+            *self.one_hot_encoder.get_feature_names_out(CATEGORICAL_COLUMNS),
+        ]
+        X = sparse.hstack(
+            [sparse.csr_matrix(X.values.astype(np.float32)), self.encoded],
+            format="csr",
+            dtype=np.float32,
+        )
+        y = y.values.astype(np.uint8)
+
+        self.transformed_df = pd.DataFrame.sparse.from_spmatrix(
+            X, columns=feature_names
+        )
+        with self.recorder.stage("save", rows=X.shape[0]):
+            save_features(
+                X,
+                y,
+                "../data/processed/X_features.npz",
+                "../data/processed/y_labels.npy",
+                feature_names=feature_names,
+            )
+
+        self._log("Final Transformed DataFrame:")
+        self._show(self.transformed_df.head())
+
+        return X, y
+
+    def export_transformer(
+        self, path="../checkpoints/feature_transform.pkl", outlier_handler=None
+    ):
+        """Save the fitted encoder, scaler, customer aggregates and outlier bounds for serving."""
+        transformer = FeatureTransformer.from_feature_engineering(
+            self, outlier_handler or getattr(self, "outlier_handler", None)
+        )
+        transformer.save(path)
+        return transformer
+
+
+class StreamingFeatureEngineering:
+    def __init__(
+        self, data_path, target_column, chunksize=100_000, outlier_handler=None
+    ):
+        """
+        Build the same feature matrix as FeatureEngineering from a CSV or Parquet dataset that does not fit in memory.
+        The file is read twice in chunks: the first pass accumulates per-customer aggregates,
+        category levels and min/max values, the second pass writes the features row block by
+        row block. Peak memory depends on the number of customers, not the number of rows.
+        An OutlierHandler is applied to every chunk; if it is not fitted yet, an extra
+        first pass fits it from quantile sketches.
+        """
+        self.data_path = data_path
+        self.target_column = target_column
+        self.chunksize = chunksize
+        self.outlier_handler = outlier_handler
+        self.aggregates = CustomerAggregates()
+        self.one_hot_encoder = None
+        self.normalizer = MinMaxScaler()
+        self.aggregated_features = None
+        self.customer_features = None
+        self.n_rows = 0
+
+    def _chunks(self, columns=None):
+        for chunk in iter_transactions(self.data_path, self.chunksize, columns):
+            if (
+                self.outlier_handler is not None
+                and self.outlier_handler.lower is not None
+            ):
+                self.outlier_handler.transform(chunk, inplace=True)
+            yield chunk
+
+    def fit(self):
+        """First pass: per-customer aggregates, category levels and numeric ranges."""
+        print("\nFitting streaming feature pipeline...")
+        if self.outlier_handler is not None and self.outlier_handler.lower is None:
+            columns = self.outlier_handler.columns
+            for chunk in iter_transactions(self.data_path, self.chunksize, columns):
+                self.outlier_handler.partial_fit(chunk)
+        levels = {col: set() for col in CATEGORICAL_COLUMNS}
+        mins, maxs = [], []
+        for chunk in self._chunks():
+            add_time_features(chunk)
+            self.aggregates.update(chunk["CustomerId"].values, chunk["Amount"].values)
+            for col in CATEGORICAL_COLUMNS:
+                levels[col].update(chunk[col].unique().tolist())
+            mins.append(chunk[["Amount", "Value"]].min().values)
+            maxs.append(chunk[["Amount", "Value"]].max().values)
+            self.n_rows += len(chunk)
+
+        categories = [sorted(levels[col]) for col in CATEGORICAL_COLUMNS]
+        # Categories are fixed up front, so fitting only needs one valid row
+        first_row = pd.DataFrame(
+            {col: [levels[0]] for col, levels in zip(CATEGORICAL_COLUMNS, categories)}
+        )
+        self.one_hot_encoder = OneHotEncoder(
+            categories=categories, drop="first", sparse_output=False
+        ).fit(first_row)
+
+        # Every customer has at least one row, so the range over customers equals the range over rows
+        self.aggregated_features = self.aggregates.to_frame()
+        self.customer_features = self.aggregated_features[AGGREGATE_COLUMNS].values
+        bounds = pd.DataFrame(
+            [
+                np.concatenate(
+                    [np.min(mins, axis=0), np.nanmin(self.customer_features, axis=0)]
+                ),
+                np.concatenate(
+                    [np.max(maxs, axis=0), np.nanmax(self.customer_features, axis=0)]
+                ),
+            ],
+            columns=NUMERICAL_COLUMNS,
+        )
+        self.normalizer.fit(bounds)
+        print(f"Rows: {self.n_rows}, customers: {len(self.aggregates)}")
+        return self
+
+    def get_feature_names(self):
+        return [
+            *NUMERICAL_COLUMNS,
+            *self.one_hot_encoder.get_feature_names_out(CATEGORICAL_COLUMNS),
+        ]
+
+    def transform_chunk(self, chunk):
+        """Turn one chunk of cleaned transactions into its block of feature rows."""
+        add_time_features(chunk)
+        rows = self.aggregates.customer_ids.get_indexer(chunk["CustomerId"].values)
+        numerical = np.column_stack(
+            [
+                chunk[["Amount", "Value"]].values,
+                take_customers(self.customer_features, rows),
+            ]
+        )
+        numerical = self.normalizer.transform(
+            pd.DataFrame(numerical, columns=NUMERICAL_COLUMNS)
+        )
+        encoded = self.one_hot_encoder.transform(chunk[CATEGORICAL_COLUMNS])
+        return np.hstack([numerical, encoded])
+
+    def transform(
+        self,
+        x_path="../data/processed/X_features.npy",
+        y_path="../data/processed/y_labels.npy",
+    ):
+        """Second pass: write X and y incrementally into memory-mapped .npy files."""
+        print("\nWriting streamed features...")
+        n_features = len(self.get_feature_names())
+        X = np.lib.format.open_memmap(
+            x_path, mode="w+", dtype=np.float64, shape=(self.n_rows, n_features)
+        )
+        y = np.lib.format.open_memmap(
+            y_path, mode="w+", dtype=np.int64, shape=(self.n_rows,)
+        )
+        start = 0
+        for chunk in self._chunks():
+            stop = start + len(chunk)
+            X[start:stop] = self.transform_chunk(chunk)
+            y[start:stop] = chunk[self.target_column].values
+            start = stop
+        X.flush()
+        y.flush()
+        write_manifest(x_path, X.shape, X.dtype, y.dtype, self.get_feature_names())
+        print("Feature matrix shape:", X.shape)
+        return X, y
+
+    def export_transformer(
+        self, path="../checkpoints/feature_transform.pkl", outlier_handler=None
+    ):
+        """Save the fitted encoder, scaler, customer aggregates and outlier bounds for serving."""
+        transformer = FeatureTransformer.from_feature_engineering(
+            self, outlier_handler or getattr(self, "outlier_handler", None)
+        )
+        transformer.save(path)
+        return transformer
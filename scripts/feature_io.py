@@ -0,0 +1,143 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.model_selection import train_test_split
+
+
+def manifest_path(x_path):
+    """Manifest file stored next to a feature matrix, e.g. X_features.manifest.json."""
+    return os.path.splitext(str(x_path))[0] + ".manifest.json"
+
+
+def save_features(
+    X, y, x_path, y_path, feature_names=None, dtype=np.float64, y_dtype=None
+):
+    """
+    Save a feature matrix and its labels. Sparse matrices are written as compressed
+    CSR `.npz` files, dense ones as `.npy` with an explicit numeric dtype (never object).
+    A JSON manifest with the column names, dtypes and shape is written next to X.
+    """
+    if isinstance(X, pd.DataFrame):
+        feature_names = feature_names or X.columns.tolist()
+        X = X.to_numpy(dtype=dtype)
+    y = np.asarray(y, dtype=y_dtype)
+
+    if sparse.issparse(X):
+        X = X.tocsr()
+        sparse.save_npz(x_path, X, compressed=True)
+    else:
+        X = np.asarray(X, dtype=dtype)
+        np.save(x_path, X)
+    np.save(y_path, y)
+    write_manifest(x_path, X.shape, X.dtype, y.dtype, feature_names)
+
+
+def write_manifest(x_path, shape, dtype, y_dtype, feature_names=None):
+    manifest = {
+        "format": "npz" if str(x_path).endswith(".npz") else "npy",
+        "shape": list(shape),
+        "dtype": np.dtype(dtype).name,
+        "y_dtype": np.dtype(y_dtype).name,
+        "columns": list(feature_names) if feature_names is not None else None,
+    }
+    with open(manifest_path(x_path), "w") as file:
+        json.dump(manifest, file, indent=2)
+
+
+def read_manifest(x_path):
+    """Return the manifest of a saved feature matrix, or None for files saved without one."""
+    path = manifest_path(x_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+
+def load_features(x_path, y_path=None, mmap_mode=None):
+    """
+    Load a feature matrix saved by `save_features` (and its labels if `y_path` is given).
+    Dense `.npy` files can be memory-mapped with `mmap_mode="r"`, which makes loading
+    near-instant and lets the matrix exceed physical memory.
+    """
+    if str(x_path).endswith(".npz"):
+        X = sparse.load_npz(x_path)
+    else:
+        X = np.load(x_path, mmap_mode=mmap_mode)
+    if y_path is None:
+        return X
+    return X, np.load(y_path, mmap_mode=mmap_mode)
+
+
+class FeatureDataset:
+    def __init__(self, x_path, y_path):
+        """
+        A saved feature matrix opened read-only without loading it into memory.
+        Train/test splits are index arrays over the mapped file; rows are only read
+        when a subset is requested.
+        """
+        self.x_path = x_path
+        self.y_path = y_path
+        self.X, self.y = load_features(x_path, y_path, mmap_mode="r")
+        self.manifest = read_manifest(x_path)
+        if self.manifest is not None and list(self.X.shape) != self.manifest["shape"]:
+            raise ValueError(
+                f"{x_path} has shape {self.X.shape}, manifest says {self.manifest['shape']}"
+            )
+
+    def __len__(self):
+        return self.X.shape[0]
+
+    @property
+    def columns(self):
+        return None if self.manifest is None else self.manifest["columns"]
+
+    def split(self, test_size=0.2, random_state=42, shuffle=True, stratify=False):
+        """
+        Train and test row indices. Uses the same permutation as
+        sklearn.model_selection.train_test_split on the full arrays; with shuffle=False
+        both parts are contiguous ranges and `subset` returns views. With
+        stratify=True both parts keep the label proportions of y (only y is read).
+        """
+        return train_test_split(
+            np.arange(len(self)),
+            test_size=test_size,
+            random_state=random_state if shuffle else None,
+            shuffle=shuffle,
+            stratify=np.asarray(self.y) if stratify else None,
+        )
+
+    def subset(self, index):
+        """Rows of X and y at `index`: a zero-copy view for contiguous ranges, else a copy."""
+        index = np.asarray(index)
+        if len(index) and np.array_equal(
+            index, np.arange(index[0], index[0] + len(index))
+        ):
+            rows = slice(index[0], index[0] + len(index))
+            return self.X[rows], self.y[rows]
+        return self.X[index], self.y[index]
+
+    def save_subset(self, index, x_path, y_path, block_rows=65_536):
+        """
+        Write the rows at `index` to new X and y files without holding them in memory:
+        dense rows are copied block by block into a memory-mapped `.npy`, sparse rows
+        are saved as CSR `.npz`.
+        """
+        index = np.asarray(index)
+        if sparse.issparse(self.X):
+            sparse.save_npz(x_path, self.X[index].tocsr())
+        else:
+            X = np.lib.format.open_memmap(
+                x_path,
+                mode="w+",
+                dtype=self.X.dtype,
+                shape=(len(index), self.X.shape[1]),
+            )
+            for start in range(0, len(index), block_rows):
+                rows = index[start : start + block_rows]
+                X[start : start + len(rows)] = self.X[rows]
+            X.flush()
+            del X
+        np.save(y_path, self.y[index])
@@ -0,0 +1,219 @@
+import pickle
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from scripts.customer_aggregates import AGGREGATE_COLUMNS
+from scripts.outliers import OutlierHandler
+
+ARTIFACT_VERSION = 1
+
+CATEGORICAL_INPUTS = [
+    "ProviderId",
+    "ProductId",
+    "ProductCategory",
+    "ChannelId",
+    "PricingStrategy",
+]
+TIME_INPUTS = [
+    "TransactionHour",
+    "TransactionDay",
+    "TransactionMonth",
+    "TransactionYear",
+]
+
+
+def parse_timestamp(value):
+    """Parse an ISO-8601 timestamp (with an optional trailing Z) without going through pandas."""
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+class FeatureTransformer:
+    def __init__(
+        self, one_hot_encoder, normalizer, aggregated_features, outlier_handler=None
+    ):
+        """
+        Fitted feature pipeline that turns raw transactions into model feature rows.
+        Keeps the fitted OneHotEncoder, MinMaxScaler and per-customer aggregate table,
+        and compiles them into plain dict and array lookups for single-record scoring.
+        With a fitted OutlierHandler, raw inputs get the training outlier bounds first.
+        """
+        self.one_hot_encoder = one_hot_encoder
+        self.normalizer = normalizer
+        self.aggregated_features = aggregated_features
+        self.outlier_handler = outlier_handler
+        self._compile()
+
+    @classmethod
+    def from_feature_engineering(cls, feature_engineering, outlier_handler=None):
+        """Build the transformer from a FeatureEngineering run that has already been fitted."""
+        return cls(
+            feature_engineering.one_hot_encoder,
+            feature_engineering.normalizer,
+            feature_engineering.aggregated_features,
+            outlier_handler,
+        )
+
+    def _compile(self):
+        """Precompute scaling arrays, one-hot column positions and the customer index."""
+        encoded_inputs = list(self.one_hot_encoder.feature_names_in_)
+        if encoded_inputs != CATEGORICAL_INPUTS + TIME_INPUTS:
+            raise ValueError(f"Unexpected encoder inputs: {encoded_inputs}")
+        self.n_numerical = 2 + len(AGGREGATE_COLUMNS)
+        self.scale = np.asarray(self.normalizer.scale_, dtype=np.float64)
+        self.offset = np.asarray(self.normalizer.min_, dtype=np.float64)
+
+        # Category value -> output column; dropped and unseen categories stay all-zero
+        self.category_columns = []
+        position = self.n_numerical
+        drop_idx = self.one_hot_encoder.drop_idx_
+        for i, categories in enumerate(self.one_hot_encoder.categories_):
+            dropped = None if drop_idx is None else drop_idx[i]
+            lookup = {}
+            for j, category in enumerate(categories):
+                if j == dropped:
+                    continue
+                lookup[category.item() if hasattr(category, "item") else category] = (
+                    position
+                )
+                position += 1
+            self.category_columns.append(lookup)
+        self.n_features = position
+
+        self.customer_index = {
+            customer_id: row
+            for row, customer_id in enumerate(
+                self.aggregated_features["CustomerId"].values
+            )
+        }
+        self.customer_table = self.aggregated_features[AGGREGATE_COLUMNS].values.astype(
+            np.float64
+        )
+
+    def get_feature_names(self):
+        return [
+            "Amount",
+            "Value",
+            *AGGREGATE_COLUMNS,
+            *self.one_hot_encoder.get_feature_names_out(),
+        ]
+
+    def customer_features(self, customer_id, amount):
+        """Aggregates for a customer; unseen customers are treated as having this one transaction."""
+        row = self.customer_index.get(customer_id)
+        if row is None:
+            return (amount, amount, 1.0, np.nan)
+        return self.customer_table[row]
+
+    def transform_record(self, record, customer_features=None):
+        """Turn one raw transaction (a mapping of column -> value) into a feature row."""
+        if self.outlier_handler is not None:
+            columns = self.outlier_handler.columns
+            values = self.outlier_handler.transform_values([record[c] for c in columns])
+            record = {**record, **dict(zip(columns, values))}
+        amount = float(record["Amount"])
+        if customer_features is None:
+            customer_features = self.customer_features(record["CustomerId"], amount)
+
+        row = np.zeros(self.n_features, dtype=np.float64)
+        row[0] = amount
+        row[1] = float(record["Value"])
+        row[2 : self.n_numerical] = customer_features
+        row[: self.n_numerical] = row[: self.n_numerical] * self.scale + self.offset
+
+        timestamp = parse_timestamp(record["TransactionStartTime"])
+        values = [record[col] for col in CATEGORICAL_INPUTS]
+        values += [timestamp.hour, timestamp.day, timestamp.month, timestamp.year]
+        for lookup, value in zip(self.category_columns, values):
+            position = lookup.get(value)
+            if position is not None:
+                row[position] = 1.0
+        return row
+
+    def transform_frame(self, df):
+        """
+        Vectorized `transform_record` for a DataFrame of raw transactions: one lookup
+        per column instead of per record, with the same handling of unseen customers
+        and categories.
+        """
+        if self.outlier_handler is not None:
+            df = self.outlier_handler.transform(df)
+        n_rows = len(df)
+        amount = df["Amount"].to_numpy(dtype=np.float64)
+        rows = pd.Index(self.aggregated_features["CustomerId"].values).get_indexer(
+            df["CustomerId"].values
+        )
+        customer = self.customer_table[rows]
+        unseen = rows < 0
+        if unseen.any():
+            customer[unseen] = np.column_stack(
+                [
+                    amount[unseen],
+                    amount[unseen],
+                    np.ones(unseen.sum()),
+                    np.full(unseen.sum(), np.nan),
+                ]
+            )
+
+        X = np.zeros((n_rows, self.n_features), dtype=np.float64)
+        X[:, 0] = amount
+        X[:, 1] = df["Value"].to_numpy(dtype=np.float64)
+        X[:, 2 : self.n_numerical] = customer
+        X[:, : self.n_numerical] = X[:, : self.n_numerical] * self.scale + self.offset
+
+        timestamp = df["TransactionStartTime"]
+        if not pd.api.types.is_datetime64_any_dtype(timestamp):
+            timestamp = pd.to_datetime(timestamp)
+        columns = [df[col] for col in CATEGORICAL_INPUTS]
+        columns += [
+            timestamp.dt.hour,
+            timestamp.dt.day,
+            timestamp.dt.month,
+            timestamp.dt.year,
+        ]
+        row_index = np.arange(n_rows)
+        for lookup, values in zip(self.category_columns, columns):
+            position = pd.Series(values.values).map(lookup).to_numpy(dtype=np.float64)
+            known = ~np.isnan(position)
+            X[row_index[known], position[known].astype(np.intp)] = 1.0
+        return X
+
+    def save(self, path):
+        """Pickle the fitted encoder, scaler and aggregate table as one versioned artifact."""
+        artifact = {
+            "version": ARTIFACT_VERSION,
+            "created_at": pd.Timestamp.now(tz="UTC").isoformat(),
+            "one_hot_encoder": self.one_hot_encoder,
+            "normalizer": self.normalizer,
+            "aggregated_features": self.aggregated_features,
+            "outlier_handler": (
+                None if self.outlier_handler is None else self.outlier_handler.to_dict()
+            ),
+        }
+        with open(path, "wb") as file:
+            pickle.dump(artifact, file)
+        print(f"Feature transform saved as {path}.")
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            artifact = pickle.load(file)
+        if artifact.get("version") != ARTIFACT_VERSION:
+            raise ValueError(
+                f"Unsupported feature transform version {artifact.get('version')}, "
+                f"expected {ARTIFACT_VERSION}"
+            )
+        outlier_handler = artifact.get("outlier_handler")
+        return cls(
+            artifact["one_hot_encoder"],
+            artifact["normalizer"],
+            artifact["aggregated_features"],
+            (
+                None
+                if outlier_handler is None
+                else OutlierHandler.from_dict(outlier_handler)
+            ),
+        )
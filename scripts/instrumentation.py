@@ -0,0 +1,219 @@
+import bisect
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# Latency buckets in seconds, from sub-millisecond model calls to slow batch requests
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+class StageRecorder:
+    def __init__(self, trace_memory=True):
+        """
+        Record wall time, rows processed and peak Python memory of named pipeline
+        stages. Peak memory comes from tracemalloc, which slows allocation-heavy code
+        down noticeably; pass trace_memory=False to record times only.
+        """
+        self.trace_memory = trace_memory
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """
+        Time the body of the `with` block as stage `name`. The yielded dict is the
+        stage's record; set record["rows"] inside the block when the row count is only
+        known at the end.
+        """
+        record = {"stage": name, "rows": rows}
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            if self.trace_memory:
+                record["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+                if tracing:
+                    tracemalloc.stop()
+            if record["rows"]:
+                record["rows_per_s"] = record["rows"] / max(record["seconds"], 1e-9)
+            self.records.append(record)
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame(self.records)
+
+    def report(self):
+        """One line per recorded stage."""
+        for record in self.records:
+            line = f"{record['stage']}: {record['seconds']:.3f}s"
+            if record["rows"]:
+                line += f", {record['rows']} rows ({record['rows_per_s']:,.0f} rows/s)"
+            if "peak_mb" in record:
+                line += f", peak {record['peak_mb']:.1f} MB"
+            print(line)
+
+
+class _NullRecorder:
+    """Recorder used when instrumentation is off: every stage is a no-op."""
+
+    records = []
+
+    def stage(self, name, rows=None):
+        return nullcontext({})
+
+    def to_frame(self):
+        import pandas as pd
+
+        return pd.DataFrame()
+
+    def report(self):
+        pass
+
+
+NULL_RECORDER = _NullRecorder()
+
+
+def timed_call(fn, *args):
+    """fn(*args) and its duration in seconds; picklable, so it also works in worker processes."""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        """
+        One metric family. With `callback` the metric has a single unlabelled value
+        that is read at scrape time, e.g. a counter kept by another object.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels[name] for name in self.labelnames)
+
+    def samples(self):
+        """(name suffix, label values, extra label pairs, value) of every sample."""
+        if self.callback is not None:
+            return [("", (), (), self.callback())]
+        with self._lock:
+            return [("", key, (), value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for suffix, values, extra, value in self.samples():
+            pairs = [*zip(self.labelnames, values), *extra]
+            labels = ",".join(f'{name}="{_escape(v)}"' for name, v in pairs)
+            lines.append(
+                f"{self.name}{suffix}{{{labels}}} {value}"
+                if labels
+                else f"{self.name}{suffix} {value}"
+            )
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if key not in self._values:
+                # Per-bucket (not yet cumulative) counts, sum and count
+                self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state = self._values[key]
+            state[0][position] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                cumulative = 0
+                for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                    cumulative += bucket_count
+                    samples.append(("_bucket", key, (("le", bound),), cumulative))
+                samples.append(("_sum", key, (), total))
+                samples.append(("_count", key, (), count))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Named metrics rendered together in the Prometheus text exposition format."""
+        self.metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=(), callback=None):
+        return self._register(Counter(name, documentation, labelnames, callback))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self._register(Gauge(name, documentation, labelnames, callback))
+
+    def render(self):
+        return "\n".join(metric.render() for metric in self.metrics.values()) + "\n"
@@ -0,0 +1,186 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+
+class QuantileSketch:
+    def __init__(self, k=2048, seed=0):
+        """
+        Mergeable streaming quantile sketch (KLL-style compactor hierarchy). Values
+        are buffered in levels of at most `k` items; a full level is sorted and every
+        other item moves up one level with double weight. Memory is O(k log(n / k))
+        and the rank error shrinks roughly as 1 / k.
+        """
+        self.k = k
+        self.levels = [np.empty(0)]
+        self.count = 0
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compact()
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        for height, items in enumerate(other.levels):
+            if height == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[height] = np.concatenate([self.levels[height], items])
+        self.count += other.count
+        self._compact()
+        return self
+
+    def _compact(self):
+        height = 0
+        while height < len(self.levels):
+            items = self.levels[height]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # Keep one item back when the level is odd so weights stay exact
+                keep, items = (
+                    items[len(items) - len(items) % 2 :],
+                    items[: len(items) - len(items) % 2],
+                )
+                promoted = items[self._rng.integers(2) :: 2]
+                if height + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[height + 1] = np.concatenate(
+                    [self.levels[height + 1], promoted]
+                )
+                self.levels[height] = keep
+            height += 1
+
+    def quantile(self, q):
+        """Approximate quantile(s) of everything seen so far."""
+        values = np.concatenate(self.levels)
+        if not len(values):
+            return np.full(np.shape(q), np.nan)
+        weights = np.concatenate(
+            [
+                np.full(len(items), 2.0**height)
+                for height, items in enumerate(self.levels)
+            ]
+        )
+        order = np.argsort(values, kind="stable")
+        values, cumulative = values[order], np.cumsum(weights[order])
+        # Midpoint ranks, matching linear-interpolation quantiles on the exact data
+        ranks = cumulative - weights[order] / 2
+        position = np.asarray(q, dtype=np.float64) * cumulative[-1]
+        return np.interp(position, ranks, values)
+
+
+class OutlierHandler:
+    def __init__(self, columns, replace_with="boundaries", whisker=1.5):
+        """
+        IQR outlier rule with bounds that are fitted once and reused. Values outside
+        [Q1 - whisker * IQR, Q3 + whisker * IQR] are clipped to the bounds
+        (replace_with="boundaries") or replaced by the column mean ("mean").
+        `fit` computes the quartiles of all columns in one pass; `partial_fit` builds
+        them chunk by chunk from quantile sketches for data that does not fit in memory.
+        """
+        if replace_with not in ("boundaries", "mean"):
+            raise ValueError("replace_with must be either 'boundaries' or 'mean'")
+        self.columns = list(columns)
+        self.replace_with = replace_with
+        self.whisker = whisker
+        self.lower = None
+        self.upper = None
+        self.mean = None
+        self._sketches = None
+        self._sum = None
+        self._count = None
+
+    def _set_bounds(self, q1, q3):
+        iqr = q3 - q1
+        self.lower = np.asarray(q1 - self.whisker * iqr, dtype=np.float64)
+        self.upper = np.asarray(q3 + self.whisker * iqr, dtype=np.float64)
+
+    def fit(self, df):
+        quartiles = df[self.columns].quantile([0.25, 0.75]).to_numpy(dtype=np.float64)
+        self._set_bounds(quartiles[0], quartiles[1])
+        self.mean = df[self.columns].mean().to_numpy(dtype=np.float64)
+        return self
+
+    def partial_fit(self, df):
+        """Add a chunk to the quantile sketches and running means, then refresh the bounds."""
+        values = df[self.columns].to_numpy(dtype=np.float64)
+        if self._sketches is None:
+            self._sketches = [QuantileSketch() for _ in self.columns]
+            self._sum = np.zeros(len(self.columns))
+            self._count = np.zeros(len(self.columns))
+        for sketch, column in zip(self._sketches, values.T):
+            sketch.update(column)
+        self._sum += np.nansum(values, axis=0)
+        self._count += np.sum(~np.isnan(values), axis=0)
+
+        quartiles = np.array([s.quantile([0.25, 0.75]) for s in self._sketches])
+        self._set_bounds(quartiles[:, 0], quartiles[:, 1])
+        self.mean = self._sum / np.maximum(self._count, 1)
+        return self
+
+    def transform_values(self, values):
+        """Apply the bounds to an array whose last axis follows `columns`."""
+        values = np.asarray(values, dtype=np.float64)
+        if self.replace_with == "boundaries":
+            return np.clip(values, self.lower, self.upper)
+        outside = (values < self.lower) | (values > self.upper)
+        return np.where(outside, self.mean, values)
+
+    def transform(self, df, inplace=False):
+        """`df` (a copy unless inplace=True) with the outliers of every fitted column replaced."""
+        if not inplace:
+            df = df.copy()
+        values = self.transform_values(df[self.columns].to_numpy(dtype=np.float64))
+        for col, column in zip(self.columns, values.T):
+            # Clipping keeps integer columns integer when the bounds allow it
+            dtype = df[col].dtype
+            if (
+                self.replace_with == "boundaries"
+                and pd.api.types.is_integer_dtype(dtype)
+                and np.array_equal(column, np.round(column))
+            ):
+                column = column.astype(dtype)
+            df[col] = column
+        return df
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    @property
+    def bounds(self):
+        return pd.DataFrame(
+            {"lower": self.lower, "upper": self.upper, "mean": self.mean},
+            index=self.columns,
+        )
+
+    def to_dict(self):
+        return {
+            "columns": self.columns,
+            "replace_with": self.replace_with,
+            "whisker": self.whisker,
+            "lower": self.lower.tolist(),
+            "upper": self.upper.tolist(),
+            "mean": self.mean.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        handler = cls(state["columns"], state["replace_with"], state["whisker"])
+        handler.lower = np.asarray(state["lower"], dtype=np.float64)
+        handler.upper = np.asarray(state["upper"], dtype=np.float64)
+        handler.mean = np.asarray(state["mean"], dtype=np.float64)
+        return handler
+
+    def save(self, path):
+        with open(path, "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            return cls.from_dict(json.load(file))
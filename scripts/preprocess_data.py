@@ -5,6 +5,30 @@ import os
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from scripts.data_io import is_parquet, write_transactions
+from scripts.outliers import OutlierHandler
+
+# Target storage kind per column of the transaction data. Columns not listed here are
+# inferred: strings become categories when repeated enough, numbers are downcast.
+DTYPE_SCHEMA = {
+    "TransactionId": "string",
+    "BatchId": "category",
+    "AccountId": "category",
+    "SubscriptionId": "category",
+    "CustomerId": "category",
+    "CurrencyCode": "category",
+    "CountryCode": "integer",
+    "ProviderId": "category",
+    "ProductId": "category",
+    "ProductCategory": "category",
+    "ChannelId": "category",
+    "Amount": "float",
+    "Value": "integer",
+    "TransactionStartTime": "datetime",
+    "PricingStrategy": "integer",
+    "FraudResult": "integer",
+}
+
 
 def missing_values_proportions(df):
     missing_values = df.isnull().sum()
@@ -18,31 +42,98 @@ def missing_values_proportions(df):
     )
 
 
+def _infer_kind(series, max_category_ratio):
+    if pd.api.types.is_bool_dtype(series) or isinstance(
+        series.dtype, pd.CategoricalDtype
+    ):
+        return None
+    if pd.api.types.is_integer_dtype(series):
+        return "integer"
+    if pd.api.types.is_float_dtype(series):
+        return "float"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return None
+    if series.nunique() <= max_category_ratio * max(len(series), 1):
+        return "category"
+    return None
+
+
+def _convert(series, kind):
+    if kind == "category":
+        return series.astype("category")
+    if kind == "datetime":
+        return pd.to_datetime(series)
+    if kind == "string":
+        return series.astype("str")
+    if kind == "integer":
+        if series.isna().any():
+            return _convert(series, "float")
+        return pd.to_numeric(series, downcast="integer")
+    if kind == "float":
+        # Keep float64 unless float32 holds every value exactly
+        values = series.to_numpy(dtype=np.float64)
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow, values, equal_nan=True):
+            return series.astype(np.float32)
+        return series.astype(np.float64)
+    raise ValueError(f"Unknown dtype kind: {kind}")
+
+
+def optimize_dtypes(df, schema=None, max_category_ratio=0.5, report=True):
+    """
+    Shrink a DataFrame by converting columns to the kinds in `schema` (DTYPE_SCHEMA by
+    default): repeated ID strings to categoricals, which group-bys handle as integer
+    codes, integers to the smallest type that holds them and floats to float32 when
+    that is lossless. Returns the optimized copy and a per-column memory report.
+    """
+    schema = DTYPE_SCHEMA if schema is None else schema
+    optimized = df.copy()
+    for col in optimized.columns:
+        kind = schema.get(col) or _infer_kind(optimized[col], max_category_ratio)
+        if kind is not None:
+            optimized[col] = _convert(optimized[col], kind)
+
+    before = df.memory_usage(deep=True, index=False)
+    after = optimized.memory_usage(deep=True, index=False)
+    memory = pd.DataFrame(
+        {
+            "Dtype Before": df.dtypes.astype(str),
+            "Dtype After": optimized.dtypes.astype(str),
+            "Memory Before (MB)": (before / 1e6).round(3),
+            "Memory After (MB)": (after / 1e6).round(3),
+            "Reduction (%)": ((1 - after / before.replace(0, np.nan)) * 100).round(1),
+        }
+    )
+    if report:
+        total_before, total_after = before.sum() / 1e6, after.sum() / 1e6
+        print(
+            f"Memory usage: {total_before:.2f} MB -> {total_after:.2f} MB "
+            f"({(1 - total_after / max(total_before, 1e-12)) * 100:.1f}% less)"
+        )
+    return optimized, memory
+
+
 def handle_outliers(df, columns, plot_box=False, replace_with="boundaries"):
     """Detect and handle outliers in specified columns of a DataFrame."""
-    for col in columns:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-
-        if replace_with == "boundaries":
-            # Replace outliers with boundaries
-            df[col] = df[col].clip(lower=lower_bound, upper=upper_bound)
-        elif replace_with == "mean":
-            # Replace outliers with the mean
-            mean = df[col].mean()
-            df[col] = np.where(
-                (df[col] < lower_bound) | (df[col] > upper_bound), mean, df[col]
-            )
-        else:
-            raise ValueError("replace_with must be either 'boundaries' or 'mean'")
-
-        if plot_box:
+    handler = OutlierHandler(columns, replace_with=replace_with).fit(df)
+    handler.transform(df, inplace=True)
+
+    if plot_box:
+        for col in handler.columns:
             plt.figure(figsize=(6, 0.3))
             sns.boxplot(x=df[col])
             plt.title(f"Box Plot for {col} replaced with {replace_with} ")
             plt.show()
 
     return df
+
+
+def save_cleaned_data(df, path):
+    """
+    Save the cleaned transactions. A `.parquet` path or a directory is written as a
+    typed, month-partitioned Parquet dataset (see scripts/data_io.py), anything else as CSV.
+    """
+    if is_parquet(path) or not os.path.splitext(str(path))[1]:
+        write_transactions(df, path)
+    else:
+        df.to_csv(path)
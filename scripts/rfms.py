@@ -0,0 +1,127 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from scripts.customer_aggregates import aggregate_by_customer, sample_std
+
+RFMS_COLUMNS = ["Recency", "Frequency", "Monetary", "StdDev"]
+SECONDS_PER_DAY = 86_400
+
+
+def _epoch_seconds(timestamps):
+    """UTC seconds since the epoch as int64; naive timestamps are taken to be UTC."""
+    timestamps = pd.Series(timestamps)
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps, utc=True)
+    elif timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert("UTC").dt.tz_localize(None)
+    return timestamps.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+def rfms_components(customer_ids, timestamps, amounts, snapshot_date=None):
+    """
+    Raw Recency (days from the last transaction to `snapshot_date`), Frequency
+    (transactions), Monetary (summed amount) and StdDev (sample std of the amounts,
+    0 for single transactions) per customer. Customer ids are factorized once;
+    Frequency, Monetary and StdDev are bincounts over the codes and the last
+    transaction time is a maximum.reduceat over the timestamps grouped by a stable
+    sort of the codes. `snapshot_date` defaults to one day after the last transaction;
+    transactions after it are left out, so customers only seen later are dropped and
+    Recency is never negative. Returns the unique customer ids and a dict of float64
+    arrays.
+    """
+    seconds = _epoch_seconds(timestamps)
+    if snapshot_date is None:
+        snapshot = seconds.max() + SECONDS_PER_DAY if len(seconds) else 0
+    else:
+        snapshot = _epoch_seconds([pd.Timestamp(snapshot_date)])[0]
+        observed = seconds <= snapshot
+        if not observed.all():
+            if not isinstance(customer_ids, pd.Categorical):
+                customer_ids = np.asarray(customer_ids)
+            customer_ids = customer_ids[observed]
+            amounts = np.asarray(amounts)[observed]
+            seconds = seconds[observed]
+    if not len(seconds):
+        raise ValueError("No transactions on or before the snapshot date")
+
+    uniques, codes, stats = aggregate_by_customer(customer_ids, amounts)
+    # Every code occurs at least once, so group starts follow from the counts; rows
+    # without a customer id (code -1) sort first and are skipped
+    order = np.argsort(codes, kind="stable")[np.count_nonzero(codes < 0) :]
+    starts = np.concatenate([[0], np.cumsum(stats["rows"])[:-1]])
+    last_seen = np.maximum.reduceat(seconds[order], starts)
+
+    components = {
+        "Recency": (snapshot - last_seen) / SECONDS_PER_DAY,
+        "Frequency": stats["rows"].astype(np.float64),
+        "Monetary": stats["total"],
+        "StdDev": np.nan_to_num(sample_std(stats["count"], stats["m2"])),
+    }
+    return uniques, components
+
+
+def normalize_rfms(components):
+    """
+    Min-max scale every component to [0, 1] and stack them as a float32
+    (n_customers, 4) array in RFMS_COLUMNS order. Recency is inverted so that for
+    every column a higher score means a more engaged customer, which is what
+    DefaultEstimator's threshold on the row mean assumes.
+    """
+    scores = np.empty((len(components["Recency"]), len(RFMS_COLUMNS)), np.float32)
+    for i, name in enumerate(RFMS_COLUMNS):
+        values = components[name]
+        low, high = (values.min(), values.max()) if len(values) else (0.0, 0.0)
+        scaled = (values - low) / (high - low) if high > low else np.zeros_like(values)
+        scores[:, i] = 1.0 - scaled if name == "Recency" else scaled
+    return scores
+
+
+def build_rfms(
+    df,
+    snapshot_date=None,
+    customer_column="CustomerId",
+    time_column="TransactionStartTime",
+    amount_column="Amount",
+):
+    """Customer ids and their normalized float32 RFMS scores, ready for fit_rfms/assign_labels."""
+    # Categorical ids (Parquet reads) stay categorical and are grouped by their codes
+    uniques, components = rfms_components(
+        df[customer_column].array,
+        df[time_column],
+        df[amount_column].to_numpy(),
+        snapshot_date,
+    )
+    return uniques, normalize_rfms(components)
+
+
+def rfms_frame(customer_ids, scores):
+    """The scores as a DataFrame indexed by CustomerId."""
+    return pd.DataFrame(
+        scores, columns=RFMS_COLUMNS, index=pd.Index(customer_ids, name="CustomerId")
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compute per-customer RFMS scores and Good/Bad labels from transactions."
+    )
+    parser.add_argument("data_path", help="Cleaned transactions, CSV or Parquet")
+    parser.add_argument("out_path", help="Output .csv or .parquet file")
+    parser.add_argument("--snapshot-date", default=None)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    args = parser.parse_args()
+
+    from scripts.data_io import read_transactions
+    from scripts.woe_binning import DefaultEstimator
+
+    columns = ["CustomerId", "TransactionStartTime", "Amount"]
+    result = DefaultEstimator(threshold=args.threshold).fit_transactions(
+        read_transactions(args.data_path, columns), args.snapshot_date
+    )
+    if args.out_path.endswith(".parquet"):
+        result.to_parquet(args.out_path)
+    else:
+        result.to_csv(args.out_path)
+    print(f"Saved RFMS scores of {len(result)} customers to {args.out_path}.")
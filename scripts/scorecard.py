@@ -0,0 +1,197 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Score bands, lower edge inclusive: grade, maximum loan amount and duration in months
+DEFAULT_BANDS = {
+    "edges": [300, 500, 580, 650, 720, 780],
+    "grades": ["F", "E", "D", "C", "B", "A"],
+    "loan_amounts": [0, 1000, 5000, 15000, 30000, 50000],
+    "loan_durations": [0, 3, 6, 12, 24, 36],
+}
+
+
+def default_probability(model, X, bad_label=1):
+    """Predicted probability of the bad (default) class for every row of X."""
+    proba = model.predict_proba(X)
+    return proba[:, list(model.classes_).index(bad_label)]
+
+
+class Scorecard:
+    def __init__(
+        self,
+        base_score=600,
+        base_odds=50,
+        pdo=20,
+        min_score=300,
+        max_score=850,
+        bands=None,
+    ):
+        """
+        Points-to-double-odds scorecard: `base_score` points correspond to good:bad odds
+        of `base_odds`, and every `pdo` points double the odds. Scores are clipped to
+        [min_score, max_score] and mapped to a grade, loan amount and duration through
+        the score bands. Everything works on whole arrays, so a portfolio is scored
+        in a handful of vectorized operations.
+        """
+        self.base_score = base_score
+        self.base_odds = base_odds
+        self.pdo = pdo
+        self.min_score = min_score
+        self.max_score = max_score
+        self.bands = bands or DEFAULT_BANDS
+        self.factor = pdo / np.log(2)
+        self.offset = base_score - self.factor * np.log(base_odds)
+
+        self.edges = np.asarray(self.bands["edges"], dtype=np.float64)
+        self.grades = np.asarray(self.bands["grades"])
+        self.loan_amounts = np.asarray(self.bands["loan_amounts"], dtype=np.float64)
+        self.loan_durations = np.asarray(self.bands["loan_durations"], dtype=np.int32)
+        if not (
+            len(self.edges)
+            == len(self.grades)
+            == len(self.loan_amounts)
+            == len(self.loan_durations)
+        ):
+            raise ValueError("All score band lists must have the same length")
+
+    def score_from_log_odds(self, log_odds_bad):
+        """Scores from the log-odds of default (e.g. a logistic regression's decision_function)."""
+        score = self.offset - self.factor * np.asarray(log_odds_bad, dtype=np.float64)
+        return np.clip(score, self.min_score, self.max_score)
+
+    def score(self, probability):
+        """Scores from predicted default probabilities."""
+        p = np.clip(np.asarray(probability, dtype=np.float64), 1e-12, 1 - 1e-12)
+        return self.score_from_log_odds(np.log(p) - np.log1p(-p))
+
+    def points(self, woe, coefficients, intercept):
+        """
+        Points contributed by every WoE feature for a logistic regression fitted on
+        WoE-transformed inputs: shape (n_rows, n_features), summing to the row's score
+        before clipping. The intercept and offset are spread evenly over the features.
+        """
+        woe = np.asarray(woe, dtype=np.float64)
+        coefficients = np.asarray(coefficients, dtype=np.float64).ravel()
+        n_features = len(coefficients)
+        return (
+            -self.factor * (woe * coefficients + float(intercept) / n_features)
+            + self.offset / n_features
+        )
+
+    def band(self, scores):
+        """Index of the score band of every score."""
+        index = np.searchsorted(self.edges, scores, side="right") - 1
+        return np.clip(index, 0, len(self.edges) - 1)
+
+    def loan_terms(self, scores):
+        """Grade, recommended loan amount and loan duration (months) for every score."""
+        index = self.band(scores)
+        return (
+            self.grades[index],
+            self.loan_amounts[index],
+            self.loan_durations[index],
+        )
+
+    def score_portfolio(self, probability):
+        """Score, grade and loan terms for an array of default probabilities."""
+        probability = np.asarray(probability, dtype=np.float64)
+        scores = self.score(probability)
+        grades, amounts, durations = self.loan_terms(scores)
+        return {
+            "probability": probability,
+            "score": np.rint(scores).astype(np.int32),
+            "grade": grades,
+            "loan_amount": amounts,
+            "loan_duration": durations,
+        }
+
+
+def score_file(
+    model, x_path, out_path, scorecard=None, chunk_size=200_000, customer_ids=None
+):
+    """
+    Score every row of a saved feature matrix in chunks and write one CSV line per row.
+    The matrix is memory-mapped, so only one chunk of features is in memory at a time.
+    `customer_ids`, one per row of the matrix, become the first output column.
+    """
+    import pandas as pd
+
+    from scripts.feature_io import load_features
+
+    scorecard = scorecard or Scorecard()
+    X = load_features(x_path, mmap_mode="r")
+    n_rows = X.shape[0]
+    if customer_ids is not None and len(customer_ids) != n_rows:
+        raise ValueError(
+            f"{len(customer_ids)} customer ids for a feature matrix of {n_rows} rows"
+        )
+    for start in range(0, n_rows, chunk_size):
+        stop = min(start + chunk_size, n_rows)
+        result = scorecard.score_portfolio(default_probability(model, X[start:stop]))
+        frame = pd.DataFrame(result)
+        if customer_ids is not None:
+            frame.insert(0, "CustomerId", np.asarray(customer_ids)[start:stop])
+        frame.to_csv(
+            out_path, mode="w" if start == 0 else "a", header=start == 0, index=False
+        )
+    return n_rows
+
+
+def load_ids(path, column="CustomerId"):
+    """
+    Row identifiers for score_file: a .npy array, or `column` of a CSV file or Parquet
+    file/dataset whose rows line up with the feature matrix (e.g. the cleaned
+    transactions).
+    """
+    if path.endswith(".npy"):
+        return np.load(path, allow_pickle=False)
+    import pandas as pd
+
+    if path.endswith(".parquet") or os.path.isdir(path):
+        return pd.read_parquet(path, columns=[column])[column].to_numpy()
+    return pd.read_csv(path, usecols=[column], dtype={column: str})[column].to_numpy()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Score a saved feature matrix into credit scores and loan terms."
+    )
+    parser.add_argument("--x-path", default="../data/processed/X_features.npy")
+    parser.add_argument("--model-path", default="../checkpoints/best_model.pkl")
+    parser.add_argument("--flat-model-dir", default=None)
+    parser.add_argument("--out", default="../data/processed/scores.csv")
+    parser.add_argument(
+        "--ids-path",
+        default=None,
+        help="Row ids: a .npy file, or a CSV/Parquet file with --id-column",
+    )
+    parser.add_argument("--id-column", default="CustomerId")
+    parser.add_argument("--chunk-size", type=int, default=200_000)
+    parser.add_argument("--base-score", type=float, default=600)
+    parser.add_argument("--base-odds", type=float, default=50)
+    parser.add_argument("--pdo", type=float, default=20)
+    args = parser.parse_args()
+
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+    from scripts.serving.model_loader import ModelLoader
+
+    # Large chunks are faster through sklearn than through the compiled flat engine
+    model = ModelLoader(args.model_path, args.flat_model_dir, compile_model=False).get()
+    customer_ids = (
+        load_ids(args.ids_path, args.id_column) if args.ids_path is not None else None
+    )
+    start = time.perf_counter()
+    n_rows = score_file(
+        model,
+        args.x_path,
+        args.out,
+        Scorecard(args.base_score, args.base_odds, args.pdo),
+        args.chunk_size,
+        customer_ids,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Scored {n_rows} rows in {elapsed:.1f}s ({n_rows / elapsed:,.0f} rows/s).")
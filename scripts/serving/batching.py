@@ -0,0 +1,183 @@
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+
+from scripts.instrumentation import timed_call
+from scripts.serving.executor import QueueFullError
+
+
+class BatchStats:
+    def __init__(self, window=1000):
+        """
+        Keep running counters and a sliding window of recent batch sizes and queue waits.
+        """
+        self.batches = 0
+        self.rows = 0
+        self.rejected = 0  # Rows refused because the queue was full
+        self.skipped = 0  # Rows dropped before dispatch because their caller gave up
+        self.batch_sizes = deque(maxlen=window)
+        self.queue_waits_ms = deque(maxlen=window)
+
+    def record(self, batch_size, queue_waits_ms):
+        """Record one dispatched batch and the queue wait of each of its rows."""
+        self.batches += 1
+        self.rows += batch_size
+        self.batch_sizes.append(batch_size)
+        self.queue_waits_ms.extend(queue_waits_ms)
+
+    def summary(self):
+        """Return batch size and queue wait statistics over the recent window."""
+        sizes = np.asarray(self.batch_sizes, dtype=float)
+        waits = np.asarray(self.queue_waits_ms, dtype=float)
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "rejected": self.rejected,
+            "skipped": self.skipped,
+            "mean_batch_size": float(sizes.mean()) if sizes.size else 0.0,
+            "max_batch_size": int(sizes.max()) if sizes.size else 0,
+            "mean_queue_wait_ms": float(waits.mean()) if waits.size else 0.0,
+            "p99_queue_wait_ms": float(np.percentile(waits, 99)) if waits.size else 0.0,
+        }
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        predict_fn,
+        max_batch_size=64,
+        max_wait_ms=5.0,
+        executor=None,
+        max_queue=1024,
+        max_in_flight=1,
+        on_inference=None,
+    ):
+        """
+        Coalesce concurrent single-row requests into one batched call of `predict_fn`.
+        A batch is dispatched when it reaches `max_batch_size` rows or when its
+        oldest row has waited `max_wait_ms` milliseconds, whichever comes first.
+        Batches run on `executor` (a BoundedExecutor) if given, else on the loop's
+        default executor, with up to `max_in_flight` batches running at once. At most
+        `max_queue` rows wait for a batch; beyond that `submit` fails fast with
+        QueueFullError. Rows whose caller stopped waiting (e.g. a request deadline)
+        are dropped before dispatch. `on_inference`, if given, is called with the
+        seconds every batch spent in `predict_fn`.
+        """
+        self.predict_fn = predict_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight
+        self.on_inference = on_inference
+        self.stats = BatchStats()
+        self.queue = None
+        self.worker = None
+        self._slots = None
+        self._dispatches = set()
+
+    async def start(self):
+        """Start the background task that drains the queue."""
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self.worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the background task and the batches still running."""
+        tasks = list(self._dispatches)
+        if self.worker is not None:
+            tasks.append(self.worker)
+            self.worker = None
+        # Before Python 3.12, wait_for can swallow a cancellation that races with the
+        # queue handing over a row, so keep cancelling until the tasks are done
+        while tasks:
+            for task in tasks:
+                task.cancel()
+            _, pending = await asyncio.wait(tasks, timeout=self.max_wait + 0.1)
+            tasks = list(pending)
+
+    async def submit(self, row):
+        """Queue one feature row and wait for its prediction."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((row, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            raise QueueFullError(f"{self.queue.qsize()} rows already queued")
+        # Cancelling the caller (e.g. wait_for timing out) cancels the future too
+        return await future
+
+    async def _next_row(self, timeout=None):
+        """Next queued row whose caller is still waiting."""
+        while True:
+            if timeout is None:
+                item = await self.queue.get()
+            else:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            if not item[1].done():
+                return item
+            self.stats.skipped += 1
+
+    async def _collect(self):
+        """Wait for the first row, then gather more until the batch is full or the window closes."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._next_row()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await self._next_row(timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            # Wait for a free slot first, so rows keep queueing into the next batch
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _predict(self, X):
+        if self.executor is not None:
+            return await self.executor.run(timed_call, self.predict_fn, X)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, timed_call, self.predict_fn, X
+        )
+
+    async def _dispatch(self, batch):
+        try:
+            # Callers may have given up while the batch was filling up
+            waiting = [item for item in batch if not item[1].done()]
+            self.stats.skipped += len(batch) - len(waiting)
+            batch = waiting
+            if not batch:
+                return
+            rows, futures, enqueued = zip(*batch)
+            dispatched = time.perf_counter()
+            self.stats.record(len(batch), [(dispatched - t) * 1000.0 for t in enqueued])
+            try:
+                # Run the model off the event loop so new requests keep queueing
+                predictions, seconds = await self._predict(np.vstack(rows))
+            except Exception as e:
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            if self.on_inference is not None:
+                self.on_inference(seconds)
+            for future, prediction in zip(futures, predictions):
+                if not future.done():
+                    future.set_result(prediction)
+        finally:
+            self._slots.release()
@@ -0,0 +1,212 @@
+import hashlib
+import io
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+PURGE_EVERY = 1000  # Shared-store writes between sweeps of expired rows
+
+
+def feature_keys(X, method="predict"):
+    """
+    Canonical hash of every row of X: float64 values with -0.0 folded into 0.0 and
+    every NaN mapped to the same bit pattern, so equal inputs always share a key.
+    The key also covers `method`, since predict and predict_proba results differ.
+    """
+    X = np.array(X, dtype=np.float64, ndmin=2) + 0.0
+    X[np.isnan(X)] = np.nan
+    prefix = hashlib.blake2b(method.encode(), digest_size=16)
+    keys = []
+    for row in X:
+        digest = prefix.copy()
+        digest.update(row.tobytes())
+        keys.append(digest.hexdigest())
+    return keys
+
+
+def feature_key(row, method="predict"):
+    """Key of a single feature row."""
+    return feature_keys(np.ravel(row), method)[0]
+
+
+def _to_bytes(value):
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(value), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _from_bytes(blob):
+    return np.load(io.BytesIO(blob), allow_pickle=False)
+
+
+class SQLiteStore:
+    def __init__(self, path, timeout=5.0):
+        """
+        Prediction store shared by all worker processes on one host, backed by a local
+        SQLite file in WAL mode. Entries carry the model version they were computed
+        with and an absolute expiry time; rows of other versions are never returned.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, version TEXT, value BLOB, expires REAL)"
+            )
+
+    def get_many(self, keys, version, now):
+        """Unexpired entries of `keys` computed with `version`, as key -> (expiry, value)."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                rows = self._conn.execute(
+                    "SELECT key, expires, value FROM predictions"
+                    " WHERE version = ? AND expires > ?"
+                    f" AND key IN ({','.join('?' * len(chunk))})",
+                    (version, now, *chunk),
+                ).fetchall()
+                found.update(
+                    (key, (expires, _from_bytes(value))) for key, expires, value in rows
+                )
+        return found
+
+    def put_many(self, items, version, expires):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                [(key, version, _to_bytes(value), expires) for key, value in items],
+            )
+
+    def purge(self, version, now):
+        """Drop expired rows and rows computed with any other model version."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM predictions WHERE version != ? OR expires <= ?",
+                (version, now),
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM predictions")
+
+    def close(self):
+        self._conn.close()
+
+
+class PredictionCache:
+    def __init__(self, max_entries=10_000, ttl=300.0, store=None):
+        """
+        In-process LRU cache of per-row predictions with a time-to-live, optionally
+        backed by a SQLiteStore shared across workers. Local misses are looked up in
+        the store and copied into the LRU. All entries belong to one model version;
+        `set_version` with a different version drops them, so a new checkpoint never
+        serves predictions of the old one.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self.version = None
+        self._entries = OrderedDict()  # key -> (expiry time, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._writes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def set_version(self, version):
+        """Invalidate everything if `version` differs from the cached model version."""
+        if version != self.version:
+            self.invalidate(version)
+
+    def invalidate(self, version=None, shared=False):
+        """
+        Drop all local entries and switch to `version`. The shared store loses its
+        expired and other-version rows, or everything with shared=True.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.version = version
+        if self.store is not None:
+            if shared:
+                self.store.clear()
+            else:
+                self.store.purge(str(version), time.time())
+
+    def get_many(self, keys):
+        """Cached value per key, None for misses."""
+        now = time.time()
+        values = [None] * len(keys)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] <= now:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+                if entry is None:
+                    missing.append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    values[i] = entry[1]
+
+        if missing and self.store is not None:
+            found = self.store.get_many(
+                [keys[i] for i in missing], str(self.version), now
+            )
+            if found:
+                self._put_local(found.items())
+                for i in missing:
+                    if keys[i] in found:
+                        values[i] = found[keys[i]][1]
+                missing = [i for i in missing if values[i] is None]
+
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return values
+
+    def _put_local(self, entries):
+        """Insert (key, (expiry, value)) pairs, evicting least recently used keys."""
+        with self._lock:
+            for key, entry in entries:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def put_many(self, keys, values):
+        expires = time.time() + self.ttl
+        self._put_local((key, (expires, value)) for key, value in zip(keys, values))
+        if self.store is not None:
+            self.store.put_many(zip(keys, values), str(self.version), expires)
+            self._writes += 1
+            if self._writes % PURGE_EVERY == 0:
+                self.store.purge(str(self.version), time.time())
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl,
+            "shared": self.store is not None,
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
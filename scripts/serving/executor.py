@@ -0,0 +1,78 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class QueueFullError(Exception):
+    """Raised when the executor already holds as many jobs as it accepts."""
+
+
+class BoundedExecutor:
+    def __init__(
+        self, kind="thread", max_workers=4, max_queue=32, initializer=None, initargs=()
+    ):
+        """
+        Dedicated pool for CPU-bound inference with a hard cap on accepted work.
+        Use kind="thread" when the model code releases the GIL (NumPy, sklearn trees)
+        and kind="process" otherwise; process workers need a picklable function and
+        usually an `initializer` that loads the model once per worker. At most
+        `max_workers + max_queue` jobs are in flight; beyond that `run` fails fast
+        with QueueFullError instead of letting latency grow without bound.
+        """
+        if kind == "thread":
+            self.pool = ThreadPoolExecutor(
+                max_workers, initializer=initializer, initargs=initargs
+            )
+        elif kind == "process":
+            self.pool = ProcessPoolExecutor(
+                max_workers, initializer=initializer, initargs=initargs
+            )
+        else:
+            raise ValueError("kind must be either 'thread' or 'process'")
+        self.kind = kind
+        self.capacity = max_workers + max_queue
+        self.in_flight = 0  # Only touched from the event loop thread
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def run(self, fn, *args, timeout=None):
+        """
+        Run `fn(*args)` on the pool and await its result. Raises QueueFullError when
+        the executor is saturated and asyncio.TimeoutError when `timeout` seconds pass;
+        a job that has not started yet by then is cancelled. A job that is already
+        running keeps its slot until it finishes, so timed-out work still counts
+        against the capacity.
+        """
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise QueueFullError(f"{self.in_flight} jobs already in flight")
+        loop = asyncio.get_running_loop()
+        job = self.pool.submit(fn, *args)
+        self.in_flight += 1
+        job.add_done_callback(lambda _: self._release(loop))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(job), timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+
+    def _release(self, loop):
+        # Runs in whichever thread completes the job; hand the update to the loop
+        try:
+            loop.call_soon_threadsafe(self._finish)
+        except RuntimeError:
+            pass  # The loop is already closed and nothing reads the count any more
+
+    def _finish(self):
+        self.in_flight -= 1
+
+    def stats(self):
+        return {
+            "kind": self.kind,
+            "capacity": self.capacity,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,132 @@
+import os
+import pickle
+import threading
+
+from scripts.serving.tree_export import FlatEnsemble
+
+
+class HybridEnsemble:
+    def __init__(self, flat, load_model, max_flat_rows=256):
+        """
+        Serve small batches from the compiled FlatEnsemble and large ones from the
+        sklearn model: the lockstep NumPy traversal wins on latency for a few rows,
+        sklearn's compiled per-tree loop wins on throughput for thousands.
+        `load_model` returns the sklearn model and is only called for the first large
+        batch, so workers that never see one hold just the flat arrays.
+        """
+        self.flat = flat
+        self.load_model = load_model
+        self.max_flat_rows = max_flat_rows
+        self.classes_ = flat.classes_
+        self.n_features_in_ = flat.n_features_in_
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self.load_model()
+        return self._model
+
+    def _pick(self, X):
+        return self.flat if X.shape[0] <= self.max_flat_rows else self.model
+
+    def predict_proba(self, X):
+        return self._pick(X).predict_proba(X)
+
+    def predict(self, X):
+        return self._pick(X).predict(X)
+
+
+class ModelLoader:
+    def __init__(self, model_path, flat_dir=None, compile_model=True):
+        """
+        Load the serving model on first use instead of at import time. Prefers the
+        memory-mapped flat export in `flat_dir` when it exists and falls back to
+        unpickling `model_path` (which pulls in sklearn). With compile_model=True a
+        pickled tree ensemble is compiled into a FlatEnsemble for fast inference.
+        """
+        self.model_path = model_path
+        self.flat_dir = flat_dir
+        self.compile_model = compile_model
+        self.model = None
+        self.kind = None
+        self.version = None  # Changes whenever a different checkpoint is loaded
+        self.error = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.model is not None
+
+    def _unpickle(self):
+        with open(self.model_path, "rb") as f:
+            return pickle.load(f)
+
+    def _load(self):
+        if self.flat_dir and os.path.exists(os.path.join(self.flat_dir, "meta.json")):
+            self.kind = "flat"
+            source = os.path.join(self.flat_dir, "meta.json")
+            model = FlatEnsemble.load(self.flat_dir)
+        else:
+            self.kind = "pickle"
+            source = self.model_path
+            model = self._unpickle()
+            if self.compile_model:
+                try:
+                    # Drop the sklearn model once compiled; large batches reload it
+                    model = HybridEnsemble(
+                        FlatEnsemble.from_model(model), self._unpickle
+                    )
+                    self.kind = "compiled"
+                except ValueError as e:
+                    print(f"Serving the sklearn model directly: {e}")
+        self.version = f"{self.kind}:{os.stat(source).st_mtime_ns}"
+        return model
+
+    def get(self):
+        """Return the model, loading it if needed (concurrent callers wait for one load)."""
+        if self.model is None:
+            with self._lock:
+                if self.model is None:
+                    try:
+                        self.model = self._load()
+                        self.error = None
+                    except Exception as e:
+                        self.error = str(e)
+                        raise RuntimeError(f"Failed to load model: {e}")
+        return self.model
+
+    def start_background(self):
+        """Start loading in a daemon thread so startup returns immediately."""
+
+        def load():
+            try:
+                self.get()
+            except RuntimeError:
+                pass  # Reported through `error` and the readiness endpoint
+
+        threading.Thread(target=load, daemon=True).start()
+
+
+# Per-process model used by BoundedExecutor(kind="process") workers
+_worker_loader = None
+
+
+def init_worker(model_path, flat_dir=None, compile_model=True):
+    """Process pool initializer: load the model once in each worker."""
+    global _worker_loader
+    _worker_loader = ModelLoader(model_path, flat_dir, compile_model)
+    _worker_loader.get()
+
+
+def worker_predict(X):
+    """Picklable predict function for process pool workers."""
+    return _worker_loader.get().predict(X)
+
+
+def worker_predict_proba(X):
+    """Picklable predict_proba for process pool workers."""
+    return _worker_loader.get().predict_proba(X)
@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import pickle
+
+import numpy as np
+
+FORMAT_VERSION = 2
+ARRAYS = ["feature", "threshold", "left", "right", "missing_left", "value", "roots"]
+
+
+def flatten_trees(trees, normalize=True):
+    """
+    Concatenate fitted sklearn trees into flat node arrays. Child indices are global,
+    leaves have left == right == -1. With normalize=True `value` holds the class
+    fractions of each node (classification trees), otherwise the raw node values
+    (regression trees inside gradient boosting).
+    """
+    parts = {name: [] for name in ARRAYS}
+    offset = 0
+    max_depth = 0
+    for tree in trees:
+        tree = getattr(tree, "tree_", tree)
+        n_nodes = tree.node_count
+        is_leaf = tree.children_left == -1
+        value = tree.value[:, 0, :]
+        if normalize:
+            value = value / np.maximum(value.sum(axis=1, keepdims=True), 1e-300)
+
+        parts["feature"].append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        parts["threshold"].append(tree.threshold.astype(np.float64))
+        parts["left"].append(np.where(is_leaf, -1, tree.children_left + offset))
+        parts["right"].append(np.where(is_leaf, -1, tree.children_right + offset))
+        missing_left = getattr(tree, "missing_go_to_left", np.zeros(n_nodes))
+        parts["missing_left"].append(np.asarray(missing_left, dtype=bool))
+        parts["value"].append(value.astype(np.float64))
+        parts["roots"].append([offset])
+        offset += n_nodes
+        max_depth = max(max_depth, int(tree.max_depth))
+
+    arrays = {name: np.concatenate(chunks) for name, chunks in parts.items()}
+    arrays["left"] = arrays["left"].astype(np.int32)
+    arrays["right"] = arrays["right"].astype(np.int32)
+    arrays["roots"] = arrays["roots"].astype(np.int64)
+    return arrays, max_depth
+
+
+def compile_ensemble(model):
+    """
+    Turn a fitted DecisionTree, RandomForest/ExtraTrees or GradientBoosting classifier
+    into flat arrays plus metadata. Raises ValueError for any other model: ensembles
+    such as bagging (feature subsets per estimator) or AdaBoost (weighted votes) also
+    have `estimators_`, but averaging their trees would give wrong probabilities.
+    """
+    # Only reached with a fitted sklearn model, so importing sklearn here is free
+    from sklearn.ensemble import (
+        ExtraTreesClassifier,
+        GradientBoostingClassifier,
+        RandomForestClassifier,
+    )
+    from sklearn.tree import DecisionTreeClassifier
+
+    if not isinstance(
+        model,
+        (
+            DecisionTreeClassifier,
+            RandomForestClassifier,
+            ExtraTreesClassifier,
+            GradientBoostingClassifier,
+        ),
+    ):
+        raise ValueError(f"Cannot compile model of type {type(model).__name__}")
+    meta = {
+        "version": FORMAT_VERSION,
+        "n_features": int(model.n_features_in_),
+        "classes": np.asarray(model.classes_).tolist(),
+    }
+    estimators = getattr(model, "estimators_", None)
+
+    if isinstance(model, GradientBoostingClassifier):
+        # Gradient boosting: estimators_ is (n_stages, n_trees_per_stage) of regressors
+        loss = getattr(model, "loss", "log_loss")
+        if loss not in ("log_loss", "deviance"):
+            raise ValueError(f"Unsupported gradient boosting loss: {loss}")
+        if model.init not in (None, "zero"):
+            raise ValueError("Gradient boosting with a custom init estimator")
+        arrays, max_depth = flatten_trees(estimators.ravel(), normalize=False)
+        init_raw = model._raw_predict_init(np.zeros((1, model.n_features_in_)))[0]
+        meta.update(
+            kind="boosting",
+            learning_rate=float(model.learning_rate),
+            init_raw=np.asarray(init_raw, dtype=np.float64).tolist(),
+            trees_per_stage=int(estimators.shape[1]),
+        )
+    else:
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Multi-output forests are not supported")
+        arrays, max_depth = flatten_trees(estimators or [model], normalize=True)
+        meta.update(kind="forest")
+
+    meta.update(
+        n_trees=len(arrays["roots"]),
+        n_nodes=int(len(arrays["feature"])),
+        max_depth=max_depth,
+    )
+    return arrays, meta
+
+
+def export_ensemble(model, out_dir):
+    """Write a fitted tree ensemble as flat .npy arrays plus meta.json."""
+    arrays, meta = compile_ensemble(model)
+    FlatEnsemble(arrays, meta).save(out_dir)
+    print(f"Exported {meta['n_trees']} trees ({meta['n_nodes']} nodes) to {out_dir}.")
+    return meta
+
+
+def _sigmoid(x):
+    return np.exp(-np.logaddexp(0.0, -x))
+
+
+class FlatEnsemble:
+    def __init__(self, arrays, meta):
+        """
+        Tree ensemble evaluated from flat NumPy node arrays. All trees are walked in
+        lockstep for the whole batch: one gather per tree level instead of a Python
+        loop per tree. Exposes the predict / predict_proba / n_features_in_ /
+        classes_ subset of the sklearn API that the app uses, without importing sklearn.
+        """
+        self.meta = meta
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.classes_ = np.asarray(meta["classes"])
+        self.n_features_in_ = meta["n_features"]
+        self.max_depth = meta["max_depth"]
+        self._prepare_traversal()
+
+    def _prepare_traversal(self):
+        """
+        Derive the arrays used by `apply`: leaves point to themselves with an infinite
+        threshold, so a fixed number of steps needs no per-step leaf check, and both
+        children live in one interleaved array indexed by 2 * node + go_right.
+        """
+        n_nodes = len(self.feature)
+        is_leaf = np.asarray(self.left) < 0
+        own_index = np.arange(n_nodes)
+        children = np.empty((n_nodes, 2), dtype=np.intp)
+        children[:, 0] = np.where(is_leaf, own_index, self.left)
+        children[:, 1] = np.where(is_leaf, own_index, self.right)
+        self._children = children.ravel()
+        self._threshold = np.where(is_leaf, np.inf, self.threshold)
+        self._feature = np.asarray(self.feature, dtype=np.intp)
+        self._roots = np.asarray(self.roots, dtype=np.intp)
+
+    @classmethod
+    def from_model(cls, model):
+        """Compile a fitted sklearn ensemble in memory."""
+        return cls(*compile_ensemble(model))
+
+    @classmethod
+    def load(cls, model_dir, mmap=True):
+        """
+        Open an exported ensemble. With mmap=True the arrays are memory-mapped, so all
+        workers on a host share one page-cache copy of the model.
+        """
+        with open(os.path.join(model_dir, "meta.json")) as file:
+            meta = json.load(file)
+        if meta["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported model format version {meta['version']}")
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(model_dir, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAYS
+        }
+        return cls(arrays, meta)
+
+    def save(self, out_dir):
+        os.makedirs(out_dir, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(out_dir, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(out_dir, "meta.json"), "w") as file:
+            json.dump(self.meta, file, indent=2)
+
+    def apply(self, X):
+        """Leaf node index reached by every row in every tree, shape (n_rows, n_trees)."""
+        n_rows, n_features = X.shape
+        flat_X = np.ascontiguousarray(X).ravel()
+        row_offset = (np.arange(n_rows) * n_features)[:, np.newaxis]
+        node = np.repeat(self._roots[np.newaxis, :], n_rows, axis=0)
+        for _ in range(self.max_depth):
+            x = flat_X[row_offset + self._feature[node]]
+            go_right = ~(x <= self._threshold[node])
+            missing = np.isnan(x)
+            if missing.any():
+                go_right[missing] = ~self.missing_left[node[missing]]
+            node = self._children[2 * node + go_right]
+        return node
+
+    def _as_features(self, X):
+        if hasattr(X, "toarray"):
+            X = X.toarray()
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"expected rows of {self.n_features_in_} features, got shape {X.shape}"
+            )
+        return X
+
+    def decision_function(self, X):
+        """Raw boosting score(s) before the link function."""
+        if self.meta["kind"] != "boosting":
+            raise AttributeError("decision_function is only available for boosting")
+        leaves = self.apply(self._as_features(X))
+        values = self.value[leaves, 0].reshape(
+            leaves.shape[0], -1, self.meta["trees_per_stage"]
+        )
+        raw = self.meta["init_raw"] + self.meta["learning_rate"] * values.sum(axis=1)
+        return raw[:, 0] if raw.shape[1] == 1 else raw
+
+    def predict_proba(self, X):
+        if self.meta["kind"] == "forest":
+            return self.value[self.apply(self._as_features(X))].mean(axis=1)
+
+        raw = self.decision_function(X)
+        if raw.ndim == 1:
+            positive = _sigmoid(raw)
+            return np.column_stack([1.0 - positive, positive])
+        exp = np.exp(raw - raw.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export a pickled tree ensemble to the flat array format."
+    )
+    parser.add_argument("model_path")
+    parser.add_argument("out_dir")
+    args = parser.parse_args()
+
+    with open(args.model_path, "rb") as f:
+        export_ensemble(pickle.load(f), args.out_dir)
@@ -0,0 +1,302 @@
+import argparse
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import (
+    GridSearchCV,
+    HalvingGridSearchCV,
+    RandomizedSearchCV,
+)
+from sklearn.metrics import (
+    accuracy_score,
+    precision_score,
+    recall_score,
+    f1_score,
+    roc_auc_score,
+)
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+
+from scripts.feature_io import FeatureDataset, load_features
+
+MODELS = {
+    "Logistic Regression": LogisticRegression,
+    "Decision Tree": DecisionTreeClassifier,
+    "Random Forest": RandomForestClassifier,
+    "Gradient Boosting": GradientBoostingClassifier,
+}
+
+PARAM_GRIDS = {
+    "Logistic Regression": {"C": [0.01, 0.1, 1, 10], "max_iter": [1000]},
+    "Decision Tree": {"max_depth": [3, 5, 10, None], "min_samples_leaf": [1, 5, 20]},
+    "Random Forest": {"n_estimators": [50, 100, 200], "max_depth": [3, 5, 10]},
+    "Gradient Boosting": {
+        "n_estimators": [50, 100, 200],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [3, 5],
+    },
+}
+
+
+def evaluate_model(model, x_test, y_test):
+    """Compute the test metrics reported for every model."""
+    y_pred = model.predict(x_test)
+    y_prob = (
+        model.predict_proba(x_test)[:, 1] if hasattr(model, "predict_proba") else None
+    )
+    return {
+        "Accuracy": accuracy_score(y_test, y_pred),
+        "Precision": precision_score(y_test, y_pred, average="binary", zero_division=1),
+        "Recall": recall_score(y_test, y_pred, average="binary", zero_division=1),
+        "F1 Score": f1_score(y_test, y_pred, average="binary"),
+        "ROC-AUC": roc_auc_score(y_test, y_prob) if y_prob is not None else np.nan,
+    }
+
+
+def _load_split(split_dir, name):
+    """Open a split written by ModelTrainer.parallel_search; dense splits are memory-mapped."""
+    path = os.path.join(split_dir, name)
+    if os.path.exists(path + ".npz"):
+        return load_features(path + ".npz")
+    return np.load(path + ".npy", mmap_mode="r")
+
+
+def _search_model(name, param_grid, split_dir, scoring, cv, n_jobs, random_state):
+    """
+    Successive-halving grid search for one model, run inside a worker process.
+    The worker memory-maps the shared train/test files instead of receiving copies.
+    """
+    x_train = _load_split(split_dir, "x_train")
+    y_train = _load_split(split_dir, "y_train")
+    search = HalvingGridSearchCV(
+        MODELS[name](),
+        param_grid,
+        cv=cv,
+        scoring=scoring,
+        factor=3,
+        n_jobs=n_jobs,
+        random_state=random_state,
+    )
+    search.fit(x_train, y_train)
+    metrics = evaluate_model(
+        search.best_estimator_,
+        _load_split(split_dir, "x_test"),
+        _load_split(split_dir, "y_test"),
+    )
+    result = {
+        "Model": name,
+        "Best Params": search.best_params_,
+        "CV Score": search.best_score_,
+        **metrics,
+    }
+    return result, search.best_estimator_
+
+
+class ModelTrainer:
+    def __init__(self, x_path, y_path, test_size=0.2, random_state=42, shuffle=True):
+        """
+        Initializes the ModelTrainer class by memory-mapping the data and splitting it into training and test sets.
+        The split is kept as row indices; rows are only read when a split is first used.
+        """
+        self.dataset = FeatureDataset(x_path, y_path)
+        self.x, self.y = self.dataset.X, self.dataset.y
+        self.test_size = test_size
+        self.random_state = random_state
+        self.models = {name: model() for name, model in MODELS.items()}
+        self.train_index, self.test_index = self.dataset.split(
+            test_size=self.test_size, random_state=self.random_state, shuffle=shuffle
+        )
+        self._splits = {}
+        self.trained_models = {}
+        self.best_model = None
+        self.results = None
+
+    def _split(self, name):
+        if name not in self._splits:
+            index = self.train_index if name == "train" else self.test_index
+            self._splits[name] = self.dataset.subset(index)
+        return self._splits[name]
+
+    @property
+    def x_train(self):
+        return self._split("train")[0]
+
+    @property
+    def y_train(self):
+        return self._split("train")[1]
+
+    @property
+    def x_test(self):
+        return self._split("test")[0]
+
+    @property
+    def y_test(self):
+        return self._split("test")[1]
+
+    def train_models(self):
+        """Trains each model on the training dataset."""
+        for name, model in self.models.items():
+            model.fit(self.x_train, self.y_train)
+            self.trained_models[name] = model
+            print(f"Trained {name} model successfully.")
+
+    def hyperparameter_tuning(
+        self, model_name, param_grid, search_type="grid", n_iter=10
+    ):
+        """
+        Performs hyperparameter tuning using Grid Search or Random Search.
+        """
+        if model_name not in self.models:
+            raise ValueError(
+                "Model not found. Choose from: " + ", ".join(self.models.keys())
+            )
+
+        model = self.models[model_name]
+
+        if search_type == "grid":
+            search = GridSearchCV(
+                model, param_grid, cv=5, scoring="accuracy", n_jobs=-1
+            )
+        elif search_type == "random":
+            search = RandomizedSearchCV(
+                model,
+                param_grid,
+                n_iter=n_iter,
+                cv=5,
+                scoring="accuracy",
+                n_jobs=-1,
+                random_state=self.random_state,
+            )
+        else:
+            raise ValueError("Invalid search type. Use 'grid' or 'random'.")
+
+        search.fit(self.x_train, self.y_train)
+        self.trained_models[model_name] = search.best_estimator_
+        self.best_model = search.best_estimator_
+        print(f"Best parameters for {model_name}: {search.best_params_}")
+
+    def parallel_search(
+        self,
+        param_grids=None,
+        scoring="accuracy",
+        cv=5,
+        select_by="ROC-AUC",
+        n_workers=None,
+    ):
+        """
+        Tune all models concurrently, one process per model, with successive halving.
+        The train/test split is written once to a temporary directory, block by block
+        so the parent never holds a split in memory, and every worker memory-maps it
+        instead of receiving a copy. CPU cores are shared between the workers for their
+        cross-validation folds. Returns the results table and keeps the model with the
+        best `select_by` test metric as best_model.
+        """
+        param_grids = param_grids or PARAM_GRIDS
+        n_workers = n_workers or len(param_grids)
+        n_jobs = max(1, (os.cpu_count() or 1) // n_workers)
+
+        results = []
+        with tempfile.TemporaryDirectory() as split_dir:
+            suffix = ".npz" if sparse.issparse(self.x) else ".npy"
+            for split, index in [
+                ("train", self.train_index),
+                ("test", self.test_index),
+            ]:
+                self.dataset.save_subset(
+                    index,
+                    os.path.join(split_dir, f"x_{split}{suffix}"),
+                    os.path.join(split_dir, f"y_{split}.npy"),
+                )
+
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                futures = {
+                    executor.submit(
+                        _search_model,
+                        name,
+                        param_grid,
+                        split_dir,
+                        scoring,
+                        cv,
+                        n_jobs,
+                        self.random_state,
+                    ): name
+                    for name, param_grid in param_grids.items()
+                }
+                for future in as_completed(futures):
+                    name = futures[future]
+                    try:
+                        result, model = future.result()
+                    except Exception as e:
+                        print(f"Search for {name} failed: {e}")
+                        results.append({"Model": name, "Error": str(e)})
+                        continue
+                    self.trained_models[name] = model
+                    results.append(result)
+                    print(f"Best parameters for {name}: {result['Best Params']}")
+
+        self.results = pd.DataFrame(results)
+        if select_by in self.results and self.results[select_by].notna().any():
+            best_name = self.results.loc[self.results[select_by].idxmax(), "Model"]
+            self.best_model = self.trained_models[best_name]
+            print(f"Best model by {select_by}: {best_name}")
+        return self.results
+
+    def train_best_model(self):
+        """Trains the best model obtained from hyperparameter tuning on the full training dataset."""
+        if self.best_model is None:
+            print("No best model found. Perform hyperparameter tuning first.")
+            return
+
+        self.best_model.fit(self.x_train, self.y_train)
+        print("Best model trained successfully.")
+
+    def evaluate_models(self):
+        """Evaluates all trained models using the test dataset and prints performance metrics."""
+        results = []
+        for name, model in self.trained_models.items():
+            metrics = evaluate_model(model, self.x_test, self.y_test)
+            results.append({"Model": name, **metrics})
+
+            print(f"\n{name} Performance:")
+            for metric, value in metrics.items():
+                print(f"{metric}: {value:.4f}")
+
+        return pd.DataFrame(results)
+
+    def save_best_model(self, filename="best_model.pkl"):
+        """Serializes the best model and saves it to a file."""
+        if self.best_model is None:
+            print("No best model found. Perform hyperparameter tuning first.")
+            return
+
+        with open(filename, "wb") as file:
+            pickle.dump(self.best_model, file)
+        print(f"Best model saved as {filename}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Tune all models in parallel and save the best checkpoint."
+    )
+    parser.add_argument("--x-path", default="../data/processed/X_features.npy")
+    parser.add_argument("--y-path", default="../data/processed/y_labels.npy")
+    parser.add_argument("--out-dir", default="../checkpoints")
+    parser.add_argument("--scoring", default="accuracy")
+    parser.add_argument("--select-by", default="ROC-AUC")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    trainer = ModelTrainer(args.x_path, args.y_path)
+    results = trainer.parallel_search(
+        scoring=args.scoring, select_by=args.select_by, n_workers=args.workers
+    )
+    print(results)
+    results.to_csv(os.path.join(args.out_dir, "search_results.csv"), index=False)
+    trainer.save_best_model(os.path.join(args.out_dir, "best_model.pkl"))
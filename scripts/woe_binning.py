@@ -1,34 +1,444 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
 from sklearn.tree import DecisionTreeClassifier
 from scipy.stats import norm
 
+from scripts.rfms import build_rfms, rfms_frame
+
+
+class WoEBinner:
+    def __init__(self, max_bins=5, eps=1e-5):
+        """
+        Equal-frequency WoE binning and Information Value for many features at once.
+        Quantile edges for all columns come from one column-wise sort, rows are binned
+        by comparing against the edges of every column at once and good/bad counts for
+        every (feature, bin) pair come from a single bincount. Missing values get their
+        own bin.
+        """
+        self.max_bins = max_bins
+        self.eps = eps  # Smoothing so empty bins do not give infinite WoE
+        self.feature_names = None
+        self.edges = None  # (max_bins + 1, n_features) quantile edges
+        self.count = (
+            None  # (n_features, max_bins + 1) rows per bin, last bin is missing
+        )
+        self.bad = None  # (n_features, max_bins + 1) defaults per bin
+        self.woe = None
+        self.iv = None
+
+    def _as_array(self, X):
+        if isinstance(X, pd.DataFrame):
+            return X.columns.tolist(), X.to_numpy(dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        return [f"x{i}" for i in range(X.shape[1])], X
+
+    def _quantile_edges(self, X):
+        """Linear-interpolated quantiles per column from one sort (NaNs sort last)."""
+        # Sorting contiguous rows of the transpose is much faster than a strided column
+        # sort. Always a copy: X.T of a Fortran-ordered X is already contiguous, and
+        # sorting that view in place would reorder the caller's data.
+        ordered = np.array(X.T, order="C")
+        ordered.sort(axis=1)
+        n_valid = (~np.isnan(X)).sum(axis=0)
+        quantiles = np.linspace(0, 1, self.max_bins + 1)
+        position = np.maximum(n_valid - 1, 0)[:, np.newaxis] * quantiles
+        below = np.floor(position).astype(np.int64)
+        above = np.ceil(position).astype(np.int64)
+        lower = np.take_along_axis(ordered, below, axis=1)
+        upper = np.take_along_axis(ordered, above, axis=1)
+        return (lower + (upper - lower) * (position - below)).T
+
+    def _codes(self, X):
+        """Flat (feature, bin) index of every value; bins are right-closed like pd.qcut."""
+        codes = np.zeros(X.shape, dtype=np.int64)
+        with np.errstate(invalid="ignore"):
+            for edge in self.edges[1:-1]:
+                codes += X > edge
+        codes[np.isnan(X)] = self.max_bins
+        return codes + np.arange(X.shape[1]) * (self.max_bins + 1)
+
+    def fit(self, X, y):
+        """Fit quantile edges and WoE/IV for every column of X against binary y."""
+        self.feature_names, X = self._as_array(X)
+        self.edges = self._quantile_edges(X)
+        n_slots = X.shape[1] * (self.max_bins + 1)
+        self.count = np.zeros(n_slots)
+        self.bad = np.zeros(n_slots)
+        return self.partial_fit(X, y)
+
+    def partial_fit(self, X, y):
+        """Add a batch to the good/bad counts with the fitted edges and refresh WoE/IV."""
+        if self.edges is None:
+            return self.fit(X, y)
+        _, X = self._as_array(X)
+        codes = self._codes(X)
+        is_bad = np.asarray(y) == 1
+        self.count += np.bincount(codes.ravel(), minlength=self.count.size)
+        self.bad += np.bincount(codes[is_bad].ravel(), minlength=self.bad.size)
+        self._compute_woe()
+        return self
+
+    def _compute_woe(self):
+        shape = (len(self.feature_names), self.max_bins + 1)
+        count = self.count.reshape(shape)
+        bad = self.bad.reshape(shape)
+        good = count - bad
+        dist_good = good / np.maximum(good.sum(axis=1, keepdims=True), 1)
+        dist_bad = bad / np.maximum(bad.sum(axis=1, keepdims=True), 1)
+        self.woe = np.log((dist_good + self.eps) / (dist_bad + self.eps))
+        self.woe[count == 0] = 0.0
+        self.iv = ((dist_good - dist_bad) * self.woe).sum(axis=1)
+
+    def transform(self, X):
+        """Replace every value by the WoE of its bin."""
+        _, X = self._as_array(X)
+        return self.woe.ravel()[self._codes(X)]
+
+    def information_value(self):
+        """IV per feature, highest first."""
+        return pd.Series(self.iv, index=self.feature_names, name="iv").sort_values(
+            ascending=False
+        )
+
+    def woe_table(self):
+        """Long table with the edges, counts, WoE and IV contribution of every bin."""
+        n_features = len(self.feature_names)
+        missing = np.full((n_features, 1), np.nan)
+        lower = np.hstack([self.edges[:-1].T, missing])
+        upper = np.hstack([self.edges[1:].T, missing])
+        count = self.count.reshape(n_features, -1)
+        bad = self.bad.reshape(n_features, -1)
+        table = pd.DataFrame(
+            {
+                "feature": np.repeat(self.feature_names, self.max_bins + 1),
+                "bin": np.tile([*range(self.max_bins), "missing"], n_features).astype(
+                    str
+                ),
+                "lower": lower.ravel(),
+                "upper": upper.ravel(),
+                "count": count.ravel(),
+                "bad": bad.ravel(),
+                "good": (count - bad).ravel(),
+                "woe": self.woe.ravel(),
+            }
+        )
+        table["iv"] = np.repeat(self.iv, self.max_bins + 1)
+        return table[table["count"] > 0].reset_index(drop=True)
+
+
+def _woe_iv(good, bad, total_good, total_bad, eps):
+    """WoE and IV contribution of bins with the given good/bad counts."""
+    dist_good = good / max(total_good, 1)
+    dist_bad = bad / max(total_bad, 1)
+    woe = np.log((dist_good + eps) / (dist_bad + eps))
+    return woe, (dist_good - dist_bad) * woe
+
+
+def _monotonic_boundaries(
+    good_cum, bad_cum, totals, max_bins, min_count, increasing, eps
+):
+    """
+    Optimal grouping of n pre-bins into at most `max_bins` contiguous bins whose WoE
+    is strictly increasing (or decreasing), by dynamic programming over the
+    cumulative good/bad counts. best[k][j, i] is the highest IV of k + 1 valid bins
+    covering pre-bins [0, j) with the last bin [i, j); a bin [j, l) can follow it
+    when its WoE continues the trend. Every bin needs at least `min_count` rows.
+    Returns (IV, sorted inner boundary indices), or (-inf, None) if nothing is valid.
+    """
+    n = len(good_cum) - 1
+    good = good_cum[np.newaxis, :] - good_cum[:, np.newaxis]  # [i, j]: pre-bins i..j-1
+    bad = bad_cum[np.newaxis, :] - bad_cum[:, np.newaxis]
+    with np.errstate(invalid="ignore"):
+        woe, iv = _woe_iv(good, bad, *totals, eps)
+    valid = np.triu(np.ones((n + 1, n + 1), dtype=bool), 1) & (good + bad >= min_count)
+    iv = np.where(valid, iv, -np.inf)
+    # follows[j, i, l]: WoE of [i, j) then [j, l) keeps the monotonic direction
+    if increasing:
+        follows = woe.T[:, :, np.newaxis] < woe[:, np.newaxis, :]
+    else:
+        follows = woe.T[:, :, np.newaxis] > woe[:, np.newaxis, :]
+
+    best = [np.full((n + 1, n + 1), -np.inf)]
+    best[0][:, 0] = iv[0]
+    parents = [None]
+    for _ in range(1, max_bins):
+        candidates = np.where(follows, best[-1][:, :, np.newaxis], -np.inf)
+        start = candidates.argmax(axis=1)  # [j, l]: best start of the previous bin
+        value = np.take_along_axis(candidates, start[:, np.newaxis, :], axis=1)[:, 0]
+        best.append((value + iv).T)
+        parents.append(start.T)
+
+    final = np.array([b[n].max() for b in best])
+    n_cuts = int(final.argmax())
+    if not np.isfinite(final[n_cuts]):
+        return -np.inf, None
+    boundaries = []
+    end, start = n, int(best[n_cuts][n].argmax())
+    for k in range(n_cuts, 0, -1):
+        boundaries.append(start)
+        end, start = start, int(parents[k][end, start])
+    return float(final[n_cuts]), sorted(boundaries)
+
+
+def _fit_monotonic(x, y, max_bins, max_prebins, min_bin_size, monotonic, eps):
+    """
+    Bin one feature: equal-frequency pre-bins from one quantile pass, good/bad counts
+    per pre-bin from a bincount, then the best monotonic grouping of the pre-bins.
+    Returns the inner edges and the rows and defaults per final bin (missing last).
+    """
+    observed = ~np.isnan(x)
+    values, labels = x[observed], y[observed]
+    cuts = np.empty(0)
+    if len(values):
+        quantiles = np.linspace(0, 1, max_prebins + 1)[1:-1]
+        cuts = np.unique(np.quantile(values, quantiles))
+        cuts = cuts[cuts < values.max()]
+    # Right-closed pre-bins like pd.qcut: (-inf, c0], (c0, c1], ..., (c_last, inf)
+    codes = np.searchsorted(cuts, values, side="left")
+    count = np.bincount(codes, minlength=len(cuts) + 1).astype(np.float64)
+    bad = np.bincount(codes, weights=labels, minlength=len(cuts) + 1)
+    good_cum = np.concatenate([[0.0], np.cumsum(count - bad)])
+    bad_cum = np.concatenate([[0.0], np.cumsum(bad)])
+    totals = (len(y) - y.sum(), y.sum())
+    min_count = max(1, int(np.ceil(min_bin_size * len(values))))
+
+    directions = {"ascending": [True], "descending": [False], "auto": [True, False]}
+    best_iv, boundaries = -np.inf, None
+    for increasing in directions[monotonic]:
+        iv, found = _monotonic_boundaries(
+            good_cum, bad_cum, totals, max_bins, min_count, increasing, eps
+        )
+        if iv > best_iv:
+            best_iv, boundaries = iv, found
+    boundaries = np.asarray(boundaries or [], dtype=np.int64)
+
+    starts = np.concatenate([[0], boundaries])
+    bin_count = np.append(np.add.reduceat(count, starts), (~observed).sum())
+    bin_bad = np.append(np.add.reduceat(bad, starts), y[~observed].sum())
+    return cuts[boundaries - 1], bin_count, bin_bad
+
+
+def _fit_monotonic_columns(X, y, params):
+    """Worker task: fit every column of a block of features."""
+    return [_fit_monotonic(column, y, **params) for column in X.T]
+
+
+class MonotonicBinner:
+    def __init__(
+        self,
+        max_bins=5,
+        max_prebins=50,
+        min_bin_size=0.05,
+        monotonic="auto",
+        eps=1e-5,
+        n_jobs=None,
+    ):
+        """
+        Supervised binning that maximizes Information Value under a monotonic WoE
+        constraint. Each feature is cut into up to `max_prebins` equal-frequency
+        pre-bins with their good/bad counts, and a dynamic program over the cumulative
+        counts picks the grouping into at most `max_bins` bins (each holding at least
+        `min_bin_size` of the observed rows) with the highest IV and strictly
+        ascending or descending WoE ("auto" tries both). Missing values get their own
+        bin. Features are binned in parallel over `n_jobs` processes (all cores by
+        default). Same interface as WoEBinner, but every feature has its own edges.
+        """
+        if monotonic not in ("auto", "ascending", "descending"):
+            raise ValueError("monotonic must be 'auto', 'ascending' or 'descending'")
+        self.max_bins = max_bins
+        self.max_prebins = max_prebins
+        self.min_bin_size = min_bin_size
+        self.monotonic = monotonic
+        self.eps = eps
+        self.n_jobs = n_jobs
+        self.feature_names = None
+        self.edges = None  # Per feature: inner bin edges, bins are right-closed
+        self.count = None  # Per feature: rows per bin, last bin is missing
+        self.bad = None  # Per feature: defaults per bin
+        self.woe = None
+        self.iv = None
+
+    _as_array = WoEBinner._as_array
+
+    def fit(self, X, y):
+        """Find the bins of every column of X against binary y and their WoE/IV."""
+        self.feature_names, X = self._as_array(X)
+        y = (np.asarray(y) == 1).astype(np.float64)
+        params = {
+            "max_bins": self.max_bins,
+            "max_prebins": self.max_prebins,
+            "min_bin_size": self.min_bin_size,
+            "monotonic": self.monotonic,
+            "eps": self.eps,
+        }
+        n_jobs = min(self.n_jobs or os.cpu_count() or 1, X.shape[1])
+        if n_jobs <= 1:
+            results = _fit_monotonic_columns(X, y, params)
+        else:
+            # A few blocks per worker balance the load without one task per feature
+            blocks = np.array_split(np.arange(X.shape[1]), 4 * n_jobs)
+            with ProcessPoolExecutor(n_jobs) as executor:
+                futures = [
+                    executor.submit(_fit_monotonic_columns, X[:, block], y, params)
+                    for block in blocks
+                    if len(block)
+                ]
+                results = [result for f in futures for result in f.result()]
+
+        self.edges = [edges for edges, _, _ in results]
+        self.count = [count for _, count, _ in results]
+        self.bad = [bad for _, _, bad in results]
+        self.woe, iv = [], []
+        for count, bad in zip(self.count, self.bad):
+            good = count - bad
+            woe, contribution = _woe_iv(good, bad, good.sum(), bad.sum(), self.eps)
+            woe[count == 0] = 0.0  # Empty missing bin; its IV contribution is 0 anyway
+            self.woe.append(woe)
+            iv.append(contribution.sum())
+        self.iv = np.asarray(iv)
+        return self
+
+    def _codes(self, X):
+        codes = np.empty(X.shape, dtype=np.int64)
+        for f, edges in enumerate(self.edges):
+            codes[:, f] = np.searchsorted(edges, X[:, f], side="left")
+            codes[np.isnan(X[:, f]), f] = len(edges) + 1
+        return codes
+
+    def transform(self, X):
+        """Replace every value by the WoE of its bin."""
+        _, X = self._as_array(X)
+        codes = self._codes(X)
+        result = np.empty(X.shape)
+        for f, woe in enumerate(self.woe):
+            result[:, f] = woe[codes[:, f]]
+        return result
+
+    information_value = WoEBinner.information_value
+
+    def woe_table(self):
+        """Long table with the edges, counts, WoE and IV contribution of every bin."""
+        tables = []
+        for name, edges, count, bad, woe, iv in zip(
+            self.feature_names, self.edges, self.count, self.bad, self.woe, self.iv
+        ):
+            n_bins = len(edges) + 1
+            tables.append(
+                pd.DataFrame(
+                    {
+                        "feature": name,
+                        "bin": [*map(str, range(n_bins)), "missing"],
+                        "lower": [-np.inf, *edges, np.nan],
+                        "upper": [*edges, np.inf, np.nan],
+                        "count": count,
+                        "bad": bad,
+                        "good": count - bad,
+                        "woe": woe,
+                        "iv": iv,
+                    }
+                )
+            )
+        table = pd.concat(tables, ignore_index=True)
+        return table[table["count"] > 0].reset_index(drop=True)
+
 
 class DefaultEstimator:
-    def __init__(self, threshold=0.5, max_bins=5):
+    def __init__(self, threshold=0.5, max_bins=5, binning="quantile", n_jobs=None):
+        if binning not in ("quantile", "monotonic"):
+            raise ValueError("binning must be either 'quantile' or 'monotonic'")
         self.threshold = threshold  # Decision boundary for good/bad classification
         self.max_bins = max_bins  # Number of bins for WoE binning
+        # "quantile": equal-frequency bins; "monotonic": IV-optimal bins with monotonic WoE
+        self.binning = binning
+        self.n_jobs = n_jobs  # Processes for monotonic binning of many features
         self.model = DecisionTreeClassifier(max_depth=3)  # Proxy estimator
+        self.bins = None  # Fitted WoE bins and their running counts
+        self.bin_edges = None
+        self.bin_count = None
+        self.bin_default = None
+        self.woe_binner = None  # Per-feature WoE/IV engine
 
     def fit_rfms(self, X):
         """Fit a decision tree classifier to estimate default risk based on RFMS variables."""
         self.model.fit(X, (X.mean(axis=1) < self.threshold).astype(int))
 
+    def fit_transactions(self, df, snapshot_date=None):
+        """
+        Build normalized RFMS scores per customer from raw transactions (see
+        scripts/rfms.py), fit the proxy estimator on them and return the scores with
+        the Good/Bad label of every customer.
+        """
+        customer_ids, X = build_rfms(df, snapshot_date)
+        self.fit_rfms(X)
+        result = rfms_frame(customer_ids, X)
+        result["Label"] = self.assign_labels(X)
+        return result
+
     def predict_risk(self, X):
         """Predict the default risk category based on RFMS scores."""
         return self.model.predict(X)
 
     def assign_labels(self, X):
         """Assign labels to users based on RFMS scores."""
-        return ["Bad" if score < self.threshold else "Good" for score in X.mean(axis=1)]
+        return np.where(np.asarray(X.mean(axis=1)) < self.threshold, "Bad", "Good")
 
     def compute_woe(self, X, y):
         """Compute Weight of Evidence (WoE) for binning."""
-        df = pd.DataFrame({"score": X.mean(axis=1), "default": y})
-        df["bin"] = pd.qcut(df["score"], self.max_bins, duplicates="drop")
+        score = np.asarray(X.mean(axis=1), dtype=np.float64)
+        if self.binning == "monotonic":
+            binner = MonotonicBinner(self.max_bins, n_jobs=1).fit(score[:, None], y)
+            self.bin_edges = np.concatenate(
+                [[np.nanmin(score)], binner.edges[0], [np.nanmax(score)]]
+            )
+            self.bins = pd.IntervalIndex.from_breaks(self.bin_edges)
+            codes = np.searchsorted(self.bin_edges[1:-1], score, side="left")
+            bins = pd.Categorical.from_codes(
+                np.where(np.isnan(score), -1, codes), self.bins
+            )
+        else:
+            bins, self.bin_edges = pd.qcut(
+                score, self.max_bins, duplicates="drop", retbins=True
+            )
+            self.bins = bins.categories
+
+        # Keep per-bin counts so later deltas can be folded in with update_woe
+        self.bin_count = np.zeros(len(self.bins))
+        self.bin_default = np.zeros(len(self.bins))
+        self._add_to_bins(bins.codes, np.asarray(y, dtype=np.float64))
+        return self._woe_table()
 
-        # Compute WoE for each bin
-        bin_stats = df.groupby("bin")["default"].agg(["count", "sum"])
+    def update_woe(self, X, y):
+        """
+        Fold a batch of new observations into the WoE statistics computed by compute_woe.
+        Bin edges stay fixed, so the result equals a full recompute with the same edges;
+        scores outside the fitted range go to the first or last bin.
+        """
+        if self.bins is None:
+            raise ValueError("Call compute_woe before update_woe.")
+        score = np.asarray(X.mean(axis=1), dtype=np.float64)
+        codes = np.searchsorted(self.bin_edges[1:-1], score, side="left")
+        codes[np.isnan(score)] = -1
+        self._add_to_bins(codes, np.asarray(y, dtype=np.float64))
+        return self._woe_table()
+
+    def _add_to_bins(self, codes, y):
+        observed = codes >= 0
+        n_bins = len(self.bins)
+        self.bin_count += np.bincount(codes[observed], minlength=n_bins)
+        self.bin_default += np.bincount(
+            codes[observed], weights=y[observed], minlength=n_bins
+        )
+
+    def _woe_table(self):
+        """WoE per bin from the accumulated counts."""
+        bin_stats = pd.DataFrame(
+            {"count": self.bin_count, "sum": self.bin_default},
+            index=pd.CategoricalIndex(self.bins, name="bin"),
+        )
+        bin_stats = bin_stats[bin_stats["count"] > 0]
         bin_stats["non_default"] = bin_stats["count"] - bin_stats["sum"]
         bin_stats["bad_rate"] = bin_stats["sum"] / bin_stats["count"]
         bin_stats["good_rate"] = bin_stats["non_default"] / bin_stats["count"]
@@ -40,7 +450,21 @@ class DefaultEstimator:
 
     def transform(self, X):
         """Transform RFMS scores into WoE bins."""
-        labels = self.assign_labels(X)
-        y = [1 if label == "Bad" else 0 for label in labels]
+        y = (np.asarray(X.mean(axis=1)) < self.threshold).astype(int)
         woe_bins = self.compute_woe(X, y)
         return woe_bins
+
+    def fit_woe(self, X, y):
+        """Fit WoE bins for every feature column and return their Information Value."""
+        if self.binning == "monotonic":
+            self.woe_binner = MonotonicBinner(self.max_bins, n_jobs=self.n_jobs)
+        else:
+            self.woe_binner = WoEBinner(max_bins=self.max_bins)
+        self.woe_binner.fit(X, y)
+        return self.woe_binner.information_value()
+
+    def transform_woe(self, X):
+        """Map every feature of X to the WoE of its fitted bin."""
+        if self.woe_binner is None:
+            raise ValueError("Call fit_woe before transform_woe.")
+        return self.woe_binner.transform(X)
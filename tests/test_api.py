@@ -0,0 +1,246 @@
+import asyncio
+import pickle
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import RandomForestClassifier
+
+import app.main as main
+from scripts.feature_engineer import FeatureEngineering
+from scripts.feature_transform import FeatureTransformer
+from scripts.serving.cache import PredictionCache, SQLiteStore
+from scripts.serving.model_loader import ModelLoader
+from tests.transactions import engineer_features, make_transactions
+
+N_FEATURES = 6
+
+
+@pytest.fixture(scope="module")
+def client():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, N_FEATURES))
+    model = RandomForestClassifier(n_estimators=5, random_state=0)
+    model.fit(X, (X[:, 0] > 0).astype(int))
+    main.models.model = model
+    main.models.kind = "test"
+    main.models.version = "test"
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_predict_batch(client):
+    response = client.post("/predict/batch", json={"records": [[0.5] * N_FEATURES] * 3})
+    assert response.status_code == 200
+    assert len(response.json()["prediction"]) == 3
+
+
+@pytest.mark.parametrize(
+    "records",
+    [[], [[0.0] * (N_FEATURES - 1)], [[0.0] * N_FEATURES, [0.0] * (N_FEATURES + 1)]],
+    ids=["empty", "wrong-width", "ragged"],
+)
+def test_predict_batch_rejects_bad_shapes(client, records):
+    response = client.post("/predict/batch", json={"records": records})
+    assert response.status_code == 422
+
+
+def test_predict_rejects_wrong_width(client):
+    response = client.post("/predict", json={"features": [1.0, 2.0]})
+    assert response.status_code == 422
+
+
+def test_predict_batch_sparse_matches_dense(client):
+    dense = [[0.0, 1.5, 0.0, 0.0, -2.0, 0.0], [0.0] * N_FEATURES]
+    sparse_input = {"indices": [[1, 4], []], "values": [[1.5, -2.0], []]}
+    response = client.post("/predict/batch/sparse", json=sparse_input)
+    assert response.status_code == 200
+    expected = client.post("/predict/batch", json={"records": dense}).json()
+    assert response.json() == expected
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"indices": [[500]], "values": [[1.0]]},
+        {"indices": [[N_FEATURES]], "values": [[1.0]]},
+        {"indices": [[-1]], "values": [[1.0]]},
+        {"indices": [[0], [1, 2]], "values": [[1.0], [1.0]]},
+        {"indices": [[0, 1]], "values": [[1.0], [1.0]]},
+        {"indices": [], "values": []},
+    ],
+    ids=["far", "just-past-end", "negative", "row-lengths", "row-count", "empty"],
+)
+def test_predict_batch_sparse_rejects_bad_indices(client, payload):
+    response = client.post("/predict/batch/sparse", json=payload)
+    assert response.status_code == 422
+
+
+def test_shared_cache_store_is_queried_off_the_event_loop(
+    client, tmp_path, monkeypatch
+):
+    store = SQLiteStore(str(tmp_path / "cache.db"))
+    threads = []
+
+    def record(method):
+        def wrapper(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                threads.append("event loop")
+            except RuntimeError:
+                threads.append("worker")
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(store, "get_many", record(store.get_many))
+    monkeypatch.setattr(store, "put_many", record(store.put_many))
+    monkeypatch.setattr(store, "purge", record(store.purge))
+    monkeypatch.setattr(main, "prediction_cache", PredictionCache(100, 60.0, store))
+
+    records = {"records": [[0.25] * N_FEATURES, [0.75] * N_FEATURES]}
+    first = client.post("/predict/batch", json=records)
+    second = client.post("/predict/batch", json=records)
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    assert threads and set(threads) == {"worker"}
+    assert main.prediction_cache.hits == 2
+
+
+@pytest.fixture()
+def transaction_model(client, monkeypatch):
+    df = make_transactions(n_rows=400, seed=4)
+    fe = FeatureEngineering(df, "FraudResult")
+    X = engineer_features(fe).to_numpy(dtype=np.float64)
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0)
+    model.fit(X, df["FraudResult"])
+    transformer = FeatureTransformer.from_feature_engineering(fe)
+    monkeypatch.setattr(main.models, "model", model)
+    monkeypatch.setattr(main, "_transformer", transformer)
+    monkeypatch.setattr(main, "prediction_cache", None)
+    fields = main.Transaction.__annotations__
+    records = [
+        {k: v for k, v in r.items() if k in fields} for r in df.to_dict("records")
+    ]
+    return records, transformer, model
+
+
+def test_predict_transaction(client, transaction_model):
+    records, transformer, model = transaction_model
+    record = records[0]
+    unknown = {**record, "ProviderId": "ProviderId_999", "CustomerId": "CustomerId_x"}
+    for payload in (record, unknown):
+        response = client.post("/predict/transaction", json=payload)
+        assert response.status_code == 200
+        expected = model.predict(transformer.transform_record(payload)[np.newaxis])
+        assert response.json() == {"prediction": expected.tolist()}
+
+
+def test_predict_transaction_rejects_bad_timestamps(client, transaction_model):
+    records, _, _ = transaction_model
+    payload = {**records[0], "TransactionStartTime": "yesterday"}
+    response = client.post("/predict/transaction", json=payload)
+    assert response.status_code == 422
+
+
+def test_predict_transaction_needs_the_feature_transform(client, monkeypatch):
+    monkeypatch.setattr(main, "_transformer", None)
+    monkeypatch.setattr(main, "TRANSFORM_PATH", "/nonexistent/feature_transform.pkl")
+    payload = {
+        "CustomerId": "CustomerId_1",
+        "ProviderId": "ProviderId_1",
+        "ProductId": "ProductId_1",
+        "ProductCategory": "airtime",
+        "ChannelId": "ChannelId_1",
+        "PricingStrategy": 2,
+        "Amount": 1000.0,
+        "Value": 1000.0,
+        "TransactionStartTime": "2018-11-15T02:18:49Z",
+    }
+    assert client.post("/predict/transaction", json=payload).status_code == 503
+
+
+def test_ready_reports_the_lazy_load(client, monkeypatch, tmp_path):
+    path = tmp_path / "model.pkl"
+    with open(path, "wb") as f:
+        pickle.dump(main.models.model, f)
+    loader = ModelLoader(str(path))
+    monkeypatch.setattr(main, "models", loader)
+
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Model is loading"
+    assert (
+        client.post("/predict", json={"features": [0.0] * N_FEATURES}).status_code
+        == 503
+    )
+
+    loader.start_background()
+    deadline = time.monotonic() + 10.0
+    while not loader.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+    assert response.json()["model"] == "compiled"
+
+
+def test_ready_reports_a_failed_load(client, monkeypatch, tmp_path):
+    loader = ModelLoader(str(tmp_path / "missing.pkl"))
+    monkeypatch.setattr(main, "models", loader)
+    loader.start_background()
+    deadline = time.monotonic() + 10.0
+    while loader.error is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert "missing.pkl" in response.json()["detail"]
+
+
+def test_cache_invalidate_endpoint(client, monkeypatch):
+    cache = PredictionCache(100, 60.0)
+    monkeypatch.setattr(main, "prediction_cache", cache)
+    records = {"records": [[0.1] * N_FEATURES, [0.9] * N_FEATURES]}
+
+    first = client.post("/predict/batch", json=records)
+    assert client.get("/metrics/cache").json()["size"] == 2
+    assert client.post("/predict/batch", json=records).json() == first.json()
+    assert cache.hits == 2
+
+    response = client.post("/cache/invalidate")
+    assert response.json() == {"invalidated": True}
+    assert client.get("/metrics/cache").json()["size"] == 0
+    client.post("/predict/batch", json=records)
+    assert cache.misses == 4
+
+
+def test_cache_follows_the_model_version(client, monkeypatch):
+    cache = PredictionCache(100, 60.0)
+    monkeypatch.setattr(main, "prediction_cache", cache)
+    records = {"records": [[0.3] * N_FEATURES]}
+    client.post("/predict/batch", json=records)
+    assert cache.version == main.models.version
+
+    monkeypatch.setattr(main.models, "version", "reloaded")
+    client.post("/predict/batch", json=records)
+    assert cache.version == "reloaded"
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_score_matches_the_scorecard(client):
+    rng = np.random.default_rng(5)
+    X = rng.normal(size=(8, N_FEATURES))
+    response = client.post("/score", json={"records": X.tolist()})
+    assert response.status_code == 200
+
+    model = main.models.model
+    proba = model.predict_proba(X)[:, list(model.classes_).index(1)]
+    expected = main.scorecard.score_portfolio(proba)
+    body = response.json()
+    assert set(body) == set(expected)
+    np.testing.assert_allclose(body["probability"], expected["probability"])
+    assert body["score"] == expected["score"].tolist()
+    assert body["grade"] == expected["grade"].tolist()
+    assert body["loan_amount"] == expected["loan_amount"].tolist()
+    assert body["loan_duration"] == expected["loan_duration"].tolist()
@@ -0,0 +1,69 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from scripts.batch_score import score_file
+from scripts.data_io import write_transactions
+from scripts.feature_engineer import FeatureEngineering
+from scripts.feature_transform import FeatureTransformer
+from scripts.scorecard import Scorecard
+from tests.transactions import engineer_features, make_transactions
+
+
+@pytest.fixture(scope="module")
+def artifacts(tmp_path_factory):
+    tmp_path = tmp_path_factory.mktemp("artifacts")
+    df = make_transactions(n_rows=400, seed=3)
+    fe = FeatureEngineering(df, "FraudResult")
+    X = engineer_features(fe)
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0)
+    model.fit(X.values, df["FraudResult"])
+    transform_path = str(tmp_path / "feature_transform.pkl")
+    model_path = str(tmp_path / "model.pkl")
+    FeatureTransformer.from_feature_engineering(fe).save(transform_path)
+    with open(model_path, "wb") as f:
+        pickle.dump(model, f)
+    return transform_path, model_path, model, X.values
+
+
+def write_input(df, tmp_path, storage):
+    if storage == "csv":
+        path = tmp_path / "transactions.csv"
+        df.to_csv(path, index=False)
+    elif storage == "parquet":
+        path = tmp_path / "transactions.parquet"
+        df.to_parquet(path, index=False)
+    else:
+        path = tmp_path / "transactions"
+        write_transactions(df, path)
+    return str(path)
+
+
+@pytest.mark.parametrize("storage", ["csv", "parquet", "dataset"])
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_score_file_scores_every_row_in_order(artifacts, tmp_path, storage, n_workers):
+    transform_path, model_path, model, X = artifacts
+    # Rescore the training transactions so the expected output is known
+    df = make_transactions(n_rows=400, seed=3)
+    output_path = str(tmp_path / "scores.csv")
+    n_rows = score_file(
+        write_input(df, tmp_path, storage),
+        output_path,
+        transform_path,
+        model_path,
+        chunksize=64,
+        n_workers=n_workers,
+    )
+
+    scores = pd.read_csv(output_path)
+    assert n_rows == len(scores) == len(df)
+    assert scores["TransactionId"].tolist() == df["TransactionId"].tolist()
+    assert scores["CustomerId"].tolist() == df["CustomerId"].tolist()
+    proba = model.predict_proba(X)[:, 1]
+    np.testing.assert_array_equal(scores["prediction"], model.predict(X))
+    np.testing.assert_allclose(
+        scores["score"], Scorecard().score_portfolio(proba)["score"]
+    )
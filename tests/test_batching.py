@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from scripts.serving.batching import MicroBatcher
+from scripts.serving.executor import BoundedExecutor, QueueFullError
+
+
+class SlowModel:
+    """Sums each row after sleeping `delay` seconds per call; records batch sizes."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batches = []
+
+    def __call__(self, X):
+        time.sleep(self.delay)
+        self.batches.append(len(X))
+        return X.sum(axis=1)
+
+
+async def with_batcher(batcher, body):
+    await batcher.start()
+    try:
+        return await body()
+    finally:
+        await batcher.stop()
+
+
+def submit_all(batcher, n_rows, timeout=None, drain=0.0):
+    async def body():
+        calls = [
+            asyncio.wait_for(batcher.submit(np.full((1, 3), float(i))), timeout)
+            for i in range(n_rows)
+        ]
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        await asyncio.sleep(drain)  # Let the batcher work through what is left
+        return results
+
+    return asyncio.run(with_batcher(batcher, body))
+
+
+def test_concurrent_rows_are_coalesced():
+    model = SlowModel()
+    results = submit_all(MicroBatcher(model, max_batch_size=8, max_wait_ms=20), 20)
+    assert results == [3.0 * i for i in range(20)]
+    assert sum(model.batches) == 20
+    assert len(model.batches) < 20
+
+
+def test_full_queue_is_rejected():
+    model = SlowModel(delay=0.05)
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait_ms=1, max_queue=8)
+    results = submit_all(batcher, 50)
+    rejected = [r for r in results if isinstance(r, QueueFullError)]
+    assert rejected
+    assert batcher.stats.rejected == len(rejected)
+    assert sum(model.batches) == 50 - len(rejected)
+
+
+def test_rows_of_timed_out_requests_are_not_computed():
+    model = SlowModel(delay=0.1)
+    batcher = MicroBatcher(model, max_batch_size=2, max_wait_ms=1, max_queue=100)
+    results = submit_all(batcher, 20, timeout=0.15, drain=0.3)
+    answered = [r for r in results if not isinstance(r, Exception)]
+    timed_out = [r for r in results if isinstance(r, asyncio.TimeoutError)]
+    assert timed_out
+    assert batcher.stats.skipped > 0
+    assert sum(model.batches) < 20
+    assert sum(model.batches) + batcher.stats.skipped == 20
+    assert len(answered) <= sum(model.batches)
+
+
+def test_batches_run_concurrently_up_to_max_in_flight():
+    executor = BoundedExecutor("thread", max_workers=4, max_queue=0)
+    model = SlowModel(delay=0.2)
+    batcher = MicroBatcher(
+        model, max_batch_size=1, max_wait_ms=1, executor=executor, max_in_flight=4
+    )
+    start = time.perf_counter()
+    results = submit_all(batcher, 4)
+    elapsed = time.perf_counter() - start
+    executor.shutdown()
+    assert results == [0.0, 3.0, 6.0, 9.0]
+    assert elapsed < 0.6
+
+
+def test_inference_time_is_reported_per_batch():
+    observed = []
+    model = SlowModel(delay=0.01)
+    batcher = MicroBatcher(model, max_wait_ms=5, on_inference=observed.append)
+    submit_all(batcher, 10)
+    assert len(observed) == len(model.batches)
+    assert all(seconds >= 0.01 for seconds in observed)
+
+
+def test_burst_is_shed_instead_of_timing_out():
+    # 3000 concurrent rows against a small executor: most are shed with 503-style
+    # QueueFullError right away instead of all waiting out their deadline
+    executor = BoundedExecutor("thread", max_workers=1, max_queue=4)
+    model = SlowModel(delay=0.005)
+    batcher = MicroBatcher(
+        model,
+        max_batch_size=64,
+        max_wait_ms=5,
+        executor=executor,
+        max_queue=64 * 5,
+        max_in_flight=1,
+    )
+    results = submit_all(batcher, 3000, timeout=1.0)
+    executor.shutdown()
+    rejected = sum(isinstance(r, QueueFullError) for r in results)
+    answered = sum(not isinstance(r, Exception) for r in results)
+    assert rejected >= 3000 - 64 * 5
+    assert answered > 0
+    assert sum(model.batches) <= 3000 - rejected
+
+
+def test_batch_failure_is_propagated():
+    def broken(X):
+        raise RuntimeError("model failed")
+
+    results = submit_all(MicroBatcher(broken), 3)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.parametrize("max_in_flight", [1, 3])
+def test_stop_cancels_cleanly(max_in_flight):
+    batcher = MicroBatcher(SlowModel(), max_in_flight=max_in_flight)
+
+    async def body():
+        await batcher.start()
+        await batcher.stop()
+        return batcher.worker
+
+    assert asyncio.run(body()) is None
+
+
+def test_stop_survives_a_swallowed_cancellation():
+    # wait_for can lose a cancellation that races with the queue (Python < 3.12);
+    # stop() must still finish instead of waiting on the worker forever
+    batcher = MicroBatcher(SlowModel())
+
+    async def stubborn():
+        try:
+            await asyncio.sleep(3600)
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(3600)
+
+    async def body():
+        await batcher.start()
+        batcher.worker.cancel()
+        batcher.worker = asyncio.create_task(stubborn())
+        await asyncio.sleep(0)
+        await asyncio.wait_for(batcher.stop(), 5)
+        return batcher.worker
+
+    assert asyncio.run(body()) is None
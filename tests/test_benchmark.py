@@ -0,0 +1,84 @@
+import copy
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from scripts.benchmark import (
+    compare_to_baseline,
+    load_baseline,
+    run_suite,
+    save_baseline,
+)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def suite():
+    return run_suite(
+        n_rows=2_000,
+        stages=["feature_engineering", "outliers", "woe", "predict"],
+        repeat=1,
+        model_path=os.path.join(ROOT, "missing_model.pkl"),
+    )
+
+
+def test_suite_measures_every_stage(suite):
+    assert suite["config"]["rows"] == 2_000
+    assert suite["results"]["predict"] is None  # No model to serve
+    for stage in ["feature_engineering", "outliers", "woe"]:
+        result = suite["results"][stage]
+        assert result["wall_s"] > 0
+        assert result["peak_mb"] >= 0
+        assert result["items_per_s"] > 0
+
+
+def test_same_run_does_not_regress(suite, tmp_path):
+    path = str(tmp_path / "baseline.json")
+    save_baseline(suite, path)
+    comparison = compare_to_baseline(suite, load_baseline(path))
+    assert sorted(comparison["stage"].unique()) == [
+        "feature_engineering",
+        "outliers",
+        "woe",
+    ]
+    assert set(comparison["metric"]) == {"wall_s", "peak_mb"}
+    assert (comparison["ratio"] == 1.0).all()
+    assert not comparison["regressed"].any()
+
+
+def test_slower_run_is_flagged(suite):
+    baseline = copy.deepcopy(suite)
+    baseline["results"]["outliers"]["wall_s"] = (
+        suite["results"]["outliers"]["wall_s"] / 2
+    )
+    # Within the tolerance is not a regression
+    baseline["results"]["woe"]["peak_mb"] = suite["results"]["woe"]["peak_mb"] / 1.1
+    comparison = compare_to_baseline(suite, baseline, tolerance=0.2)
+
+    regressed = comparison[comparison["regressed"]]
+    assert regressed[["stage", "metric"]].values.tolist() == [["outliers", "wall_s"]]
+    assert regressed["ratio"].iloc[0] == pytest.approx(2.0, abs=1e-3)
+
+
+def test_baselines_of_other_sizes_are_rejected(suite):
+    baseline = copy.deepcopy(suite)
+    baseline["config"]["rows"] = 100_000
+    with pytest.raises(ValueError, match="Baseline was recorded with"):
+        compare_to_baseline(suite, baseline)
+
+
+def test_cli_exits_nonzero_on_a_regression(suite, tmp_path):
+    baseline = copy.deepcopy(suite)
+    baseline["results"] = {"outliers": {"wall_s": 1e-9, "peak_mb": 1e-9}}
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(baseline))
+
+    command = [sys.executable, "-m", "scripts.benchmark", "suite", "--rows", "2000"]
+    command += ["--stages", "outliers", "--repeat", "1", "--baseline", str(path)]
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 1, result.stderr
+    assert "outliers" in result.stdout
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+import scripts.serving.cache as cache_module
+from scripts.serving.cache import (
+    PredictionCache,
+    SQLiteStore,
+    feature_key,
+    feature_keys,
+)
+
+
+class Clock:
+    """Stand-in for the time module with a manually advanced time()."""
+
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def test_keys_are_canonical():
+    a, b = feature_keys([[0.0, np.nan, 1.0], [-0.0, float("nan"), 1.0]])
+    assert a == b
+    assert feature_key([0.0, np.nan, 1.0]) == a
+    assert feature_key([0.0, np.nan, 1.0], "predict_proba") != a
+    assert feature_key([0.0, np.nan, 2.0]) != a
+
+
+def test_lru_eviction_at_capacity(clock):
+    cache = PredictionCache(max_entries=3, ttl=60.0)
+    cache.put_many(["a", "b", "c"], [1, 2, 3])
+    assert cache.get_many(["a"]) == [1]  # "a" is now the most recently used
+    cache.put_many(["d"], [4])
+
+    assert len(cache) == 3
+    assert cache.get_many(["a", "b", "c", "d"]) == [1, None, 3, 4]
+    assert cache.stats()["evictions"] == 1
+    assert (cache.hits, cache.misses) == (4, 1)
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = PredictionCache(ttl=10.0)
+    cache.put_many(["a"], [1])
+    clock.now += 9.9
+    cache.put_many(["b"], [2])
+    assert cache.get_many(["a", "b"]) == [1, 2]
+    clock.now += 0.1
+    assert cache.get_many(["a", "b"]) == [None, 2]
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 1
+
+
+def test_a_new_model_version_invalidates_entries(clock):
+    cache = PredictionCache()
+    cache.set_version("v1")
+    cache.put_many(["a"], [1])
+    cache.set_version("v1")
+    assert cache.get_many(["a"]) == [1]
+    cache.set_version("v2")
+    assert cache.version == "v2"
+    assert cache.get_many(["a"]) == [None]
+
+
+def test_sqlite_store_is_shared_between_caches(clock, tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = PredictionCache(ttl=30.0, store=SQLiteStore(path))
+    second = PredictionCache(ttl=30.0, store=SQLiteStore(path))
+    first.set_version("v1")
+    second.set_version("v1")
+
+    keys = feature_keys(np.eye(3))
+    first.put_many(keys, [np.array([0.2, 0.8]), np.array([0.5, 0.5]), 1])
+    values = second.get_many(keys)
+    np.testing.assert_array_equal(values[0], [0.2, 0.8])
+    np.testing.assert_array_equal(values[1], [0.5, 0.5])
+    assert values[2] == 1
+    assert len(second) == 3  # Copied into the local LRU
+
+    # Entries of another model version are never served from the store
+    third = PredictionCache(store=SQLiteStore(path))
+    third.set_version("v2")
+    assert third.get_many(keys) == [None] * 3
+
+    # Nor are expired ones
+    clock.now += 30.0
+    fourth = PredictionCache(store=SQLiteStore(path))
+    fourth.version = "v1"
+    assert fourth.get_many(keys) == [None] * 3
+
+
+def test_invalidate_clears_the_shared_store(clock, tmp_path):
+    store = SQLiteStore(str(tmp_path / "cache.db"))
+    cache = PredictionCache(store=store)
+    cache.set_version("v1")
+    cache.put_many(["a"], [1])
+    cache.invalidate("v1", shared=True)
+    assert len(cache) == 0
+    assert store.get_many(["a"], "v1", clock.time()) == {}
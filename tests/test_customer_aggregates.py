@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.customer_aggregates import (
+    CustomerAggregates,
+    aggregate_by_customer,
+    sample_std,
+)
+
+
+def full_recompute(customer_ids, amounts):
+    uniques, _, stats = aggregate_by_customer(customer_ids, amounts)
+    return pd.DataFrame(
+        {
+            "CustomerId": uniques,
+            "TotalTransactionAmount": stats["total"],
+            "AverageTransactionAmount": stats["mean"],
+            "TransactionCount": stats["rows"],
+            "StdTransactionAmount": sample_std(stats["count"], stats["m2"]),
+        }
+    )
+
+
+def incremental(chunks):
+    aggregates = CustomerAggregates()
+    for customer_ids, amounts in chunks:
+        aggregates.update(np.asarray(customer_ids, dtype=object), amounts)
+    return aggregates.to_frame()
+
+
+def assert_same(result, expected):
+    result = result.set_index("CustomerId").sort_index()
+    expected = expected.set_index("CustomerId").sort_index()
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_nan_amounts_do_not_weight_the_merge():
+    ids = ["a", "a", "a", "b", "b"]
+    amounts = np.array([1.0, np.nan, 3.0, 2.0, 4.0])
+    result = incremental([(ids[:2], amounts[:2]), (ids[2:], amounts[2:])])
+    assert_same(result, full_recompute(ids, amounts))
+    assert result.set_index("CustomerId").loc["a", "StdTransactionAmount"] == (
+        pytest.approx(np.sqrt(2.0))
+    )
+
+
+def test_all_nan_chunk_keeps_the_mean():
+    result = incremental([(["a", "a"], [1.0, 3.0]), (["a"], [np.nan])])
+    row = result.set_index("CustomerId").loc["a"]
+    assert row["AverageTransactionAmount"] == 2.0
+    assert row["TransactionCount"] == 3
+
+
+def test_incremental_matches_full_recompute_with_nans():
+    rng = np.random.default_rng(0)
+    n_rows = 5_000
+    ids = rng.choice([f"C{i}" for i in range(300)], n_rows).astype(object)
+    amounts = rng.normal(100.0, 50.0, n_rows)
+    amounts[rng.random(n_rows) < 0.2] = np.nan
+    # A customer whose first chunk has only missing amounts
+    ids[:3] = "late"
+    amounts[:3] = np.nan
+    ids[-1] = "late"
+    amounts[-1] = 7.0
+
+    bounds = [0, 3, 700, 2_500, 4_999, n_rows]
+    chunks = [(ids[a:b], amounts[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+    expected = full_recompute(ids, amounts)
+    assert_same(incremental(chunks), expected)
+
+    reference = (
+        pd.DataFrame({"CustomerId": ids, "Amount": amounts})
+        .groupby("CustomerId")["Amount"]
+        .agg(["sum", "mean", "size", "std"])
+    )
+    expected = expected.set_index("CustomerId").loc[reference.index]
+    np.testing.assert_allclose(expected["AverageTransactionAmount"], reference["mean"])
+    np.testing.assert_allclose(expected["StdTransactionAmount"], reference["std"])
+    np.testing.assert_array_equal(expected["TransactionCount"], reference["size"])
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    aggregates = CustomerAggregates()
+    aggregates.update(np.array(["a", "a", "b"], dtype=object), [1.0, np.nan, 2.0])
+    path = tmp_path / "aggregates.npz"
+    aggregates.save(path)
+    loaded = CustomerAggregates.load(path)
+    loaded.update(np.array(["a"], dtype=object), [5.0])
+    aggregates.update(np.array(["a"], dtype=object), [5.0])
+    assert_same(loaded.to_frame(), aggregates.to_frame())
+
+
+def test_categorical_ids_give_the_same_aggregates():
+    rng = np.random.default_rng(7)
+    ids = np.array([f"C{i}" for i in rng.integers(0, 50, 2_000)], dtype=object)
+    amounts = rng.normal(100.0, 30.0, 2_000)
+    amounts[rng.random(2_000) < 0.05] = np.nan
+    categorical = pd.Series(ids).astype("category")
+
+    expected = aggregate_by_customer(ids, amounts)
+    for values in (categorical, categorical.values):
+        uniques, codes, stats = aggregate_by_customer(values, amounts)
+        np.testing.assert_array_equal(uniques, expected[0])
+        np.testing.assert_array_equal(codes, expected[1])
+        for name, value in stats.items():
+            np.testing.assert_array_equal(value, expected[2][name])
+
+
+@pytest.mark.parametrize("categorical", [False, True])
+def test_rows_without_a_customer_id_are_left_out(categorical):
+    ids = pd.Series(["a", None, "b", "a", np.nan], dtype=object)
+    if categorical:
+        ids = ids.astype("category")
+    amounts = np.array([1.0, 50.0, 2.0, 3.0, 70.0])
+    uniques, codes, stats = aggregate_by_customer(ids, amounts)
+    assert list(uniques) == ["a", "b"]
+    np.testing.assert_array_equal(codes, [0, -1, 1, 0, -1])
+    np.testing.assert_array_equal(stats["rows"], [2, 1])
+    np.testing.assert_array_equal(stats["total"], [4.0, 2.0])
+    np.testing.assert_array_equal(stats["mean"], [2.0, 2.0])
+
+    aggregates = CustomerAggregates()
+    aggregates.update(ids, amounts)
+    assert list(aggregates.customer_ids) == ["a", "b"]
+    np.testing.assert_array_equal(aggregates.rows, [2, 1])
@@ -0,0 +1,75 @@
+import os
+
+import numpy as np
+import pytest
+
+from scripts import customer_store as store_module
+from scripts.customer_aggregates import aggregate_by_customer, sample_std
+from scripts.customer_store import CustomerFeatureStore
+
+
+def expected_features(customer_ids, amounts, customer_id):
+    uniques, _, stats = aggregate_by_customer(customer_ids, amounts)
+    i = list(uniques).index(customer_id)
+    std = sample_std(stats["count"], stats["m2"])[i]
+    return np.array([stats["total"][i], stats["mean"][i], stats["rows"][i], std])
+
+
+def test_updates_match_full_recompute_with_nans(tmp_path):
+    rng = np.random.default_rng(0)
+    ids = rng.choice([f"C{i}" for i in range(50)], 2_000).astype(object)
+    amounts = rng.normal(100.0, 30.0, 2_000)
+    amounts[rng.random(2_000) < 0.25] = np.nan
+    ids[:2] = "late"
+    amounts[:2] = np.nan
+    ids[-1] = "late"
+    amounts[-1] = 3.0
+
+    store = CustomerFeatureStore.create(tmp_path, ids[:500], amounts[:500])
+    for start in range(500, 2_000, 300):
+        store.update(ids[start : start + 300], amounts[start : start + 300])
+
+    for customer_id in ["late", *np.unique(ids)[:10]]:
+        np.testing.assert_allclose(
+            store.get(customer_id), expected_features(ids, amounts, customer_id)
+        )
+
+
+def test_long_ids_are_not_truncated_onto_existing_ids(tmp_path):
+    short = "C" * 32
+    long = short + "-suffix"
+    store = CustomerFeatureStore.create(tmp_path, [short], [1.0], id_width=32)
+    store.update([long], [5.0])
+
+    assert len(store) == 2
+    np.testing.assert_allclose(store.get(short)[:3], [1.0, 1.0, 1.0])
+    np.testing.assert_allclose(store.get(long)[:3], [5.0, 5.0, 1.0])
+    assert CustomerFeatureStore(tmp_path).get(long) is not None
+
+
+def test_readers_never_see_a_partial_table_while_growing(tmp_path, monkeypatch):
+    ids = [f"C{i}" for i in range(20)]
+    store = CustomerFeatureStore.create(tmp_path, ids, np.ones(20), capacity=20)
+    replace = os.replace
+    opened = []
+
+    def replace_and_read(src, dst):
+        replace(src, dst)
+        reader = CustomerFeatureStore(tmp_path)
+        opened.append([reader.lookup(customer_id) for customer_id in ids])
+
+    monkeypatch.setattr(store_module.os, "replace", replace_and_read)
+    store.update([f"N{i}" for i in range(30)], np.ones(30))
+    monkeypatch.undo()
+
+    assert opened
+    for rows in opened:
+        assert rows == list(range(20))
+    assert store.meta["capacity"] >= 50
+    assert all(store.lookup(f"N{i}") >= 0 for i in range(30))
+
+
+def test_update_requires_write_mode(tmp_path):
+    CustomerFeatureStore.create(tmp_path, ["a"], [1.0])
+    with pytest.raises(ValueError):
+        CustomerFeatureStore(tmp_path).update(["a"], [2.0])
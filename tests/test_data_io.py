@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.data_io import read_transactions, write_transactions
+from scripts.feature_engineer import FeatureEngineering
+from tests.transactions import engineer_features
+from tests.transactions import make_transactions as make_cleaned
+
+
+def make_transactions(day, n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(day, tz="UTC")
+    return pd.DataFrame(
+        {
+            "TransactionId": [f"T{day}-{i}" for i in range(n_rows)],
+            "CustomerId": rng.choice(["C1", "C2", "C3"], n_rows),
+            "ProviderId": rng.choice(["P1", "P2"], n_rows),
+            "Amount": rng.normal(1_000.0, 300.0, n_rows),
+            "Value": rng.integers(1, 5_000, n_rows),
+            "FraudResult": rng.integers(0, 2, n_rows),
+            "TransactionStartTime": (
+                start + pd.to_timedelta(rng.integers(0, 86_400, n_rows), unit="s")
+            ).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }
+    )
+
+
+def sorted_ids(df):
+    return sorted(df["TransactionId"].astype(str))
+
+
+def test_writing_a_day_keeps_the_rest_of_the_month(tmp_path):
+    day1 = make_transactions("2019-01-10", 54, seed=1)
+    day2 = make_transactions("2019-01-11", 42, seed=2)
+    write_transactions(day1, tmp_path)
+    write_transactions(day2, tmp_path)
+
+    result = read_transactions(tmp_path)
+    assert len(result) == 96
+    assert sorted_ids(result) == sorted_ids(pd.concat([day1, day2]))
+
+
+def test_rewriting_a_day_replaces_it(tmp_path):
+    write_transactions(make_transactions("2019-01-10", 54, seed=1), tmp_path)
+    write_transactions(make_transactions("2019-01-11", 42, seed=2), tmp_path)
+    corrected = make_transactions("2019-01-11", 40, seed=3)
+    write_transactions(corrected, tmp_path)
+    write_transactions(corrected, tmp_path)
+
+    result = read_transactions(tmp_path, start="2019-01-11", end="2019-01-12")
+    assert sorted_ids(result) == sorted_ids(corrected)
+    assert len(read_transactions(tmp_path)) == 94
+
+
+def test_other_months_are_untouched(tmp_path):
+    january = make_transactions("2019-01-31", 30, seed=1)
+    february = make_transactions("2019-02-01", 20, seed=2)
+    write_transactions(january, tmp_path)
+    write_transactions(february, tmp_path)
+    assert len(read_transactions(tmp_path, end="2019-02-01")) == 30
+    assert len(read_transactions(tmp_path, start="2019-02-01")) == 20
+
+
+def test_amounts_are_stored_without_loss(tmp_path):
+    df = make_transactions("2019-01-10", 4)
+    df["Amount"] = [0.1, 16_777_217.0, -2_500.05, 1e9 + 0.5]
+    write_transactions(df, tmp_path)
+    result = read_transactions(tmp_path).sort_values("TransactionId")
+    np.testing.assert_array_equal(
+        result["Amount"].to_numpy(), df.sort_values("TransactionId")["Amount"]
+    )
+
+
+@pytest.mark.parametrize("storage", ["csv", "parquet"])
+def test_date_filtered_features_stay_aligned(tmp_path, storage):
+    df = make_cleaned(n_rows=500, start="2018-11-15", days=60)
+    if storage == "csv":
+        path = tmp_path / "clean.csv"
+        df.to_csv(path)
+    else:
+        path = tmp_path / "clean"
+        write_transactions(df, path)
+    expected_rows = int((df["TransactionStartTime"] >= "2018-12-01").sum())
+    assert 0 < expected_rows < len(df)
+
+    fe = FeatureEngineering.from_path(str(path), "FraudResult", start="2018-12-01")
+    features = engineer_features(fe)
+    assert len(features) == expected_rows
+    assert features.shape[1] > 10
+    assert not features.isna().any().any()
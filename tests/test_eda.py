@@ -0,0 +1,97 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.eda.behavior_analysis import CustomerBehaviorAnalysis
+from scripts.eda.correlation_analysis import CorrelationAnalysis
+from scripts.eda.fraud_analysis import FraudRiskAnalysis
+from scripts.eda.provider_analysis import PricingProviderAnalysis
+from scripts.eda.summary import EDASummary, get_summary
+from scripts.eda.transaction_analysis import TransactionAnalysis
+
+
+@pytest.fixture()
+def transactions():
+    rng = np.random.default_rng(0)
+    n_rows = 500
+    return pd.DataFrame(
+        {
+            "CustomerId": rng.choice([f"C{i}" for i in range(40)], n_rows),
+            "SubscriptionId": rng.choice([f"S{i}" for i in range(30)], n_rows),
+            "ProviderId": rng.choice(["P1", "P2", "P3"], n_rows),
+            "ProductId": rng.choice(["A", "B", "C", "D"], n_rows),
+            "ProductCategory": rng.choice(["airtime", "financial"], n_rows),
+            "ChannelId": rng.choice(["web", "android"], n_rows),
+            "PricingStrategy": rng.integers(0, 4, n_rows),
+            "Amount": rng.normal(1_000.0, 400.0, n_rows),
+            "Value": rng.integers(1, 5_000, n_rows),
+            "FraudResult": (rng.random(n_rows) < 0.1).astype(int),
+            "TransactionStartTime": pd.date_range(
+                "2019-01-01", periods=n_rows, freq="37min", tz="UTC"
+            ),
+        }
+    )
+
+
+def test_correlation_needs_only_amount_and_value(transactions):
+    frame = transactions[["Amount", "Value"]]
+    result = CorrelationAnalysis(frame).compute_correlation_matrix()
+    pd.testing.assert_frame_equal(result, frame.corr())
+
+
+def test_summary_without_customer_ids(transactions):
+    summary = EDASummary(transactions.drop(columns="CustomerId"))
+    expected = transactions.groupby("ProviderId")["Amount"].sum()
+    pd.testing.assert_series_equal(
+        summary.revenue_by("ProviderId").sort_index(), expected, check_names=False
+    )
+    assert "UniqueCustomers" not in summary.groups["ProviderId"]
+
+
+def test_summary_matches_pandas(transactions):
+    summary = get_summary(transactions)
+    by_provider = transactions.groupby("ProviderId")
+    pd.testing.assert_series_equal(
+        summary.fraud_rate_by("ProviderId").sort_index(),
+        by_provider["FraudResult"].mean(),
+        check_names=False,
+    )
+    pd.testing.assert_series_equal(
+        summary.unique_customers_by("PricingStrategy").sort_index(),
+        transactions.groupby("PricingStrategy")["CustomerId"].nunique(),
+        check_names=False,
+    )
+    counts = summary.counts("ChannelId")
+    assert counts.to_dict() == transactions["ChannelId"].value_counts().to_dict()
+
+
+def test_analysis_classes_share_one_summary(transactions):
+    analyses = [
+        CustomerBehaviorAnalysis(transactions),
+        FraudRiskAnalysis(transactions),
+        PricingProviderAnalysis(transactions),
+        TransactionAnalysis(transactions),
+    ]
+    summaries = {id(analysis.summary) for analysis in analyses}
+    assert len(summaries) == 1
+    assert analyses[0].summary is get_summary(transactions)
+
+
+def test_summary_is_refreshed_after_an_in_place_change(transactions):
+    df = transactions.copy()
+    analysis = FraudRiskAnalysis(df)
+    before = analysis.summary
+    df.loc[df.index[:10], "FraudResult"] = 1 - df["FraudResult"].iloc[:10]
+
+    assert analysis.summary is before  # Kept until refreshed
+    after = analysis.refresh_summary()
+    assert after is not before
+    assert after.fingerprint != before.fingerprint
+    expected = df.groupby("ProviderId")["FraudResult"].sum()
+    pd.testing.assert_series_equal(
+        after.fraud_count_by("ProviderId").sort_index(), expected, check_names=False
+    )
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from scripts.serving.executor import BoundedExecutor, QueueFullError
+
+
+def test_run_returns_the_result_and_frees_the_slot():
+    executor = BoundedExecutor(max_workers=1, max_queue=0)
+
+    async def body():
+        return await executor.run(sum, [1, 2, 3]), executor.in_flight
+
+    assert asyncio.run(body()) == (6, 0)
+    executor.shutdown()
+
+
+def test_full_executor_rejects_new_jobs():
+    executor = BoundedExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def body():
+        jobs = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(QueueFullError):
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(*jobs)
+
+    asyncio.run(body())
+    assert executor.stats()["rejected"] == 1
+    assert executor.in_flight == 0
+    executor.shutdown()
+
+
+def test_timed_out_job_keeps_its_slot_until_it_finishes():
+    executor = BoundedExecutor(max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def body():
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(release.wait, timeout=0.05)
+        # The worker is still busy with the abandoned job, so there is no capacity
+        assert executor.in_flight == 1
+        with pytest.raises(QueueFullError):
+            await executor.run(sum, [1])
+        release.set()
+        for _ in range(100):
+            if executor.in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        return await executor.run(sum, [1])
+
+    assert asyncio.run(body()) == 1
+    assert executor.stats()["timed_out"] == 1
+    assert executor.in_flight == 0
+    executor.shutdown()
+
+
+def test_queued_job_is_cancelled_on_timeout():
+    executor = BoundedExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+    started = []
+
+    async def body():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(started.append, "queued", timeout=0.05)
+        await asyncio.sleep(0.01)
+        # The queued job never started, so its slot is free again right away
+        assert executor.in_flight == 1
+        release.set()
+        await running
+
+    asyncio.run(body())
+    assert started == []
+    executor.shutdown()
+
+
+class BlockingModel:
+    n_features_in_ = 3
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def predict(self, X):
+        self.release.wait(5.0)
+        return np.zeros(len(X), dtype=np.int64)
+
+
+@pytest.fixture()
+def blocked_app(monkeypatch):
+    model = BlockingModel()
+    monkeypatch.setattr(main.models, "model", model)
+    monkeypatch.setattr(main, "prediction_cache", None)
+    monkeypatch.setattr(main, "MICRO_BATCHING", False)
+    monkeypatch.setattr(main, "REQUEST_TIMEOUT", 0.1)
+    executor = BoundedExecutor(max_workers=1, max_queue=0)
+    monkeypatch.setattr(main, "executor", executor)
+    with TestClient(main.app) as client:
+        yield client, model, executor
+    model.release.set()
+    executor.shutdown()
+
+
+def test_api_answers_504_past_the_deadline_and_503_while_saturated(blocked_app):
+    client, model, executor = blocked_app
+    response = client.post("/predict", json={"features": [0.0, 0.0, 0.0]})
+    assert response.status_code == 504
+    # The timed-out prediction still occupies the only worker
+    response = client.post("/predict", json={"features": [1.0, 0.0, 0.0]})
+    assert response.status_code == 503
+    assert executor.stats()["rejected"] == 1
+
+    model.release.set()
+    for _ in range(100):
+        if executor.in_flight == 0:
+            break
+        threading.Event().wait(0.01)
+    response = client.post("/predict", json={"features": [2.0, 0.0, 0.0]})
+    assert response.status_code == 200
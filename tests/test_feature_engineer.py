@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from scripts.customer_aggregates import AGGREGATE_COLUMNS, CustomerAggregates
+from scripts.feature_engineer import FeatureEngineering, StreamingFeatureEngineering
+from tests.transactions import engineer_features, make_transactions
+
+
+def test_streaming_matches_dense(tmp_path):
+    csv_path = tmp_path / "clean.csv"
+    make_transactions(n_rows=700, seed=5).to_csv(csv_path)
+
+    dense = FeatureEngineering(pd.read_csv(csv_path, index_col=0), "FraudResult")
+    expected = engineer_features(dense)
+
+    streaming = StreamingFeatureEngineering(str(csv_path), "FraudResult", chunksize=128)
+    streaming.fit()
+    X, y = streaming.transform(str(tmp_path / "X.npy"), str(tmp_path / "y.npy"))
+
+    assert streaming.n_rows == 700
+    assert streaming.get_feature_names() == expected.columns.tolist()
+    np.testing.assert_allclose(X, expected.to_numpy(dtype=np.float64), atol=1e-12)
+    np.testing.assert_array_equal(y, dense.df["FraudResult"])
+
+
+def test_aggregate_delta_matches_full_history(tmp_path):
+    df = make_transactions(n_rows=600, n_customers=30, seed=6)
+    history, delta = df.iloc[:450], df.iloc[450:].reset_index(drop=True)
+
+    running = CustomerAggregates()
+    FeatureEngineering(history, "FraudResult").create_aggregate_features(running)
+    running.save(tmp_path / "aggregates.npz")
+
+    incremental = FeatureEngineering(delta, "FraudResult")
+    incremental.create_aggregate_features(
+        CustomerAggregates.load(tmp_path / "aggregates.npz")
+    )
+    full = FeatureEngineering(df, "FraudResult")
+    full.create_aggregate_features()
+
+    expected = full.df[AGGREGATE_COLUMNS].iloc[450:].reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        incremental.df[AGGREGATE_COLUMNS], expected, check_dtype=False
+    )
+    table = incremental.aggregated_features.set_index("CustomerId").sort_index()
+    pd.testing.assert_frame_equal(
+        table,
+        full.aggregated_features.set_index("CustomerId").sort_index(),
+        check_dtype=False,
+    )
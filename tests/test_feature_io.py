@@ -0,0 +1,132 @@
+import json
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+from scripts.feature_io import (
+    FeatureDataset,
+    load_features,
+    manifest_path,
+    read_manifest,
+    save_features,
+    write_manifest,
+)
+
+
+def make_features(n_rows=200, n_cols=4, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_cols))
+    y = (rng.random(n_rows) < 0.2).astype(np.int64)
+    return X, y
+
+
+@pytest.fixture(params=["dense", "csr"])
+def saved(request, tmp_path):
+    X, y = make_features()
+    if request.param == "csr":
+        X[np.abs(X) < 1.0] = 0.0
+        X = sparse.csr_matrix(X)
+    suffix = ".npz" if request.param == "csr" else ".npy"
+    x_path, y_path = str(tmp_path / f"X{suffix}"), str(tmp_path / "y.npy")
+    save_features(X, y, x_path, y_path, feature_names=["a", "b", "c", "d"])
+    return X, y, x_path, y_path
+
+
+def dense(X):
+    return X.toarray() if sparse.issparse(X) else np.asarray(X)
+
+
+def test_manifest_roundtrip(saved):
+    X, y, x_path, y_path = saved
+    manifest = read_manifest(x_path)
+    assert manifest == {
+        "format": "npz" if sparse.issparse(X) else "npy",
+        "shape": [200, 4],
+        "dtype": "float64",
+        "y_dtype": "int64",
+        "columns": ["a", "b", "c", "d"],
+    }
+    dataset = FeatureDataset(x_path, y_path)
+    assert len(dataset) == 200
+    assert dataset.columns == ["a", "b", "c", "d"]
+    X_loaded, y_loaded = load_features(x_path, y_path)
+    np.testing.assert_array_equal(dense(X_loaded), dense(X))
+    np.testing.assert_array_equal(y_loaded, y)
+
+
+def test_features_saved_without_a_manifest(tmp_path):
+    X, y = make_features()
+    x_path, y_path = tmp_path / "X.npy", tmp_path / "y.npy"
+    np.save(x_path, X)
+    np.save(y_path, y)
+    assert read_manifest(x_path) is None
+    assert FeatureDataset(str(x_path), str(y_path)).columns is None
+
+
+def test_manifest_shape_mismatch_raises(saved):
+    _, _, x_path, y_path = saved
+    write_manifest(x_path, (201, 4), np.float64, np.int64)
+    with pytest.raises(ValueError, match="manifest says"):
+        FeatureDataset(x_path, y_path)
+
+
+def test_manifest_is_written_next_to_x(tmp_path):
+    X, y = make_features()
+    x_path = str(tmp_path / "X_features.npy")
+    save_features(X, y, x_path, str(tmp_path / "y.npy"))
+    assert manifest_path(x_path) == str(tmp_path / "X_features.manifest.json")
+    with open(manifest_path(x_path)) as file:
+        assert json.load(file)["columns"] is None
+
+
+def test_split_is_reproducible_and_stratified(saved):
+    _, y, x_path, y_path = saved
+    dataset = FeatureDataset(x_path, y_path)
+    train, test = dataset.split(test_size=0.25, random_state=7, stratify=True)
+    again_train, again_test = dataset.split(
+        test_size=0.25, random_state=7, stratify=True
+    )
+    np.testing.assert_array_equal(train, again_train)
+    np.testing.assert_array_equal(test, again_test)
+
+    assert len(test) == 50
+    np.testing.assert_array_equal(
+        np.sort(np.concatenate([train, test])), np.arange(200)
+    )
+    assert abs(y[train].mean() - y.mean()) <= 1 / len(train)
+    assert abs(y[test].mean() - y.mean()) <= 1 / len(test)
+
+
+def test_split_without_shuffle_is_contiguous(saved):
+    _, _, x_path, y_path = saved
+    train, test = FeatureDataset(x_path, y_path).split(test_size=0.25, shuffle=False)
+    np.testing.assert_array_equal(train, np.arange(150))
+    np.testing.assert_array_equal(test, np.arange(150, 200))
+
+
+def test_subset(saved):
+    X, y, x_path, y_path = saved
+    dataset = FeatureDataset(x_path, y_path)
+    for index in [np.arange(20, 60), np.array([5, 3, 190, 3])]:
+        X_part, y_part = dataset.subset(index)
+        np.testing.assert_array_equal(dense(X_part), dense(X)[index])
+        np.testing.assert_array_equal(y_part, y[index])
+    if not sparse.issparse(X):
+        # Contiguous rows of the memory-mapped matrix are returned as a view
+        X_part, _ = dataset.subset(np.arange(20, 60))
+        assert np.shares_memory(X_part, dataset.X)
+
+
+def test_save_subset(saved, tmp_path):
+    X, y, x_path, y_path = saved
+    dataset = FeatureDataset(x_path, y_path)
+    index = np.random.default_rng(1).permutation(200)[:70]
+    suffix = ".npz" if sparse.issparse(X) else ".npy"
+    part_x, part_y = str(tmp_path / f"part{suffix}"), str(tmp_path / "part_y.npy")
+    dataset.save_subset(index, part_x, part_y, block_rows=16)
+
+    X_part, y_part = load_features(part_x, part_y)
+    assert sparse.issparse(X_part) == sparse.issparse(X)
+    np.testing.assert_array_equal(dense(X_part), dense(X)[index])
+    np.testing.assert_array_equal(y_part, y[index])
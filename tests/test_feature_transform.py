@@ -0,0 +1,74 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from scripts.feature_engineer import FeatureEngineering
+from scripts.feature_transform import FeatureTransformer
+from tests.transactions import engineer_features, make_transactions
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    df = make_transactions(n_rows=500, seed=2)
+    fe = FeatureEngineering(df, "FraudResult")
+    features = engineer_features(fe)
+    return df, features, FeatureTransformer.from_feature_engineering(fe)
+
+
+def test_matches_training_features(fitted):
+    df, features, transformer = fitted
+    assert transformer.get_feature_names() == features.columns.tolist()
+    expected = features.to_numpy(dtype=np.float64)
+    np.testing.assert_allclose(transformer.transform_frame(df), expected, atol=1e-12)
+    records = df.to_dict("records")
+    rows = np.array([transformer.transform_record(record) for record in records])
+    np.testing.assert_allclose(rows, expected, atol=1e-12)
+
+
+def test_unknown_categories_and_customers(fitted):
+    df, _, transformer = fitted
+    unknown = df.iloc[[0]].assign(
+        ProviderId="ProviderId_999", CustomerId="CustomerId_new"
+    )
+    record = unknown.iloc[0].to_dict()
+    row = transformer.transform_record(record)
+    np.testing.assert_array_equal(row, transformer.transform_frame(unknown)[0])
+
+    provider_columns = [
+        i
+        for i, name in enumerate(transformer.get_feature_names())
+        if name.startswith("ProviderId_")
+    ]
+    assert not row[provider_columns].any()
+    # An unseen customer is treated as having only this transaction
+    n = transformer.n_numerical
+    amount = float(record["Amount"])
+    expected = np.array([amount, float(record["Value"]), amount, amount, 1.0, np.nan])
+    np.testing.assert_allclose(
+        row[:n], expected * transformer.scale + transformer.offset
+    )
+
+
+def test_save_and_load_roundtrip(fitted, tmp_path):
+    df, _, transformer = fitted
+    path = tmp_path / "feature_transform.pkl"
+    transformer.save(path)
+    loaded = FeatureTransformer.load(path)
+    assert loaded.get_feature_names() == transformer.get_feature_names()
+    np.testing.assert_array_equal(
+        loaded.transform_frame(df), transformer.transform_frame(df)
+    )
+
+
+def test_load_rejects_other_versions(fitted, tmp_path):
+    _, _, transformer = fitted
+    path = tmp_path / "feature_transform.pkl"
+    transformer.save(path)
+    with open(path, "rb") as file:
+        artifact = pickle.load(file)
+    artifact["version"] += 1
+    with open(path, "wb") as file:
+        pickle.dump(artifact, file)
+    with pytest.raises(ValueError, match="Unsupported feature transform version"):
+        FeatureTransformer.load(path)
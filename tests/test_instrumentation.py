@@ -0,0 +1,164 @@
+import re
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from scripts.instrumentation import MetricsRegistry, StageRecorder, timed_call
+from scripts.serving.executor import BoundedExecutor
+
+SAMPLE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$")
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_prometheus(text):
+    """HELP texts, TYPEs and samples keyed by (name, sorted label pairs)."""
+    help_texts, types, samples = {}, {}, {}
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            name, documentation = line[len("# HELP ") :].split(" ", 1)
+            help_texts[name] = documentation
+        elif line.startswith("# TYPE "):
+            name, kind = line[len("# TYPE ") :].split(" ")
+            types[name] = kind
+        elif line:
+            match = SAMPLE.match(line)
+            assert match, f"malformed sample line {line!r}"
+            name, labels, value = match.groups()
+            key = (name, tuple(sorted(LABEL.findall(labels or ""))))
+            assert key not in samples, f"duplicate sample {line!r}"
+            samples[key] = float(value)
+    return help_texts, types, samples
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests", ["route"])
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.gauge("ready", "Ready flag", callback=lambda: 1)
+    requests.inc(route="/a")
+    requests.inc(2, route='/b"quoted"')
+    for value in (0.05, 0.1, 0.5, 3.0):
+        latency.observe(value)
+
+    help_texts, types, samples = parse_prometheus(registry.render())
+    assert help_texts == {
+        "requests_total": "Requests",
+        "latency_seconds": "Latency",
+        "ready": "Ready flag",
+    }
+    assert types == {
+        "requests_total": "counter",
+        "latency_seconds": "histogram",
+        "ready": "gauge",
+    }
+    assert samples[("requests_total", (("route", "/a"),))] == 1
+    assert samples[("requests_total", (("route", '/b\\"quoted\\"'),))] == 2
+    # Buckets are cumulative and `le` is inclusive
+    assert samples[("latency_seconds_bucket", (("le", "0.1"),))] == 2
+    assert samples[("latency_seconds_bucket", (("le", "1.0"),))] == 3
+    assert samples[("latency_seconds_bucket", (("le", "+Inf"),))] == 4
+    assert samples[("latency_seconds_count", ())] == 4
+    assert samples[("latency_seconds_sum", ())] == pytest.approx(3.65)
+    assert samples[("ready", ())] == 1
+
+
+def test_registry_rejects_duplicate_names():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests")
+    with pytest.raises(ValueError, match="already registered"):
+        registry.gauge("requests_total", "Requests again")
+
+
+def test_stage_recorder_times_stages():
+    recorder = StageRecorder()
+    with recorder.stage("load", rows=1_000):
+        time.sleep(0.02)
+    with recorder.stage("allocate") as record:
+        block = np.ones(2**20)  # 8 MB
+        record["rows"] = len(block)
+    with pytest.raises(RuntimeError):
+        with recorder.stage("fail"):
+            raise RuntimeError("boom")
+
+    load, allocate, fail = recorder.records
+    assert [r["stage"] for r in recorder.records] == ["load", "allocate", "fail"]
+    assert load["seconds"] >= 0.02
+    assert load["rows_per_s"] == pytest.approx(1_000 / load["seconds"])
+    assert allocate["rows"] == 2**20
+    assert allocate["peak_mb"] >= 8.0
+    assert "rows_per_s" not in fail
+    assert recorder.to_frame()["stage"].tolist() == ["load", "allocate", "fail"]
+
+
+def test_stage_recorder_without_memory_tracing():
+    recorder = StageRecorder(trace_memory=False)
+    with recorder.stage("load"):
+        pass
+    assert "peak_mb" not in recorder.records[0]
+
+
+def test_timed_call_returns_the_result_and_duration():
+    result, seconds = timed_call(lambda x: time.sleep(0.02) or x * 2, 21)
+    assert result == 42
+    assert 0.02 <= seconds < 1.0
+
+
+class SlowModel:
+    n_features_in_ = 3
+    delay = 0.01
+
+    def predict(self, X):
+        time.sleep(self.delay)
+        return np.zeros(len(X), dtype=np.int64)
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    monkeypatch.setattr(main.models, "model", SlowModel())
+    monkeypatch.setattr(main, "MICRO_BATCHING", False)
+    # The app shuts its executor down on exit, so every client gets its own
+    monkeypatch.setattr(main, "executor", BoundedExecutor(max_workers=2))
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.mark.skipif(not main.METRICS_ENABLED, reason="METRICS_ENABLED=0")
+def test_metrics_endpoint_counts_requests_and_inference(client):
+    def scrape():
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        return parse_prometheus(response.text)
+
+    _, _, before = scrape()
+    # Fresh random rows, so none of them is answered from the prediction cache
+    for row in np.random.default_rng().normal(size=(3, 3)):
+        response = client.post("/predict", json={"features": row.tolist()})
+        assert response.status_code == 200
+    assert client.post("/predict", json={"features": [1.0]}).status_code == 422
+    help_texts, types, after = scrape()
+
+    assert types["http_requests_total"] == "counter"
+    assert types["http_request_duration_seconds"] == "histogram"
+    assert types["model_inference_seconds"] == "histogram"
+    assert types["model_ready"] == "gauge"
+    assert help_texts["model_inference_seconds"].startswith("Time in the model")
+
+    def delta(name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        return after[key] - before.get(key, 0.0)
+
+    route = {"method": "POST", "route": "/predict"}
+    assert delta("http_requests_total", status="200", **route) == 3
+    assert delta("http_requests_total", status="422", **route) == 1
+    assert delta("http_request_duration_seconds_count", **route) == 4
+    assert delta("http_request_duration_seconds_bucket", le="+Inf", **route) == 4
+    # Inference time comes from timed_call around the model only
+    assert delta("model_inference_seconds_count", method="predict") == 3
+    inference = delta("model_inference_seconds_sum", method="predict")
+    assert inference >= 3 * SlowModel.delay
+    assert inference <= delta("http_request_duration_seconds_sum", **route)
+    assert after[("model_ready", ())] == 1
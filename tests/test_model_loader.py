@@ -0,0 +1,78 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from scripts.serving.model_loader import HybridEnsemble, ModelLoader
+from scripts.serving.tree_export import FlatEnsemble, export_ensemble
+
+
+@pytest.fixture()
+def model_path(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(500, 6))
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0)
+    model.fit(X, (X[:, 0] + X[:, 1] > 0).astype(int))
+    path = tmp_path / "model.pkl"
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+    return str(path), model
+
+
+def test_flat_export_matches_sklearn(model_path, tmp_path):
+    path, model = model_path
+    flat_dir = str(tmp_path / "flat")
+    export_ensemble(model, flat_dir)
+    loader = ModelLoader(path, flat_dir)
+    flat = loader.get()
+    assert loader.kind == "flat"
+    assert isinstance(flat, FlatEnsemble)
+
+    X = np.random.default_rng(1).normal(size=(300, 6))
+    X[::7, 2] = np.nan
+    np.testing.assert_allclose(flat.predict_proba(X), model.predict_proba(X))
+    np.testing.assert_array_equal(flat.predict(X), model.predict(X))
+
+
+def test_falls_back_to_the_pickle(model_path, tmp_path):
+    path, model = model_path
+    loader = ModelLoader(path, str(tmp_path / "no_export"), compile_model=False)
+    assert loader.get().predict_proba(np.zeros((1, 6))).shape == (1, 2)
+    assert loader.kind == "pickle"
+    assert loader.version.startswith("pickle:")
+
+
+@pytest.mark.parametrize("n_rows", [1, 256, 257, 2_000])
+def test_hybrid_ensemble_matches_sklearn(model_path, n_rows):
+    path, model = model_path
+    loader = ModelLoader(path)
+    hybrid = loader.get()
+    assert loader.kind == "compiled"
+    assert isinstance(hybrid, HybridEnsemble)
+
+    X = np.random.default_rng(n_rows).normal(size=(n_rows, 6))
+    np.testing.assert_allclose(
+        hybrid.predict_proba(X), model.predict_proba(X), atol=1e-9
+    )
+    np.testing.assert_array_equal(hybrid.predict(X), model.predict(X))
+
+
+def test_hybrid_ensemble_loads_sklearn_only_for_large_batches(model_path):
+    path, model = model_path
+    hybrid = ModelLoader(path).get()
+    X = np.random.default_rng(1).normal(size=(300, 6))
+
+    hybrid.predict_proba(X[: hybrid.max_flat_rows])
+    assert hybrid._model is None
+    hybrid.predict_proba(X)
+    assert isinstance(hybrid._model, RandomForestClassifier)
+    assert hybrid.model is hybrid._model
+
+
+def test_load_failure_is_reported(tmp_path):
+    loader = ModelLoader(str(tmp_path / "missing.pkl"))
+    with pytest.raises(RuntimeError, match="Failed to load model"):
+        loader.get()
+    assert not loader.ready
+    assert "missing.pkl" in loader.error
@@ -0,0 +1,129 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from scripts.woe_binning import MonotonicBinner, _monotonic_boundaries, _woe_iv
+
+EPS = 1e-5
+
+
+def brute_force(count, bad, totals, max_bins, min_count, increasing):
+    """Best IV over every grouping of the pre-bins, by trying them all."""
+    n = len(count)
+    best_iv = -np.inf
+    for n_cuts in range(max_bins):
+        for boundaries in combinations(range(1, n), n_cuts):
+            starts = [0, *boundaries]
+            bin_count = np.add.reduceat(count, starts)
+            if (bin_count < min_count).any():
+                continue
+            bin_bad = np.add.reduceat(bad, starts)
+            woe, iv = _woe_iv(bin_count - bin_bad, bin_bad, *totals, EPS)
+            steps = np.diff(woe)
+            if not (steps > 0 if increasing else steps < 0).all():
+                continue
+            best_iv = max(best_iv, iv.sum())
+    return best_iv
+
+
+def grouping_iv(count, bad, totals, boundaries, min_count, increasing):
+    """IV of the given grouping, checking that it is valid."""
+    starts = [0, *boundaries]
+    bin_count = np.add.reduceat(count, starts)
+    bin_bad = np.add.reduceat(bad, starts)
+    assert (bin_count >= min_count).all()
+    woe, iv = _woe_iv(bin_count - bin_bad, bin_bad, *totals, EPS)
+    steps = np.diff(woe)
+    assert (steps > 0 if increasing else steps < 0).all()
+    return iv.sum()
+
+
+@pytest.mark.parametrize("seed", range(400))
+def test_dynamic_program_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    n_prebins = int(rng.integers(1, 9))
+    count = rng.integers(1, 30, size=n_prebins).astype(np.float64)
+    bad = rng.binomial(count.astype(int), rng.random(n_prebins)).astype(np.float64)
+    missing_good, missing_bad = rng.integers(0, 5, size=2)
+    totals = ((count - bad).sum() + missing_good, bad.sum() + missing_bad)
+    max_bins = int(rng.integers(1, 6))
+    min_count = int(rng.integers(1, 20))
+    increasing = bool(rng.integers(2))
+
+    good_cum = np.concatenate([[0.0], np.cumsum(count - bad)])
+    bad_cum = np.concatenate([[0.0], np.cumsum(bad)])
+    iv, boundaries = _monotonic_boundaries(
+        good_cum, bad_cum, totals, max_bins, min_count, increasing, EPS
+    )
+    expected = brute_force(count, bad, totals, max_bins, min_count, increasing)
+
+    if not np.isfinite(expected):
+        assert iv == -np.inf and boundaries is None
+        return
+    assert iv == pytest.approx(expected, rel=1e-9, abs=1e-12)
+    assert len(boundaries) < max_bins
+    found = grouping_iv(count, bad, totals, boundaries, min_count, increasing)
+    assert found == pytest.approx(expected, rel=1e-9, abs=1e-12)
+
+
+def make_data(n_rows=4_000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, 3))
+    X[rng.random(X.shape) < 0.05] = np.nan
+    logit = np.nan_to_num(X[:, 0]) - 0.5 * np.nan_to_num(X[:, 1])
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return X, y
+
+
+@pytest.mark.parametrize("monotonic", ["auto", "ascending", "descending"])
+def test_binner_woe_is_monotonic(monotonic):
+    X, y = make_data()
+    binner = MonotonicBinner(max_bins=5, monotonic=monotonic, n_jobs=1).fit(X, y)
+    for edges, count, woe in zip(binner.edges, binner.count, binner.woe):
+        assert len(edges) + 1 <= 5
+        assert np.all(np.diff(edges) > 0)
+        assert np.all(count[:-1] >= np.ceil(0.05 * count[:-1].sum()))
+        steps = np.diff(woe[:-1])
+        if monotonic == "ascending":
+            assert np.all(steps > 0)
+        elif monotonic == "descending":
+            assert np.all(steps < 0)
+        else:
+            assert np.all(steps > 0) or np.all(steps < 0)
+
+
+def test_binner_transform_and_iv_match_its_bins():
+    X, y = make_data()
+    binner = MonotonicBinner(max_bins=4, n_jobs=1).fit(X, y)
+    transformed = binner.transform(X)
+    for f, (edges, count, bad, woe) in enumerate(
+        zip(binner.edges, binner.count, binner.bad, binner.woe)
+    ):
+        codes = np.searchsorted(edges, X[:, f], side="left")
+        codes[np.isnan(X[:, f])] = len(edges) + 1
+        np.testing.assert_array_equal(np.bincount(codes, minlength=len(count)), count)
+        np.testing.assert_array_equal(
+            np.bincount(codes, weights=y, minlength=len(count)), bad
+        )
+        np.testing.assert_array_equal(transformed[:, f], woe[codes])
+
+        dist_good = (count - bad) / (len(y) - y.sum())
+        dist_bad = bad / y.sum()
+        expected_woe = np.log((dist_good + EPS) / (dist_bad + EPS))
+        expected_woe[count == 0] = 0.0
+        np.testing.assert_allclose(woe, expected_woe)
+        assert binner.iv[f] == pytest.approx(
+            ((dist_good - dist_bad) * expected_woe).sum()
+        )
+    # The informative features carry more IV than the noise feature
+    assert binner.iv[0] > binner.iv[2] and binner.iv[1] > binner.iv[2]
+
+
+def test_parallel_fit_matches_serial():
+    X, y = make_data(n_rows=2_000, seed=1)
+    serial = MonotonicBinner(n_jobs=1).fit(X, y)
+    parallel = MonotonicBinner(n_jobs=2).fit(X, y)
+    for a, b in zip(serial.edges, parallel.edges):
+        np.testing.assert_array_equal(a, b)
+    np.testing.assert_allclose(serial.iv, parallel.iv)
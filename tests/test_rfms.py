@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.rfms import RFMS_COLUMNS, build_rfms, rfms_components
+
+
+@pytest.fixture()
+def transactions():
+    rng = np.random.default_rng(0)
+    n_rows = 2_000
+    return pd.DataFrame(
+        {
+            "CustomerId": rng.choice([f"C{i}" for i in range(120)], n_rows),
+            "TransactionStartTime": pd.Timestamp("2018-11-15", tz="UTC")
+            + pd.to_timedelta(rng.integers(0, 90 * 86_400, n_rows), unit="s"),
+            "Amount": rng.normal(500.0, 200.0, n_rows),
+        }
+    )
+
+
+def reference_components(df, snapshot):
+    df = df[df["TransactionStartTime"] <= snapshot]
+    grouped = df.groupby("CustomerId")
+    return pd.DataFrame(
+        {
+            "Recency": (
+                snapshot - grouped["TransactionStartTime"].max()
+            ).dt.total_seconds()
+            / 86_400,
+            "Frequency": grouped.size().astype(float),
+            "Monetary": grouped["Amount"].sum(),
+            "StdDev": grouped["Amount"].std().fillna(0.0),
+        }
+    )
+
+
+def components_frame(df, snapshot_date=None):
+    uniques, components = rfms_components(
+        df["CustomerId"].to_numpy(),
+        df["TransactionStartTime"],
+        df["Amount"].to_numpy(),
+        snapshot_date,
+    )
+    return pd.DataFrame(components, index=pd.Index(uniques, name="CustomerId"))
+
+
+def test_components_match_pandas(transactions):
+    snapshot = transactions["TransactionStartTime"].max() + pd.Timedelta(days=1)
+    result = components_frame(transactions).sort_index()
+    expected = reference_components(transactions, snapshot)
+    pd.testing.assert_frame_equal(result, expected, check_names=False)
+
+
+def test_transactions_after_the_snapshot_are_excluded(transactions):
+    snapshot = pd.Timestamp("2018-12-01", tz="UTC")
+    result = components_frame(transactions, "2018-12-01").sort_index()
+    expected = reference_components(transactions, snapshot)
+    pd.testing.assert_frame_equal(result, expected, check_names=False)
+    assert (result["Recency"] >= 0).all()
+    assert len(result) < transactions["CustomerId"].nunique()
+
+
+def test_snapshot_changes_the_scores(transactions):
+    ids_all, scores_all = build_rfms(transactions)
+    ids_early, scores_early = build_rfms(transactions, snapshot_date="2018-12-01")
+    assert len(ids_early) < len(ids_all)
+    common = pd.Index(ids_all).get_indexer(ids_early)
+    assert not np.allclose(scores_all[common], scores_early)
+
+
+def test_snapshot_before_all_transactions_raises(transactions):
+    with pytest.raises(ValueError, match="snapshot"):
+        build_rfms(transactions, snapshot_date="2018-01-01")
+
+
+def test_categorical_ids_give_the_same_scores(transactions):
+    ids, scores = build_rfms(transactions, snapshot_date="2019-01-10")
+    categorical = transactions.astype({"CustomerId": "category"})
+    cat_ids, cat_scores = build_rfms(categorical, snapshot_date="2019-01-10")
+    order = pd.Index(cat_ids).get_indexer(ids)
+    np.testing.assert_array_equal(cat_scores[order], scores)
+    assert scores.dtype == np.float32
+    assert scores.shape == (len(ids), len(RFMS_COLUMNS))
+    assert scores.min() >= 0 and scores.max() <= 1
+
+
+def test_transactions_without_a_customer_id_are_skipped(transactions):
+    with_missing = transactions.copy()
+    with_missing["CustomerId"] = with_missing["CustomerId"].astype(object)
+    with_missing.loc[::7, "CustomerId"] = None
+    kept = with_missing.dropna(subset=["CustomerId"])
+    for df in (with_missing, with_missing.astype({"CustomerId": "category"})):
+        uniques, scores = build_rfms(df, snapshot_date="2019-03-01")
+        expected_uniques, expected = build_rfms(kept, snapshot_date="2019-03-01")
+        assert list(uniques) == list(expected_uniques)
+        np.testing.assert_array_equal(scores, expected)
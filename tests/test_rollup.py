@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.eda.rollup import RollupCube
+from tests.transactions import make_transactions
+
+
+@pytest.fixture(scope="module")
+def transactions():
+    df = make_transactions(n_rows=3_000, days=45, seed=7)
+    df["TransactionStartTime"] = pd.to_datetime(df["TransactionStartTime"], utc=True)
+    return df
+
+
+def cells_by_key(cube):
+    return cube.cells.set_index(["hour", "ProviderId", "ProductCategory", "ChannelId"])
+
+
+def test_hourly_rollup_matches_resample(transactions):
+    cube = RollupCube.from_frame(transactions)
+    assert cube.cells["count"].sum() == len(transactions)
+
+    hourly = cube.query("h")
+    resampled = transactions.set_index("TransactionStartTime").resample("h")
+    np.testing.assert_array_equal(hourly["count"], resampled["Amount"].count())
+    np.testing.assert_allclose(hourly["Amount"], resampled["Amount"].sum())
+    np.testing.assert_array_equal(hourly["FraudResult"], resampled["FraudResult"].sum())
+    pd.testing.assert_index_equal(
+        hourly.index, resampled["Amount"].sum().index, check_names=False
+    )
+
+
+@pytest.mark.parametrize("freq", ["D", "W", "MS"])
+def test_revenue_trend_matches_resample(transactions, freq):
+    trend = RollupCube.from_frame(transactions).revenue_trend(freq)
+    expected = (
+        transactions.set_index("TransactionStartTime")["Amount"].resample(freq).sum()
+    )
+    pd.testing.assert_series_equal(trend, expected, check_freq=False)
+
+
+def test_update_equals_rebuild(transactions, tmp_path):
+    day = transactions["TransactionStartTime"].dt.floor("D")
+    cutoff = day.unique()[30]
+    history, new = transactions[day < cutoff], transactions[day >= cutoff]
+    rebuilt = RollupCube.from_frame(transactions)
+
+    cube = RollupCube.from_frame(history)
+    cube.save(tmp_path / "cube")
+    updated = RollupCube.load(tmp_path / "cube").update(new)
+    pd.testing.assert_frame_equal(cells_by_key(updated), cells_by_key(rebuilt))
+
+    # Folding the same days in again replaces them instead of double counting
+    updated.update(new)
+    pd.testing.assert_frame_equal(cells_by_key(updated), cells_by_key(rebuilt))
+
+
+def test_additive_update_splits_anywhere(transactions):
+    middle = len(transactions) // 2 + 17
+    cube = RollupCube.from_frame(transactions.iloc[:middle])
+    cube.update(transactions.iloc[middle:], replace_days=False)
+    pd.testing.assert_frame_equal(
+        cells_by_key(cube), cells_by_key(RollupCube.from_frame(transactions))
+    )
+
+
+def test_fraud_rate_slices(transactions):
+    cube = RollupCube.from_frame(transactions)
+    start, end = "2018-11-20", "2018-12-10"
+    channels = ["ChannelId_1", "ChannelId_3"]
+    result = cube.query(
+        None, by="ProviderId", filters={"ChannelId": channels}, start=start, end=end
+    )
+
+    time = transactions["TransactionStartTime"]
+    rows = transactions[
+        transactions["ChannelId"].isin(channels)
+        & (time >= pd.Timestamp(start, tz="UTC"))
+        & (time < pd.Timestamp(end, tz="UTC"))
+    ]
+    expected = rows.groupby("ProviderId")["FraudResult"].agg(["mean", "sum", "size"])
+    np.testing.assert_allclose(result["FraudRate"], expected["mean"])
+    np.testing.assert_array_equal(result["FraudResult"], expected["sum"])
+    np.testing.assert_array_equal(result["count"], expected["size"])
+    assert result.index.tolist() == expected.index.tolist()
+
+
+def test_fraud_rate_per_day_and_category(transactions):
+    cube = RollupCube.from_frame(transactions)
+    result = cube.query(
+        "D", by="ProductCategory", filters={"ProviderId": "ProviderId_2"}
+    )
+    rows = transactions[transactions["ProviderId"] == "ProviderId_2"]
+    expected = rows.groupby(
+        [rows["TransactionStartTime"].dt.floor("D"), "ProductCategory"]
+    )["FraudResult"].mean()
+    observed = result[result["count"] > 0]["FraudRate"]
+    np.testing.assert_allclose(observed, expected)
+    assert observed.index.tolist() == expected.index.tolist()
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from scripts.feature_io import save_features
+from scripts.scorecard import Scorecard, load_ids, score_file
+
+
+@pytest.fixture()
+def portfolio(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(250, 5))
+    y = (X[:, 0] > 0).astype(np.uint8)
+    save_features(X, y, str(tmp_path / "X.npy"), str(tmp_path / "y.npy"))
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+    ids = np.array([f"CustomerId_{i}" for i in range(len(X))])
+    return tmp_path, X, model, ids
+
+
+def bad_probability(good_bad_odds):
+    return 1.0 / (1.0 + np.asarray(good_bad_odds, dtype=np.float64))
+
+
+@pytest.mark.parametrize("base_score, base_odds, pdo", [(600, 50, 20), (650, 19, 40)])
+def test_points_to_double_the_odds(base_score, base_odds, pdo):
+    card = Scorecard(base_score, base_odds, pdo, min_score=0, max_score=2_000)
+    assert card.factor == pytest.approx(pdo / np.log(2))
+    assert card.offset == pytest.approx(base_score - card.factor * np.log(base_odds))
+
+    odds = base_odds * 2.0 ** np.arange(-3, 4)
+    scores = card.score(bad_probability(odds))
+    np.testing.assert_allclose(scores[3], base_score)
+    np.testing.assert_allclose(np.diff(scores), pdo)
+    np.testing.assert_allclose(card.score_from_log_odds(-np.log(odds)), scores)
+
+
+def test_scores_are_clipped_and_banded():
+    card = Scorecard()
+    scores = card.score([0.0, 1.0, bad_probability(50)])
+    np.testing.assert_allclose(scores, [850, 300, 600])
+    grades, amounts, durations = card.loan_terms(np.array([299, 300, 579.9, 580, 850]))
+    assert grades.tolist() == ["F", "F", "E", "D", "A"]
+    assert amounts.tolist() == [0, 0, 1000, 5000, 50000]
+    assert durations.tolist() == [0, 0, 3, 6, 36]
+
+
+def test_points_sum_to_the_score():
+    card = Scorecard()
+    rng = np.random.default_rng(1)
+    woe, coefficients, intercept = rng.normal(size=(20, 4)), rng.normal(size=4), -1.3
+    log_odds = woe @ coefficients + intercept
+    np.testing.assert_allclose(
+        card.points(woe, coefficients, intercept).sum(axis=1),
+        card.offset - card.factor * log_odds,
+    )
+
+
+def test_score_file_writes_ids_in_row_order(portfolio):
+    tmp_path, X, model, ids = portfolio
+    out = tmp_path / "scores.csv"
+    n_rows = score_file(
+        model, str(tmp_path / "X.npy"), out, chunk_size=100, customer_ids=ids
+    )
+    scores = pd.read_csv(out)
+    assert n_rows == len(X)
+    assert scores.columns[0] == "CustomerId"
+    np.testing.assert_array_equal(scores["CustomerId"], ids)
+    expected = Scorecard().score_portfolio(model.predict_proba(X)[:, 1])
+    np.testing.assert_array_equal(scores["score"], expected["score"])
+
+
+def test_score_file_rejects_misaligned_ids(portfolio):
+    tmp_path, _, model, ids = portfolio
+    with pytest.raises(ValueError, match="customer ids"):
+        score_file(
+            model, str(tmp_path / "X.npy"), tmp_path / "s.csv", customer_ids=ids[:-1]
+        )
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".npy"])
+def test_load_ids(tmp_path, suffix):
+    ids = np.array(["CustomerId_7", "CustomerId_001", "CustomerId_7"])
+    path = str(tmp_path / f"ids{suffix}")
+    frame = pd.DataFrame({"TransactionId": ["t1", "t2", "t3"], "CustomerId": ids})
+    if suffix == ".csv":
+        frame.to_csv(path, index=False)
+    elif suffix == ".parquet":
+        frame.to_parquet(path)
+    else:
+        np.save(path, ids)
+    np.testing.assert_array_equal(load_ids(path).astype(str), ids)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from scripts.feature_io import save_features
+from scripts.train_models import ModelTrainer
+
+PARAM_GRIDS = {
+    "Logistic Regression": {"C": [0.1, 1.0], "max_iter": [500]},
+    "Decision Tree": {"max_depth": [2, 4]},
+}
+
+
+@pytest.fixture()
+def saved_features(tmp_path):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 5))
+    y = (X[:, 0] - X[:, 1] + rng.normal(0.0, 0.5, 600) > 0).astype(np.int64)
+    x_path, y_path = str(tmp_path / "X.npy"), str(tmp_path / "y.npy")
+    save_features(X, y, x_path, y_path)
+    return x_path, y_path
+
+
+def test_parallel_search(saved_features):
+    trainer = ModelTrainer(*saved_features)
+    results = trainer.parallel_search(PARAM_GRIDS, cv=3, n_workers=2)
+
+    assert sorted(results["Model"]) == sorted(PARAM_GRIDS)
+    assert "Error" not in results
+    for _, row in results.iterrows():
+        grid = PARAM_GRIDS[row["Model"]]
+        assert set(row["Best Params"]) == set(grid)
+        assert all(row["Best Params"][k] in grid[k] for k in grid)
+        assert 0.5 < row["ROC-AUC"] <= 1.0
+        assert 0.0 <= row["CV Score"] <= 1.0
+
+    best = results.loc[results["ROC-AUC"].idxmax(), "Model"]
+    assert trainer.best_model is trainer.trained_models[best]
+    assert trainer.best_model.predict(trainer.x_test).shape == trainer.y_test.shape
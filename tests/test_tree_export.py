@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import (
+    AdaBoostClassifier,
+    BaggingClassifier,
+    ExtraTreesClassifier,
+    GradientBoostingClassifier,
+    RandomForestClassifier,
+)
+from sklearn.tree import DecisionTreeClassifier
+
+from scripts.serving.tree_export import FlatEnsemble, compile_ensemble
+
+
+def make_data(n_classes, missing=False, n_rows=600, n_features=8, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features)).astype(np.float32)
+    y = np.digitize(X[:, 0] + 0.5 * X[:, 1], np.linspace(-1, 1, n_classes - 1))
+    if missing:
+        X[rng.random(X.shape) < 0.15] = np.nan
+    return X, y
+
+
+def assert_parity(model, X):
+    flat = FlatEnsemble.from_model(model)
+    np.testing.assert_allclose(flat.predict_proba(X), model.predict_proba(X), atol=1e-9)
+    np.testing.assert_array_equal(flat.predict(X), model.predict(X))
+
+
+TREE_MODELS = {
+    "tree": lambda: DecisionTreeClassifier(max_depth=6, random_state=0),
+    "forest": lambda: RandomForestClassifier(n_estimators=20, random_state=0),
+    "extra-trees": lambda: ExtraTreesClassifier(n_estimators=20, random_state=0),
+}
+
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+@pytest.mark.parametrize("make_model", TREE_MODELS.values(), ids=TREE_MODELS.keys())
+def test_forest_parity(make_model, n_classes):
+    X, y = make_data(n_classes)
+    assert_parity(make_model().fit(X, y), make_data(n_classes, seed=1)[0])
+
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+@pytest.mark.parametrize("make_model", TREE_MODELS.values(), ids=TREE_MODELS.keys())
+def test_forest_parity_routes_missing_values_like_sklearn(make_model, n_classes):
+    X, y = make_data(n_classes, missing=True)
+    model = make_model().fit(X, y)
+    X_test = make_data(n_classes, missing=True, seed=1)[0]
+    assert np.isnan(X_test).any()
+    assert_parity(model, X_test)
+
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_gradient_boosting_parity(n_classes):
+    # sklearn's GradientBoostingClassifier rejects NaN input, so no missing values here
+    X, y = make_data(n_classes)
+    model = GradientBoostingClassifier(n_estimators=30, max_depth=3, random_state=0)
+    assert_parity(model.fit(X, y), make_data(n_classes, seed=1)[0])
+
+
+def test_export_roundtrip(tmp_path):
+    X, y = make_data(2, missing=True)
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    FlatEnsemble.from_model(model).save(tmp_path)
+    loaded = FlatEnsemble.load(tmp_path)
+    np.testing.assert_allclose(loaded.predict_proba(X), model.predict_proba(X))
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        BaggingClassifier(
+            DecisionTreeClassifier(), n_estimators=5, max_features=0.5, random_state=0
+        ),
+        AdaBoostClassifier(n_estimators=5, random_state=0),
+    ],
+    ids=["bagging", "adaboost"],
+)
+def test_unsupported_ensembles_are_rejected(model):
+    X, y = make_data(2)
+    with pytest.raises(ValueError, match="Cannot compile"):
+        compile_ensemble(model.fit(X, y))
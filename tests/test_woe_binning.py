@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.woe_binning import DefaultEstimator, WoEBinner
+
+EPS = 1e-5
+
+
+def make_data(n_rows=3_000, n_features=4, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features))
+    X[rng.random(X.shape) < 0.05] = np.nan
+    logit = np.nan_to_num(X[:, 0]) - 0.5 * np.nan_to_num(X[:, 1])
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return X, y
+
+
+def reference_woe_iv(x, y, max_bins):
+    """WoE per bin (missing last) and IV of one feature with pandas qcut/groupby."""
+    bins = pd.qcut(x, max_bins, labels=False, duplicates="drop")
+    codes = np.where(np.isnan(bins), max_bins, bins).astype(int)
+    frame = pd.DataFrame({"bin": codes, "bad": y, "good": 1 - y})
+    counts = frame.groupby("bin")[["good", "bad"]].sum()
+    counts = counts.reindex(range(max_bins + 1), fill_value=0)
+    dist_good = counts["good"] / counts["good"].sum()
+    dist_bad = counts["bad"] / counts["bad"].sum()
+    woe = np.log((dist_good + EPS) / (dist_bad + EPS))
+    woe[(counts["good"] + counts["bad"]) == 0] = 0.0
+    return woe.to_numpy(), float(((dist_good - dist_bad) * woe).sum())
+
+
+def test_woe_and_iv_match_pandas_reference():
+    X, y = make_data()
+    binner = WoEBinner(max_bins=5, eps=EPS).fit(X, y)
+    woe = binner.woe.reshape(X.shape[1], -1)
+    for f in range(X.shape[1]):
+        expected_woe, expected_iv = reference_woe_iv(X[:, f], y, 5)
+        np.testing.assert_allclose(woe[f], expected_woe, atol=1e-12)
+        assert binner.iv[f] == pytest.approx(expected_iv)
+        np.testing.assert_allclose(
+            binner.edges[:, f], np.nanquantile(X[:, f], np.linspace(0, 1, 6))
+        )
+
+
+def test_transform_maps_values_to_their_bin_woe():
+    X, y = make_data()
+    binner = WoEBinner(max_bins=5, eps=EPS).fit(X, y)
+    result = binner.transform(X)
+    for f in range(X.shape[1]):
+        expected_woe, _ = reference_woe_iv(X[:, f], y, 5)
+        bins = pd.qcut(X[:, f], 5, labels=False)
+        codes = np.where(np.isnan(bins), 5, bins).astype(int)
+        np.testing.assert_allclose(result[:, f], expected_woe[codes], atol=1e-12)
+
+
+def test_partial_fit_equals_fit_with_the_same_edges():
+    X, y = make_data()
+    full = WoEBinner(max_bins=5, eps=EPS).fit(X, y)
+    incremental = WoEBinner(max_bins=5, eps=EPS).fit(X[:1_000], y[:1_000])
+    incremental.edges = full.edges
+    incremental.count[:] = 0
+    incremental.bad[:] = 0
+    incremental.partial_fit(X[:1_000], y[:1_000]).partial_fit(X[1_000:], y[1_000:])
+    np.testing.assert_allclose(incremental.woe, full.woe)
+    np.testing.assert_allclose(incremental.iv, full.iv)
+
+
+@pytest.mark.parametrize("order", ["C", "F"])
+def test_fit_leaves_the_input_unchanged(order):
+    X, y = make_data()
+    X = np.array(X, order=order)
+    before = X.copy()
+    WoEBinner(max_bins=5).fit(X, y)
+    np.testing.assert_array_equal(X, before)
+
+
+def test_fit_woe_accepts_a_dataframe():
+    X, y = make_data()
+    df = pd.DataFrame(X, columns=["Recency", "Frequency", "Monetary", "StdDev"])
+    before = df.copy()
+    iv = DefaultEstimator(max_bins=5).fit_woe(df, y)
+    pd.testing.assert_frame_equal(df, before)
+    assert set(iv.index) == set(df.columns)
+    for column in df.columns:
+        _, expected_iv = reference_woe_iv(df[column].to_numpy(), y, 5)
+        assert iv[column] == pytest.approx(expected_iv)
+
+
+def reference_bin_counts(score, y, edges):
+    """Rows and defaults per bin of `edges`, scores outside clipped to the edge bins."""
+    bins = pd.cut(np.clip(score, edges[0], edges[-1]), edges, include_lowest=True)
+    frame = pd.DataFrame({"bin": bins, "default": y})
+    stats = frame.groupby("bin", observed=False)["default"].agg(["count", "sum"])
+    return stats["count"].to_numpy(), stats["sum"].to_numpy()
+
+
+def test_update_woe_equals_a_recompute_with_the_same_edges():
+    rng = np.random.default_rng(3)
+    X = rng.random((1_000, 4))
+    y = rng.integers(0, 2, 1_000)
+    # The delta batch reaches beyond the fitted score range on both sides
+    X_new = rng.uniform(-0.2, 1.2, (300, 4))
+    y_new = rng.integers(0, 2, 300)
+
+    estimator = DefaultEstimator(max_bins=5)
+    estimator.compute_woe(X, y)
+    table = estimator.update_woe(X_new, y_new)
+
+    score = np.concatenate([X.mean(axis=1), X_new.mean(axis=1)])
+    count, default = reference_bin_counts(
+        score, np.concatenate([y, y_new]), estimator.bin_edges
+    )
+    np.testing.assert_array_equal(estimator.bin_count, count)
+    np.testing.assert_array_equal(estimator.bin_default, default)
+    bad_rate, good_rate = default / count, (count - default) / count
+    np.testing.assert_allclose(
+        table["woe"], np.log((good_rate + 1e-5) / (bad_rate + 1e-5))
+    )
+
+
+def test_update_woe_in_batches_equals_one_update():
+    rng = np.random.default_rng(4)
+    X, y = rng.random((800, 4)), rng.integers(0, 2, 800)
+    X_new, y_new = rng.random((400, 4)), rng.integers(0, 2, 400)
+    once, batched = DefaultEstimator(), DefaultEstimator()
+    once.compute_woe(X, y)
+    batched.compute_woe(X, y)
+    expected = once.update_woe(X_new, y_new)
+    batched.update_woe(X_new[:150], y_new[:150])
+    pd.testing.assert_frame_equal(
+        batched.update_woe(X_new[150:], y_new[150:]), expected
+    )
+
+
+def test_update_woe_needs_compute_woe():
+    with pytest.raises(ValueError, match="compute_woe"):
+        DefaultEstimator().update_woe(np.ones((2, 4)), [0, 1])
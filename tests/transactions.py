@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from scripts.feature_engineer import ID_COLUMNS
+
+
+def make_transactions(n_rows=600, start="2018-11-15", days=60, n_customers=40, seed=0):
+    """Cleaned transactions with every column of the Xente schema, in time order."""
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.integers(0, days * 86_400, n_rows))
+    timestamps = pd.Timestamp(start, tz="UTC") + pd.to_timedelta(seconds, unit="s")
+    amount = np.round(rng.lognormal(7.0, 1.2, n_rows), 2) * rng.choice([1, -1], n_rows)
+    return pd.DataFrame(
+        {
+            "TransactionId": [f"TransactionId_{i}" for i in range(n_rows)],
+            "BatchId": [f"BatchId_{i}" for i in rng.integers(0, n_rows // 2, n_rows)],
+            "AccountId": [f"AccountId_{i}" for i in rng.integers(0, 30, n_rows)],
+            "SubscriptionId": [
+                f"SubscriptionId_{i}" for i in rng.integers(0, 30, n_rows)
+            ],
+            "CustomerId": [
+                f"CustomerId_{i}" for i in rng.integers(0, n_customers, n_rows)
+            ],
+            "CurrencyCode": "UGX",
+            "CountryCode": 256,
+            "ProviderId": [f"ProviderId_{i}" for i in rng.integers(1, 7, n_rows)],
+            "ProductId": [f"ProductId_{i}" for i in rng.integers(1, 12, n_rows)],
+            "ProductCategory": rng.choice(
+                ["airtime", "financial_services", "utility_bill", "tv"], n_rows
+            ),
+            "ChannelId": [f"ChannelId_{i}" for i in rng.integers(1, 4, n_rows)],
+            "Amount": amount,
+            "Value": np.abs(amount).astype(np.int64),
+            "TransactionStartTime": timestamps.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "PricingStrategy": rng.integers(0, 4, n_rows),
+            "FraudResult": (rng.random(n_rows) < 0.1).astype(np.int64),
+        }
+    )
+
+
+def engineer_features(fe):
+    """Run the FeatureEngineering steps up to scaling and return the feature frame."""
+    fe.create_aggregate_features()
+    fe.extract_features()
+    fe.encode_categorical_variables()
+    fe.normalize_standardize_numerical_features()
+    return fe.df.drop(columns=[fe.target_column, *ID_COLUMNS])